@@ -0,0 +1,70 @@
+"""Add indexes for the party list, gift registry and guest list queries
+
+Revision ID: 7c1e4b2d9a60
+Revises: 3ba9bb29f4ea
+Create Date: 2026-10-18 09:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b2d9a60'
+down_revision: Union[str, None] = '3ba9bb29f4ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction on Postgres,
+    # so the indexes are built in autocommit mode without locking writes.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_party_party_date_party_time_uuid',
+            'party',
+            ['party_date', 'party_time', 'uuid'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_gift_party_id',
+            'gift',
+            ['party_id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_guest_party_id_attending',
+            'guest',
+            ['party_id', 'attending'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_guest_party_id_attending',
+            table_name='guest',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_gift_party_id',
+            table_name='gift',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_party_party_date_party_time_uuid',
+            table_name='party',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,88 @@
+"""Add indexed guest name search
+
+Revision ID: b5d2f08e6c31
+Revises: 7c1e4b2d9a60
+Create Date: 2026-10-18 10:02:17.540611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d2f08e6c31'
+down_revision: Union[str, None] = '7c1e4b2d9a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_guest_name_trgm',
+                'guest',
+                ['name'],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={'name': 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    elif dialect == 'sqlite':
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS guest_fts USING fts5(
+                name, content='guest', content_rowid='rowid', tokenize='trigram'
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS guest_fts_after_insert AFTER INSERT ON guest BEGIN
+                INSERT INTO guest_fts (rowid, name) VALUES (new.rowid, new.name);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS guest_fts_after_delete AFTER DELETE ON guest BEGIN
+                INSERT INTO guest_fts (guest_fts, rowid, name)
+                VALUES ('delete', old.rowid, old.name);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS guest_fts_after_update AFTER UPDATE OF name ON guest
+            BEGIN
+                INSERT INTO guest_fts (guest_fts, rowid, name)
+                VALUES ('delete', old.rowid, old.name);
+                INSERT INTO guest_fts (rowid, name) VALUES (new.rowid, new.name);
+            END
+            """
+        )
+        # Index the guests that already exist.
+        op.execute("INSERT INTO guest_fts (guest_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_guest_name_trgm',
+                table_name='guest',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS guest_fts_after_update')
+        op.execute('DROP TRIGGER IF EXISTS guest_fts_after_delete')
+        op.execute('DROP TRIGGER IF EXISTS guest_fts_after_insert')
+        op.execute('DROP TABLE IF EXISTS guest_fts')
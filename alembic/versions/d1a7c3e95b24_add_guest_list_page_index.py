@@ -0,0 +1,40 @@
+"""Add an index for the keyset-paginated guest list
+
+Revision ID: d1a7c3e95b24
+Revises: b5d2f08e6c31
+Create Date: 2026-10-18 15:02:37.514920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1a7c3e95b24'
+down_revision: Union[str, None] = 'b5d2f08e6c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_guest_party_id_name_uuid',
+            'guest',
+            ['party_id', 'name', 'uuid'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_guest_party_id_name_uuid',
+            table_name='guest',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,286 @@
+"""Add per-party guest and gift counters
+
+Revision ID: e4f9a2c7b813
+Revises: d1a7c3e95b24
+Create Date: 2026-10-18 16:40:12.208344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f9a2c7b813'
+down_revision: Union[str, None] = 'd1a7c3e95b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TRIGGERS = [
+    ('party_counters_guest_insert', 'guest'),
+    ('party_counters_guest_delete', 'guest'),
+    ('party_counters_guest_update', 'guest'),
+    ('party_counters_gift_insert', 'gift'),
+    ('party_counters_gift_delete', 'gift'),
+    ('party_counters_gift_update', 'gift'),
+]
+
+# The triggers of party_app.counters as of this revision, copied so that
+# later changes to them don't change what this revision does.
+_SQLITE_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_guest_insert AFTER INSERT ON guest
+    BEGIN
+        UPDATE party
+        SET guest_count = guest_count + 1,
+            attending_count = attending_count + new.attending
+        WHERE uuid = new.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_guest_delete AFTER DELETE ON guest
+    BEGIN
+        UPDATE party
+        SET guest_count = guest_count - 1,
+            attending_count = attending_count - old.attending
+        WHERE uuid = old.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_guest_update
+    AFTER UPDATE OF attending, party_id ON guest
+    BEGIN
+        UPDATE party
+        SET guest_count = guest_count - 1,
+            attending_count = attending_count - old.attending
+        WHERE uuid = old.party_id;
+        UPDATE party
+        SET guest_count = guest_count + 1,
+            attending_count = attending_count + new.attending
+        WHERE uuid = new.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_gift_insert AFTER INSERT ON gift
+    BEGIN
+        UPDATE party
+        SET gift_count = gift_count + 1, gift_total = gift_total + new.price
+        WHERE uuid = new.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_gift_delete AFTER DELETE ON gift
+    BEGIN
+        UPDATE party
+        SET gift_count = gift_count - 1, gift_total = gift_total - old.price
+        WHERE uuid = old.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_gift_update
+    AFTER UPDATE OF price, party_id ON gift
+    BEGIN
+        UPDATE party
+        SET gift_count = gift_count - 1, gift_total = gift_total - old.price
+        WHERE uuid = old.party_id;
+        UPDATE party
+        SET gift_count = gift_count + 1, gift_total = gift_total + new.price
+        WHERE uuid = new.party_id;
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION party_counters_guest() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE party
+            SET guest_count = party.guest_count + deltas.guest_count,
+                attending_count = party.attending_count + deltas.attending_count
+            FROM (
+                SELECT party_id, count(*) AS guest_count,
+                       count(*) FILTER (WHERE attending) AS attending_count
+                FROM new_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE party
+            SET guest_count = party.guest_count - deltas.guest_count,
+                attending_count = party.attending_count - deltas.attending_count
+            FROM (
+                SELECT party_id, count(*) AS guest_count,
+                       count(*) FILTER (WHERE attending) AS attending_count
+                FROM old_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSE
+            UPDATE party
+            SET guest_count = party.guest_count + deltas.guest_count,
+                attending_count = party.attending_count + deltas.attending_count
+            FROM (
+                SELECT party_id, sum(guest_count) AS guest_count,
+                       sum(attending_count) AS attending_count
+                FROM (
+                    SELECT party_id, 1 AS guest_count, attending::int AS attending_count
+                    FROM new_rows
+                    UNION ALL
+                    SELECT party_id, -1, -attending::int FROM old_rows
+                ) AS changes
+                GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id
+              AND (deltas.guest_count <> 0 OR deltas.attending_count <> 0);
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_guest_insert ON guest",
+    """
+    CREATE TRIGGER party_counters_guest_insert AFTER INSERT ON guest
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_guest()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_guest_delete ON guest",
+    """
+    CREATE TRIGGER party_counters_guest_delete AFTER DELETE ON guest
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_guest()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_guest_update ON guest",
+    """
+    CREATE TRIGGER party_counters_guest_update AFTER UPDATE ON guest
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_guest()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION party_counters_gift() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE party
+            SET gift_count = party.gift_count + deltas.gift_count,
+                gift_total = party.gift_total + deltas.gift_total
+            FROM (
+                SELECT party_id, count(*) AS gift_count, sum(price) AS gift_total
+                FROM new_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE party
+            SET gift_count = party.gift_count - deltas.gift_count,
+                gift_total = party.gift_total - deltas.gift_total
+            FROM (
+                SELECT party_id, count(*) AS gift_count, sum(price) AS gift_total
+                FROM old_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSE
+            UPDATE party
+            SET gift_count = party.gift_count + deltas.gift_count,
+                gift_total = party.gift_total + deltas.gift_total
+            FROM (
+                SELECT party_id, sum(gift_count) AS gift_count,
+                       sum(gift_total) AS gift_total
+                FROM (
+                    SELECT party_id, 1 AS gift_count, price AS gift_total
+                    FROM new_rows
+                    UNION ALL
+                    SELECT party_id, -1, -price FROM old_rows
+                ) AS changes
+                GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id
+              AND (deltas.gift_count <> 0 OR deltas.gift_total <> 0);
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_gift_insert ON gift",
+    """
+    CREATE TRIGGER party_counters_gift_insert AFTER INSERT ON gift
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_gift()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_gift_delete ON gift",
+    """
+    CREATE TRIGGER party_counters_gift_delete AFTER DELETE ON gift
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_gift()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_gift_update ON gift",
+    """
+    CREATE TRIGGER party_counters_gift_update AFTER UPDATE ON gift
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_gift()
+    """,
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    with op.batch_alter_table('party') as batch_op:
+        for column in ('guest_count', 'attending_count', 'gift_count'):
+            batch_op.add_column(
+                sa.Column(column, sa.Integer(), nullable=False, server_default='0')
+            )
+        batch_op.add_column(
+            sa.Column(
+                'gift_total',
+                sa.Numeric(scale=2),
+                nullable=False,
+                server_default='0',
+            )
+        )
+
+    # Backfill before the triggers exist, they only apply deltas.
+    op.execute(
+        """
+        UPDATE party SET
+            guest_count = (
+                SELECT count(*) FROM guest WHERE guest.party_id = party.uuid
+            ),
+            attending_count = (
+                SELECT count(*) FROM guest
+                WHERE guest.party_id = party.uuid AND guest.attending
+            ),
+            gift_count = (
+                SELECT count(*) FROM gift WHERE gift.party_id = party.uuid
+            ),
+            gift_total = (
+                SELECT coalesce(sum(price), 0) FROM gift
+                WHERE gift.party_id = party.uuid
+            )
+        """
+    )
+
+    if dialect == 'postgresql':
+        statements = _POSTGRES_DDL
+    elif dialect == 'sqlite':
+        statements = _SQLITE_DDL
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    for trigger, table in reversed(_TRIGGERS):
+        if dialect == 'postgresql':
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger} ON {table}')
+        else:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    if dialect == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS party_counters_gift()')
+        op.execute('DROP FUNCTION IF EXISTS party_counters_guest()')
+
+    with op.batch_alter_table('party') as batch_op:
+        for column in ('gift_total', 'gift_count', 'attending_count', 'guest_count'):
+            batch_op.drop_column(column)
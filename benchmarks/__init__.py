@@ -0,0 +1,14 @@
+"""Latency and throughput benchmarks of the party routes.
+
+    python -m benchmarks.generate --parties 1000 --load
+    python -m benchmarks.run --output benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --base-url http://127.0.0.1:8000
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.sqlite_writes --writers 8 --readers 4
+
+`generate` writes a deterministic data set and can load it into DATABASE_URL.
+`run` times each named route either in process, through the ASGI app, or
+against a running server. `compare` diffs two result files. `sqlite_writes`
+compares concurrent writes to SQLite with its defaults and with the tuned
+profile of `db.py`.
+"""
@@ -0,0 +1,65 @@
+"""Compares two result files of `benchmarks.run`, route by route.
+
+    python -m benchmarks.compare before.json after.json [--threshold 10]
+
+Exits with status 1 when the p95 latency of any route grew by more than
+`--threshold` percent.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+_METRICS = ("p50_ms", "p95_ms", "p99_ms", "requests_per_second")
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(before: dict, after: dict, threshold: float) -> tuple[list[str], bool]:
+    """Report lines and whether a route regressed past `threshold`."""
+    lines = [f"{'route':<34}" + "".join(f"{metric:>22}" for metric in _METRICS)]
+    regressed = False
+
+    for route, result in after["routes"].items():
+        previous = before["routes"].get(route)
+        if previous is None:
+            lines.append(f"{route:<34} (new)")
+            continue
+
+        cells = []
+        for metric in _METRICS:
+            change = _change(previous[metric], result[metric])
+            cells.append(f"{previous[metric]:>9} → {result[metric]:<9}{change:+.0f}%")
+        lines.append(f"{route:<34}" + "".join(f"{cell:>22}" for cell in cells))
+
+        if _change(previous["p95_ms"], result["p95_ms"]) > threshold:
+            regressed = True
+
+    return lines, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark results.")
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="p95 growth in percent that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    lines, regressed = compare(
+        json.loads(args.before.read_text()),
+        json.loads(args.after.read_text()),
+        args.threshold,
+    )
+    print("\n".join(lines))
+    raise SystemExit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Deterministic party, guest and gift data for the benchmarks.
+
+The same seed and options always produce the same files. Guests per party
+follow a log-normal distribution around `--guests-median`, like real guest
+lists: most are small and a few are large. On top of that, the first
+`--mega-parties` parties get `--mega-guests` guests each, which exercises the
+paths that must not grow with the size of a party. Gifts per party are
+uniform between 0 and `--gifts-max`.
+
+The files are NDJSON in the format of the initial data loader:
+
+    python -m benchmarks.generate --parties 1000 --output-dir benchmarks/data
+    python -m benchmarks.generate --parties 1000 --load
+"""
+
+import argparse
+import json
+import math
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import IO, Iterator
+from uuid import UUID
+
+_FIRST_NAMES = [
+    "Anna", "Catherine", "Jane", "Maria", "Elizabeth", "Mary", "Margaret",
+    "Isabel", "Eleanor", "Joan", "Henry", "Thomas", "Edward", "Richard",
+    "William", "Arthur", "Charles", "George", "Francis", "Philip", "Louis",
+    "Tomas", "Sofia", "Lucia", "Marta", "Pablo", "Diego", "Carmen", "Elena",
+    "Juan",
+]  # fmt: skip
+_LAST_NAMES = [
+    "Boleyn", "Tudor", "Seymour", "Parr", "Howard", "Aragon", "Cleves",
+    "Hodge", "Stuart", "York", "Lancaster", "Grey", "Dudley", "Cromwell",
+    "More", "Wolsey", "Cranmer", "Percy", "Neville", "Beaufort", "Garcia",
+    "Lopez", "Martinez", "Sanchez", "Romero", "Torres", "Navarro", "Ortega",
+    "Castillo", "Molina",
+]  # fmt: skip
+_GIFTS = [
+    "Bonsai tree", "Roses", "Cookbook", "Board game", "Wine glasses",
+    "Teapot", "Blanket", "Candles", "Vinyl record", "Coffee grinder",
+    "Picture frame", "Plant pot", "Headphones", "Puzzle", "Scarf",
+]  # fmt: skip
+_VENUES = [
+    "Amazing castle", "Garden house", "Rooftop bar", "Beach club",
+    "Old library", "Town hall", "Boat", "Vineyard",
+]  # fmt: skip
+_INVITATION = (
+    "Come to this amazing party. Lorem ipsum dolor sit amet, consectetur "
+    "adipiscing elit. Duis dictum non urna sit amet porttitor."
+)
+
+
+# A fixed date, not today: the same seed must give the same party dates on any
+# day. Far enough ahead that the parties are still upcoming for the party list.
+START_DATE = date(2030, 1, 1)
+
+
+@dataclass(frozen=True)
+class DataSet:
+    parties: int = 1000
+    guests_median: int = 40
+    # Spread of the log-normal guest counts, 0 gives every party the median.
+    guests_sigma: float = 0.8
+    guests_max: int = 2000
+    mega_parties: int = 2
+    mega_guests: int = 50_000
+    gifts_max: int = 25
+    attending_ratio: float = 0.6
+    seed: int = 42
+    start_date: date = START_DATE
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def _guest_count(rng: random.Random, data_set: DataSet, index: int) -> int:
+    if index < data_set.mega_parties:
+        return data_set.mega_guests
+    count = rng.lognormvariate(math.log(data_set.guests_median), data_set.guests_sigma)
+    return max(1, min(data_set.guests_max, round(count)))
+
+
+def generate(data_set: DataSet) -> Iterator[tuple[str, dict]]:
+    """(table, record) pairs of the data set, every party before its children."""
+    rng = random.Random(data_set.seed)
+
+    for index in range(data_set.parties):
+        party_id = _uuid(rng)
+        party_date = data_set.start_date + timedelta(days=rng.randint(-30, 365))
+        yield "party", {
+            "uuid": str(party_id),
+            "party_date": party_date.isoformat(),
+            "party_time": f"{rng.randint(10, 23):02d}:{rng.choice((0, 30)):02d}:00",
+            "invitation": _INVITATION,
+            "venue": rng.choice(_VENUES),
+        }
+
+        for _ in range(_guest_count(rng, data_set, index)):
+            yield "guest", {
+                "uuid": str(_uuid(rng)),
+                "party_id": str(party_id),
+                "name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+                "attending": rng.random() < data_set.attending_ratio,
+            }
+
+        for _ in range(rng.randint(0, data_set.gifts_max)):
+            price = Decimal(rng.randint(100, 20_000)) / 100
+            yield "gift", {
+                "uuid": str(_uuid(rng)),
+                "party_id": str(party_id),
+                "gift_name": rng.choice(_GIFTS),
+                "price": str(price),
+                "link": None,
+            }
+
+
+def write_data_set(data_set: DataSet, output_dir: Path) -> dict[str, Path]:
+    """Writes one NDJSON file per table into `output_dir`, returns their paths."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = {
+        table: output_dir / f"{table}s.ndjson" for table in ("party", "guest", "gift")
+    }
+    files: dict[str, IO[str]] = {
+        table: open(path, "w", encoding="utf-8") for table, path in paths.items()
+    }
+    try:
+        for table, record in generate(data_set):
+            files[table].write(json.dumps(record) + "\n")
+    finally:
+        for file in files.values():
+            file.close()
+    return paths
+
+
+def main() -> None:
+    defaults = DataSet()
+    parser = argparse.ArgumentParser(description="Generate benchmark data.")
+    parser.add_argument("--parties", type=int, default=defaults.parties)
+    parser.add_argument("--guests-median", type=int, default=defaults.guests_median)
+    parser.add_argument("--guests-sigma", type=float, default=defaults.guests_sigma)
+    parser.add_argument("--guests-max", type=int, default=defaults.guests_max)
+    parser.add_argument("--mega-parties", type=int, default=defaults.mega_parties)
+    parser.add_argument("--mega-guests", type=int, default=defaults.mega_guests)
+    parser.add_argument("--gifts-max", type=int, default=defaults.gifts_max)
+    parser.add_argument(
+        "--attending-ratio", type=float, default=defaults.attending_ratio
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--start-date",
+        type=date.fromisoformat,
+        default=defaults.start_date,
+        help="party dates are spread from 30 days before to a year after it",
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path(__file__).parent / "data"
+    )
+    parser.add_argument(
+        "--load",
+        action="store_true",
+        help="replace the data of DATABASE_URL with the generated data set",
+    )
+    args = parser.parse_args()
+
+    data_set = DataSet(
+        parties=args.parties,
+        guests_median=args.guests_median,
+        guests_sigma=args.guests_sigma,
+        guests_max=args.guests_max,
+        mega_parties=args.mega_parties,
+        mega_guests=args.mega_guests,
+        gifts_max=args.gifts_max,
+        attending_ratio=args.attending_ratio,
+        seed=args.seed,
+        start_date=args.start_date,
+    )
+    paths = write_data_set(data_set, args.output_dir)
+    print(f"Wrote {', '.join(str(path) for path in paths.values())}")
+
+    if args.load:
+        from db import engine
+        from party_app.initial_data.load_initial_data_to_db import (
+            clear_all_tables,
+            load_file,
+        )
+        from party_app.models import Gift, Guest, Party
+
+        clear_all_tables(engine)
+        for table, model in (("party", Party), ("gift", Gift), ("guest", Guest)):
+            load_file(engine, paths[table], model)
+
+
+if __name__ == "__main__":
+    main()
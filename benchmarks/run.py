@@ -0,0 +1,264 @@
+"""Times the named routes of the app and saves the results as JSON.
+
+Without `--base-url` the requests go straight to the ASGI app in this
+process, over the database of DATABASE_URL. With it they go to a running
+server, for example `uvicorn party_app.main:app --workers 4`, which must
+serve the same database: the parties and guests to request are picked from
+it here.
+
+Each route gets `--warmup` untimed requests, then `--requests` timed ones
+with at most `--concurrency` in flight. Its result has the p50, p95 and p99
+latency in milliseconds, the requests per second and the error count.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+from uuid import UUID
+
+import httpx
+from sqlmodel import Session, func, select
+
+from party_app.models import Guest, Party
+from party_app.routes.guest_list import encode_guest_cursor
+
+
+@dataclass(frozen=True)
+class Target:
+    """Parties and guests the requests are about."""
+
+    party_id: UUID
+    mega_party_id: UUID
+    guest_ids: list[UUID]
+    guest_cursor: str
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    # Path of the request, built with `app.url_path_for` for the target.
+    url: Callable[[Callable, Target], str]
+    data: Optional[Callable[[Target], dict]] = None
+
+
+SCENARIOS = [
+    Scenario("party_list_page", "GET", lambda url_for, t: url_for("party_list_page")),
+    Scenario(
+        "party_detail_page",
+        "GET",
+        lambda url_for, t: url_for("party_detail_page", party_id=t.party_id),
+    ),
+    Scenario(
+        "guest_list_page",
+        "GET",
+        lambda url_for, t: url_for("guest_list_page", party_id=t.party_id),
+    ),
+    Scenario(
+        "guest_list_page[mega]",
+        "GET",
+        lambda url_for, t: url_for("guest_list_page", party_id=t.mega_party_id),
+    ),
+    Scenario(
+        "guest_rows_partial[mega]",
+        "GET",
+        lambda url_for, t: url_for("guest_rows_partial", party_id=t.mega_party_id)
+        + f"?cursor={t.guest_cursor}",
+    ),
+    Scenario(
+        "filter_guests_partial[mega]",
+        "POST",
+        lambda url_for, t: url_for("filter_guests_partial", party_id=t.mega_party_id),
+        lambda t: {"guest_search": "ann", "attending_filter": "attending"},
+    ),
+    Scenario(
+        "mark_guests_attending_partial",
+        "PUT",
+        lambda url_for, t: url_for(
+            "mark_guests_attending_partial", party_id=t.party_id
+        ),
+        lambda t: {
+            "guest_ids": [str(guest_id) for guest_id in t.guest_ids],
+            "response_mode": "changed",
+        },
+    ),
+    Scenario(
+        "gift_registry_page",
+        "GET",
+        lambda url_for, t: url_for("gift_registry_page", party_id=t.party_id),
+    ),
+    Scenario(
+        "export_party_guests[mega]",
+        "GET",
+        lambda url_for, t: url_for("export_party_guests", party_id=t.mega_party_id),
+    ),
+]
+
+
+def find_target(session: Session) -> Target:
+    """The median party by guest count, the largest one and some guests."""
+    party_count = session.exec(select(func.count()).select_from(Party)).one()
+    if not party_count:
+        raise SystemExit("No parties, run `python -m benchmarks.generate --load`")
+
+    party_id = session.exec(
+        select(Party.uuid).order_by(Party.guest_count).offset(party_count // 2)
+    ).first()
+    mega_party_id = session.exec(
+        select(Party.uuid).order_by(Party.guest_count.desc())
+    ).first()
+    guest_ids = session.exec(
+        select(Guest.uuid).where(Guest.party_id == party_id).limit(10)
+    ).all()
+    middle_guest = session.exec(
+        select(Guest)
+        .where(Guest.party_id == mega_party_id)
+        .order_by(Guest.name, Guest.uuid)
+        .offset(1000)
+    ).first()
+
+    return Target(
+        party_id=party_id,
+        mega_party_id=mega_party_id,
+        guest_ids=guest_ids,
+        guest_cursor=encode_guest_cursor(middle_guest) if middle_guest else "",
+    )
+
+
+def percentile(latencies: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted `latencies`."""
+    if not latencies:
+        return 0.0
+    rank = max(0, min(len(latencies) - 1, round(fraction * len(latencies)) - 1))
+    return latencies[rank]
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    data: Optional[dict],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(timed: bool) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, data=data)
+            elapsed = time.perf_counter() - started
+        if timed:
+            latencies.append(elapsed * 1000)
+            errors += response.status_code >= 400
+
+    for _ in range(warmup):
+        await send(timed=False)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(timed=True) for _ in range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "requests_per_second": round(requests / wall, 1) if wall else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    from db import engine
+    from party_app.main import app
+
+    with Session(engine) as session:
+        target = find_target(session)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60
+        )
+
+    results = {}
+    async with client:
+        for scenario in SCENARIOS:
+            if args.routes and scenario.name not in args.routes:
+                continue
+            url = scenario.url(app.url_path_for, target)
+            data = scenario.data(target) if scenario.data else None
+            results[scenario.name] = await measure(
+                client,
+                scenario.method,
+                url,
+                data,
+                args.requests,
+                args.concurrency,
+                args.warmup,
+            )
+            print(f"{scenario.name}: {results[scenario.name]}")
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "asgi",
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "routes": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the party routes.")
+    parser.add_argument(
+        "--base-url", help="server to benchmark, the ASGI app in process if omitted"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--routes", nargs="*", help="scenarios to run, all of them if omitted"
+    )
+    parser.add_argument("--output", type=Path, help="JSON file for the results")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
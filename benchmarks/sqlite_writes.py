@@ -0,0 +1,162 @@
+"""Concurrent writes to a SQLite file database, with the SQLite defaults and
+with the tuned profile of `db.py`.
+
+    python -m benchmarks.sqlite_writes --writers 8 --readers 4 --writes 200
+
+For each profile a new database in `--directory` gets one party, then
+`--writers` threads each add `--writes` guests to it, one transaction per
+guest like the guest routes, while `--readers` threads keep reading its
+first page of guests. The result of each profile has the writes per second,
+the p50, p95 and p99 commit latency in milliseconds, and the writes that
+failed, with "database is locked" for the most part.
+"""
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from datetime import date, time as time_of_day
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlmodel import Session, SQLModel, select
+
+import db
+from benchmarks.run import percentile
+from party_app import counters  # noqa: F401 registers the party counter triggers
+from party_app import search  # noqa: F401 registers the guest search triggers
+from party_app.models import Guest, Party
+
+
+def run_profile(
+    directory: Path, tuned: bool, writers: int, readers: int, writes: int
+) -> dict:
+    path = directory / f"sqlite_writes_{'tuned' if tuned else 'default'}.db"
+    for stale in directory.glob(path.name + "*"):
+        stale.unlink()
+
+    engine = db.create_database_engine(
+        f"sqlite:///{path}", f"sqlite_writes_{tuned}", sqlite_tuned=tuned
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        party = Party(
+            party_date=date.today(),
+            party_time=time_of_day(12),
+            venue="Benchmark hall",
+            invitation="Come and write to the database.",
+        )
+        session.add(party)
+        session.commit()
+        party_id = party.uuid
+
+    latencies: list[float] = []
+    errors = 0
+    reads = 0
+    lock = threading.Lock()
+    writing = threading.Event()
+    writing.set()
+
+    def write(writer: int) -> None:
+        nonlocal errors
+        for i in range(writes):
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    session.add(Guest(name=f"Guest {writer}-{i}", party_id=party_id))
+                    session.commit()
+            except exc.OperationalError:
+                with lock:
+                    errors += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    def read() -> None:
+        nonlocal reads
+        statement = (
+            select(Guest)
+            .where(Guest.party_id == party_id)
+            .order_by(Guest.name, Guest.uuid)
+            .limit(50)
+        )
+        while writing.is_set():
+            try:
+                with Session(engine) as session:
+                    session.exec(statement).all()
+            except exc.OperationalError:
+                continue
+            with lock:
+                reads += 1
+
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    writer_threads = [
+        threading.Thread(target=write, args=(writer,)) for writer in range(writers)
+    ]
+    for thread in reader_threads:
+        thread.start()
+
+    started = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    writing.clear()
+    for thread in reader_threads:
+        thread.join()
+    engine.dispose()
+    db.pools.pop(f"sqlite_writes_{tuned}", None)
+
+    latencies.sort()
+    return {
+        "writes": len(latencies),
+        "errors": errors,
+        "reads": reads,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "writes_per_second": round(len(latencies) / wall, 1) if wall else 0.0,
+    }
+
+
+def run(
+    directory: Optional[Path], writers: int, readers: int, writes: int
+) -> dict[str, dict]:
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = directory or Path(temporary)
+        directory.mkdir(parents=True, exist_ok=True)
+        return {
+            profile: run_profile(directory, tuned, writers, readers, writes)
+            for profile, tuned in (("default", False), ("tuned", True))
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SQLite writes.")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200, help="per writer")
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        help="where the databases are created, a temporary directory if omitted",
+    )
+    parser.add_argument("--output", type=Path, help="JSON file for the results")
+    args = parser.parse_args()
+
+    results = run(args.directory, args.writers, args.readers, args.writes)
+    for profile, result in results.items():
+        print(f"{profile}: {result}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
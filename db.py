@@ -1,13 +1,271 @@
 import os
+import threading
+import time
 from pathlib import Path
+from typing import Optional
 
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import create_engine
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def _env_optional_int(name: str, default: str):
+    value = os.getenv(name, default)
+    return None if value.lower() in ("", "none") else int(value)
+
+
 # database_file_path = Path(__file__).resolve().parent.absolute() / "database.db"
 # print(database_file_path)
 # engine = create_engine(f"sqlite:///{database_file_path}")
 DATABASE_URL = os.getenv(
     "DATABASE_URL", f"sqlite:///{Path(__file__).parent / 'database.db'}"
 ).replace("postgres://", "postgresql+psycopg://", 1)
-engine = create_engine(DATABASE_URL)
+
+# DATABASE_REPLICA_URL serves the routes that only read from a replica of
+# DATABASE_URL, e.g. a Postgres streaming replica. They read from DATABASE_URL
+# while it isn't set.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "").replace(
+    "postgres://", "postgresql+psycopg://", 1
+)
+
+# DATABASE_ASYNC=1 serves the routes from async handlers on an AsyncSession
+# (psycopg async for Postgres, aiosqlite for SQLite) instead of the threadpool.
+DATABASE_ASYNC = _env_bool("DATABASE_ASYNC", False)
+
+# Connection pool of every engine: DB_POOL_SIZE connections are kept open and
+# up to DB_MAX_OVERFLOW more are opened under load. A checkout waits at most
+# DB_POOL_TIMEOUT seconds for a free connection.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# psycopg prepares a statement on the server after it ran this many times on a
+# connection. "none" turns prepared statements off, as PgBouncer in
+# transaction mode requires.
+DB_PREPARE_THRESHOLD = _env_optional_int("DB_PREPARE_THRESHOLD", "5")
+
+# Every new SQLite connection is set up for concurrent requests: the WAL
+# journal lets reads go on while a write commits, synchronous=NORMAL syncs
+# the WAL at checkpoints instead of at every commit (a power loss can lose
+# the last commits, never corrupt the database), and a write waits up to
+# SQLITE_BUSY_TIMEOUT ms for the one before it instead of failing with
+# "database is locked". SQLITE_TUNED=0 keeps the SQLite defaults, apart from
+# the foreign keys.
+SQLITE_TUNED = _env_bool("SQLITE_TUNED", True)
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative sizes are in KiB: 64MB of page cache per connection.
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))
+
+
+class PoolStats:
+    """Checkout latency, usage and timeouts of one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.in_use_max = 0
+        self.overflow_max = 0
+
+    def record_checkout(self, pool: QueuePool, wait_seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self.in_use_max = max(self.in_use_max, pool.checkedout())
+            self.overflow_max = max(self.overflow_max, pool.overflow())
+
+    def record_timeout(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # Negative while fewer than `size` connections have been opened.
+                "overflow": pool.overflow(),
+                "in_use_max": self.in_use_max,
+                "overflow_max": self.overflow_max,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": self.wait_seconds_total / waits if waits else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waited for a connection."""
+
+    name: str
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - started)
+            raise
+        self.stats.record_checkout(self, time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool, the numbers carry over.
+        pool = super().recreate()
+        _instrument_pool(self.name, pool, self.stats)
+        return pool
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+# Instrumented pools by engine name, for the introspection endpoint.
+pools: dict[str, InstrumentedQueuePool] = {}
+
+
+def engine_options(database_url: str) -> dict:
+    """Pool and driver options for an engine on `database_url`."""
+    url = make_url(database_url)
+
+    # In memory SQLite databases only live as long as their single connection.
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+    if url.get_driver_name() == "psycopg":
+        options["connect_args"] = {"prepare_threshold": DB_PREPARE_THRESHOLD}
+
+    return options
+
+
+def sqlite_pragmas(database_url: str, tuned: bool = SQLITE_TUNED) -> dict[str, str]:
+    """PRAGMAs to run on every new connection to `database_url`."""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return {}
+
+    pragmas = {"foreign_keys": "ON"}
+    if not tuned:
+        return pragmas
+
+    pragmas["busy_timeout"] = str(SQLITE_BUSY_TIMEOUT)
+    # The journal and memory mapping settings don't apply to in memory
+    # databases.
+    if url.database not in (None, "", ":memory:"):
+        pragmas["journal_mode"] = "WAL"
+        pragmas["synchronous"] = "NORMAL"
+        pragmas["mmap_size"] = str(SQLITE_MMAP_SIZE)
+    pragmas["cache_size"] = str(SQLITE_CACHE_SIZE)
+    pragmas["temp_store"] = "MEMORY"
+    return pragmas
+
+
+def _set_pragmas(engine, pragmas: dict[str, str]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _instrument_pool(name: str, pool, stats: Optional[PoolStats] = None) -> None:
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.name = name
+        pool.stats = stats or PoolStats()
+        pools[name] = pool
+
+
+def create_database_engine(
+    database_url: str, name: str, sqlite_tuned: bool = SQLITE_TUNED
+):
+    options = engine_options(database_url)
+    if options:
+        options["poolclass"] = InstrumentedQueuePool
+
+    engine = create_engine(database_url, **options)
+    _set_pragmas(engine, sqlite_pragmas(database_url, sqlite_tuned))
+    _instrument_pool(name, engine.pool)
+    return engine
+
+
+def create_async_database_engine(
+    database_url: str, name: str, sqlite_tuned: bool = SQLITE_TUNED
+):
+    options = engine_options(database_url)
+    if options:
+        options["poolclass"] = InstrumentedAsyncAdaptedQueuePool
+
+    async_engine = create_async_engine(database_url, **options)
+    _set_pragmas(async_engine.sync_engine, sqlite_pragmas(database_url, sqlite_tuned))
+    _instrument_pool(name, async_engine.sync_engine.pool)
+    return async_engine
+
+
+def pool_status() -> dict[str, dict]:
+    """Current state and checkout statistics of every instrumented pool."""
+    return {name: pool.stats.snapshot(pool) for name, pool in pools.items()}
+
+
+def async_database_url(database_url: str) -> str:
+    """Same database as `database_url`, through a driver with asyncio support."""
+    url = make_url(database_url)
+
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif url.get_backend_name() == "postgresql":
+        # create_async_engine picks the async variant of the psycopg dialect.
+        url = url.set(drivername="postgresql+psycopg")
+
+    return url.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+
+engine = create_database_engine(DATABASE_URL, "primary")
+async_engine = (
+    create_async_database_engine(ASYNC_DATABASE_URL, "primary_async")
+    if DATABASE_ASYNC
+    else None
+)
+
+replica_engine = (
+    create_database_engine(DATABASE_REPLICA_URL, "replica")
+    if DATABASE_REPLICA_URL
+    else engine
+)
+async_replica_engine = (
+    create_async_database_engine(
+        async_database_url(DATABASE_REPLICA_URL), "replica_async"
+    )
+    if DATABASE_REPLICA_URL and DATABASE_ASYNC
+    else async_engine
+)
@@ -0,0 +1,5 @@
+import time
+
+# The first module of the app to run, the startup report times the imports
+# from here.
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,116 @@
+"""Guest and gift totals of parties, computed by the database.
+
+One statement returns the summaries of any number of parties: the guests and
+the gifts are grouped by party in two subqueries, each over its own index,
+and joined to the parties. Counting per condition uses `COUNT(*) FILTER` on
+Postgres and `SUM(CASE ...)` on SQLite.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import case
+from sqlmodel import Session, func, select
+
+from party_app.models import Gift, Guest, Party
+
+
+@dataclass(frozen=True)
+class PartySummary:
+    guest_count: int = 0
+    attending_count: int = 0
+    not_attending_count: int = 0
+    gift_count: int = 0
+    gift_total: Decimal = Decimal("0")
+
+
+def _count_where(dialect_name: str, condition):
+    if dialect_name == "postgresql":
+        return func.count().filter(condition)
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def party_summaries_statement(dialect_name: str, party_ids: Iterable[UUID]):
+    party_ids = list(party_ids)
+
+    guests = (
+        select(
+            Guest.party_id,
+            func.count().label("guest_count"),
+            _count_where(dialect_name, Guest.attending == True).label(
+                "attending_count"
+            ),
+            _count_where(dialect_name, Guest.attending == False).label(
+                "not_attending_count"
+            ),
+        )
+        .where(Guest.party_id.in_(party_ids))
+        .group_by(Guest.party_id)
+        .subquery()
+    )
+    gifts = (
+        select(
+            Gift.party_id,
+            func.count().label("gift_count"),
+            func.sum(Gift.price).label("gift_total"),
+        )
+        .where(Gift.party_id.in_(party_ids))
+        .group_by(Gift.party_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Party.uuid,
+            func.coalesce(guests.c.guest_count, 0),
+            func.coalesce(guests.c.attending_count, 0),
+            func.coalesce(guests.c.not_attending_count, 0),
+            func.coalesce(gifts.c.gift_count, 0),
+            func.coalesce(gifts.c.gift_total, 0),
+        )
+        .outerjoin(guests, guests.c.party_id == Party.uuid)
+        .outerjoin(gifts, gifts.c.party_id == Party.uuid)
+        .where(Party.uuid.in_(party_ids))
+    )
+
+
+def party_summaries(
+    session: Session, party_ids: Iterable[UUID]
+) -> dict[UUID, PartySummary]:
+    """Summaries by party id, parties that don't exist are left out."""
+    statement = party_summaries_statement(session.get_bind().dialect.name, party_ids)
+
+    return {
+        party_id: PartySummary(
+            guest_count=guest_count,
+            attending_count=attending_count,
+            not_attending_count=not_attending_count,
+            gift_count=gift_count,
+            gift_total=Decimal(gift_total),
+        )
+        for (
+            party_id,
+            guest_count,
+            attending_count,
+            not_attending_count,
+            gift_count,
+            gift_total,
+        ) in session.exec(statement)
+    }
+
+
+def party_summary(session: Session, party_id: UUID) -> PartySummary:
+    return party_summaries(session, [party_id]).get(party_id, PartySummary())
+
+
+def counters_summary(party: Party) -> PartySummary:
+    """Summary from the counters the triggers keep on `party`, without a query."""
+    return PartySummary(
+        guest_count=party.guest_count,
+        attending_count=party.attending_count,
+        not_attending_count=party.guest_count - party.attending_count,
+        gift_count=party.gift_count,
+        gift_total=Decimal(party.gift_total),
+    )
@@ -0,0 +1,186 @@
+"""Bulk loading of rows read from a stream.
+
+Records are parsed as the input is read, JSON arrays with
+`JSONDecoder.raw_decode` over a sliding buffer and NDJSON line by line, so
+memory stays bounded by one batch however big the file is.
+
+`insert_rows` writes a batch with one `COPY` on Postgres and with one
+`executemany` elsewhere. A batch the database rejects is retried row by row
+in savepoints, so one bad row costs its own insert and not the batch.
+"""
+
+import json
+import sys
+import time
+from decimal import Decimal
+from itertools import islice
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+from sqlalchemy import Table, exc, insert
+from sqlmodel import Session
+
+_READ_SIZE = 64 * 1024
+
+T = TypeVar("T")
+
+# Prices and totals keep their exact decimal value instead of going through
+# float.
+json_decoder = json.JSONDecoder(parse_float=Decimal)
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_json_array(file: IO[str], read_size: int = _READ_SIZE) -> Iterator[Any]:
+    """Items of the JSON array in `file`, decoded as they're read."""
+    buffer = ""
+    position = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip what separates the items: whitespace, the opening bracket and
+        # the commas.
+        while position < len(buffer) and buffer[position] in " \t\r\n,[":
+            if buffer[position] == "[":
+                if started:
+                    break
+                started = True
+            position += 1
+
+        if position < len(buffer) and started:
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = json_decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A number at the end of the buffer may go on in the next read.
+                if end < len(buffer) or eof:
+                    yield item
+                    position = end
+                    continue
+        elif position < len(buffer):
+            raise ValueError("Expected a JSON array")
+        elif eof:
+            if started:
+                raise ValueError("Unterminated JSON array")
+            return
+
+        chunk = file.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_ndjson(file: IO[str]) -> Iterator[str]:
+    """Non-empty lines of an NDJSON file, each one holds one JSON value."""
+    for line in file:
+        if line := line.strip():
+            yield line
+
+
+def _copy_rows(session: Session, table: Table, rows: list[dict]) -> None:
+    connection = session.connection()
+    preparer = connection.dialect.identifier_preparer
+    columns = list(rows[0])
+    statement = "COPY {} ({}) FROM STDIN".format(
+        preparer.format_table(table),
+        ", ".join(preparer.quote(column) for column in columns),
+    )
+
+    dbapi = connection.dialect.loaded_dbapi
+    try:
+        with connection.connection.driver_connection.cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row([row[column] for column in columns])
+    except dbapi.Error as error:
+        # The raw cursor bypasses SQLAlchemy, which wraps the errors of the
+        # statements it runs itself.
+        raise exc.DBAPIError.instance(statement, None, error, dbapi.Error) from error
+
+
+def _insert_batch(session: Session, table: Table, rows: list[dict]) -> None:
+    if session.get_bind().dialect.driver == "psycopg":
+        _copy_rows(session, table, rows)
+    else:
+        session.execute(insert(table), rows)
+
+
+def insert_rows(
+    session: Session,
+    table: Table,
+    rows: list[dict],
+    on_reject: Optional[Callable[[dict, Exception], None]] = None,
+) -> int:
+    """Inserts `rows`, all with the same keys, and returns how many went in.
+
+    Without `on_reject` a row the database refuses fails the whole batch.
+    With it, the batch is retried row by row and `on_reject` gets each row
+    that fails along with its error.
+    """
+    if not rows:
+        return 0
+    if on_reject is None:
+        _insert_batch(session, table, rows)
+        return len(rows)
+
+    try:
+        with session.begin_nested():
+            _insert_batch(session, table, rows)
+        return len(rows)
+    except exc.DBAPIError:
+        pass
+
+    inserted = 0
+    for row in rows:
+        try:
+            with session.begin_nested():
+                session.execute(insert(table), [row])
+            inserted += 1
+        except exc.DBAPIError as error:
+            on_reject(row, error.orig or error)
+    return inserted
+
+
+class Progress:
+    """Prints the rows loaded so far and the throughput, at most every `interval`."""
+
+    def __init__(
+        self,
+        label: str,
+        stream: IO[str] = sys.stderr,
+        interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.label = label
+        self.stream = stream
+        self.interval = interval
+        self._clock = clock
+        self.started = clock()
+        self._reported = self.started
+        self.rows = 0
+        self.rejected = 0
+
+    def add(self, rows: int, rejected: int = 0) -> None:
+        self.rows += rows
+        self.rejected += rejected
+        if self._clock() - self._reported >= self.interval:
+            self.report()
+
+    def report(self, final: bool = False) -> None:
+        self._reported = self._clock()
+        elapsed = self._reported - self.started
+        rate = self.rows / elapsed if elapsed > 0 else 0.0
+        print(
+            f"{self.label}: {self.rows:,} rows, {self.rejected:,} rejected, "
+            f"{rate:,.0f} rows/s" + (f", done in {elapsed:.1f}s" if final else ""),
+            file=self.stream,
+            flush=True,
+        )
@@ -0,0 +1,304 @@
+"""In-process caches for the most read pages.
+
+Rendered fragments are keyed by party id plus a per-party version. Writes to
+a party bump its version, which makes every fragment rendered before the write
+unreachable; the LRU drops them as new ones come in.
+
+Parties are cached as read-only snapshots shared by every request. Any commit
+that changed a Party, or one of its guests or gifts, drops its snapshot.
+
+Sessions with BYPASS_CACHES in their info neither read nor fill the caches:
+the read sessions of a replica, which could fill them again with what a write
+just changed, and those of a client reading its own writes from the primary.
+
+The caches live in the memory of each worker, a write only invalidates the
+worker that served it. FRAGMENT_CACHE_TTL and PARTY_CACHE_TTL bound how long
+the other workers keep serving old data; deployments that can't accept that
+turn the party cache off with PARTY_CACHE_ENABLED=0.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+from uuid import UUID
+
+from fastapi import Request, Response, status
+from sqlalchemy import event
+from sqlmodel import Session
+
+from party_app.models import Gift, Guest, Party
+
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "1024"))
+FRAGMENT_CACHE_TTL = float(os.getenv("FRAGMENT_CACHE_TTL", "60"))
+# Streamed pages bigger than this aren't kept, they would have to be buffered.
+FRAGMENT_CACHE_MAX_BODY = int(os.getenv("FRAGMENT_CACHE_MAX_BODY", "262144"))
+
+PARTY_CACHE_ENABLED = os.getenv("PARTY_CACHE_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+PARTY_CACHE_SIZE = int(os.getenv("PARTY_CACHE_SIZE", "4096"))
+PARTY_CACHE_TTL = float(os.getenv("PARTY_CACHE_TTL", "30"))
+
+BYPASS_CACHES = "bypass_caches"
+
+
+class LRUCache:
+    """Thread safe LRU cache whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, max_entries: int, ttl: float, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+@dataclass(frozen=True)
+class Fragment:
+    body: bytes
+    media_type: str
+    etag: str
+
+
+class FragmentCache:
+    """Rendered responses by (party id, party version, url)."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._fragments = LRUCache(max_entries, ttl)
+        self._versions: dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+    def key(
+        self, party_id: UUID, request: Request, session: Session
+    ) -> Optional[tuple]:
+        """Key of the fragment, None when `session` bypasses the caches."""
+        if session.info.get(BYPASS_CACHES):
+            return None
+        # Taken before reading the party, so a write that lands while the
+        # fragment renders files it under a version that is already gone.
+        with self._lock:
+            version = self._versions.get(party_id, 0)
+        return (party_id, version, str(request.url))
+
+    def get(self, key: Optional[tuple]) -> Optional[Fragment]:
+        return self._fragments.get(key) if key is not None else None
+
+    def set(self, key: Optional[tuple], fragment: Fragment) -> None:
+        if key is not None:
+            self._fragments.set(key, fragment)
+
+    def invalidate(self, party_id: UUID) -> None:
+        with self._lock:
+            self._versions[party_id] = self._versions.get(party_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+        self._fragments.clear()
+
+    def stats(self) -> dict:
+        return self._fragments.stats()
+
+
+class PartyCache:
+    """Read-only Party snapshots by party id.
+
+    The snapshots are detached copies, handlers that change a party load it
+    from their session instead.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self._snapshots = LRUCache(max_entries, ttl)
+        # Bumped by every invalidation. A snapshot loaded while a write
+        # committed is returned but not stored.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, party_id: UUID) -> Optional[Party]:
+        # The counters are kept by triggers, the party in the identity map
+        # of a session that doesn't expire on commit has the old ones.
+        if not self.enabled or session.info.get(BYPASS_CACHES):
+            return session.get(Party, party_id, populate_existing=True)
+
+        if snapshot := self._snapshots.get(party_id):
+            return snapshot
+
+        with self._lock:
+            generation = self._generation
+
+        party = session.get(Party, party_id, populate_existing=True)
+        if party is None:
+            return None
+
+        # Only the columns, a copy of the relationships would link the snapshot
+        # to the gifts and guests of the session.
+        snapshot = Party.model_validate(party.model_dump())
+        with self._lock:
+            if generation == self._generation:
+                self._snapshots.set(party_id, snapshot)
+        return snapshot
+
+    def invalidate(self, party_id: UUID) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshots.pop(party_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshots.clear()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self._snapshots.stats()}
+
+
+fragment_cache = FragmentCache(FRAGMENT_CACHE_SIZE, FRAGMENT_CACHE_TTL)
+party_cache = PartyCache(PARTY_CACHE_SIZE, PARTY_CACHE_TTL, PARTY_CACHE_ENABLED)
+
+
+def get_party(session: Session, party_id: UUID) -> Optional[Party]:
+    """Read-only snapshot of a party, from the cache or from `session`."""
+    return party_cache.get(session, party_id)
+
+
+def mark_party_written(session: Session, party_id: UUID) -> None:
+    """Drops the snapshot of the party once `session` commits.
+
+    Flushed parties, guests and gifts are handled by the session events below,
+    bulk UPDATE/DELETE statements bypass the flush and call this instead.
+    """
+    session.info.setdefault("written_party_ids", set()).add(party_id)
+
+
+# Parties flushed by a session, and parties whose guests or gifts were flushed
+# (their counters changed), are dropped from the cache once it commits.
+@event.listens_for(Session, "after_flush")
+def _collect_written_parties(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Party):
+            mark_party_written(session, instance.uuid)
+        elif isinstance(instance, (Guest, Gift)):
+            mark_party_written(session, instance.party_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_parties(session):
+    for party_id in session.info.pop("written_party_ids", ()):
+        party_cache.invalidate(party_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_written_parties(session, previous_transaction):
+    session.info.pop("written_party_ids", None)
+
+
+def etag_for(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the `If-None-Match` header of the request names `etag`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match compares weakly, W/"x" matches "x".
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    # Clients keep the page but check the ETag with us before every use.
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def fragment_response(request: Request, fragment: Fragment) -> Response:
+    """Response for a cached fragment, `304 Not Modified` if the client has it."""
+    headers = _cache_headers(fragment.etag)
+
+    if etag_matches(request, fragment.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(fragment.body, media_type=fragment.media_type, headers=headers)
+
+
+def store_fragment(key: tuple, body: bytes, media_type: str = "text/html") -> Fragment:
+    fragment = Fragment(body=bytes(body), media_type=media_type, etag=etag_for(body))
+    fragment_cache.set(key, fragment)
+    return fragment
+
+
+def cache_fragment(request: Request, key: tuple, response: Response) -> Response:
+    """Stores a freshly rendered response under `key` and tags it with its ETag."""
+    fragment = store_fragment(key, response.body, response.media_type)
+
+    if etag_matches(request, fragment.etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=_cache_headers(fragment.etag),
+        )
+
+    response.headers.update(_cache_headers(fragment.etag))
+    return response
@@ -0,0 +1,215 @@
+"""Compression of the response bodies, with brotli or gzip.
+
+The HTML pages and htmx partials repeat the same Tailwind classes on every
+row and shrink ten times or more. `CompressionMiddleware` compresses the
+bodies whose media type has a minimum size in `MINIMUM_SIZES`, once they
+reach it, in the best encoding the client accepts: brotli when the brotli
+package is installed, else gzip.
+
+Streamed responses are compressed chunk by chunk, each chunk flushed so the
+browser can render what has arrived. Responses that already have a
+Content-Encoding, like the precompressed static files, are sent as they
+are, and so are those without a body: 204, 304 and HEAD replies.
+
+The ratio of every compressed response and the CPU time spent compressing
+are recorded in the metrics. COMPRESSION_ENABLED=0 turns it off.
+"""
+
+import os
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from party_app.metrics import (
+    RESPONSE_COMPRESSION_CPU,
+    RESPONSE_COMPRESSION_RATIO,
+    route_name,
+)
+from party_app.static_assets import accepted_encodings, brotli
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Smallest body worth compressing, in bytes, by media type. Bodies of other
+# media types aren't compressed.
+MINIMUM_SIZES = {
+    # htmx partials of a single row are about this size.
+    "text/html": 512,
+    "text/css": 1024,
+    "text/javascript": 1024,
+    "application/javascript": 1024,
+    "application/json": 1024,
+    "application/x-ndjson": 1024,
+    "text/csv": 1024,
+    "text/plain": 1024,
+}
+
+# Dynamic bodies are compressed at the levels that still keep up with them,
+# the best ones are for the static files compressed at build time.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+_NO_BODY_STATUSES = {204, 205, 304}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class Compressor:
+    """Incremental compression of one body in `encoding`."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(
+                GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+        self.size_in = 0
+        self.size_out = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        """Compressed `data`, flushed so it can be decoded on its own."""
+        started = time.thread_time()
+        if self.encoding == "br":
+            compressed = self._brotli.process(data)
+            compressed += self._brotli.finish() if last else self._brotli.flush()
+        else:
+            compressed = self._zlib.compress(data)
+            compressed += self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+        self.cpu_seconds += time.thread_time() - started
+        self.size_in += len(data)
+        self.size_out += len(compressed)
+        return compressed
+
+
+class CompressionMiddleware:
+    """Compresses the response bodies that gain from it."""
+
+    def __init__(self, app: ASGIApp, minimum_sizes: dict[str, int] = MINIMUM_SIZES):
+        self.app = app
+        self.minimum_sizes = minimum_sizes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message: Optional[Message] = None
+        minimum_size = 0
+        compressor: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_start() -> None:
+            nonlocal start_message
+            message, start_message = start_message, None
+            await send(message)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, minimum_size, compressor, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                size = self._minimum_size(message["status"], headers)
+                if size is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                # Caches must keep the encodings apart even when this one
+                # isn't compressed.
+                MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                if encoding is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                minimum_size = size
+                return
+
+            if message["type"] in ("http.response.pathsend", "http.response.zerocopy"):
+                # These extensions send the body from a file, uncompressed.
+                passthrough = True
+                if start_message is not None:
+                    await send_start()
+                await send(message)
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                if not more_body and len(body) < minimum_size:
+                    passthrough = True
+                    await send_start()
+                    await send(message)
+                    return
+
+                compressor = Compressor(encoding)
+                headers = MutableHeaders(scope=start_message)
+                headers["Content-Encoding"] = encoding
+                # The compressed body is another representation, that a
+                # strong validator of the uncompressed one doesn't match.
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body, last=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send_start()
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send_start()
+
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": compressor.compress(body, last=not more_body),
+                    "more_body": more_body,
+                }
+            )
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if compressor is not None and compressor.size_out:
+                RESPONSE_COMPRESSION_RATIO.observe(
+                    (route_name(scope), encoding),
+                    compressor.size_in / compressor.size_out,
+                )
+                RESPONSE_COMPRESSION_CPU.inc((encoding,), compressor.cpu_seconds)
+
+    def _minimum_size(self, status: int, headers: Headers) -> Optional[int]:
+        """Size from which the body is compressed, None if it never is."""
+        if status < 200 or status in _NO_BODY_STATUSES or status == 206:
+            return None
+        if "content-encoding" in headers:
+            return None
+        if "no-transform" in headers.get("cache-control", ""):
+            return None
+        media_type = headers.get("content-type", "").partition(";")[0].strip()
+        return self.minimum_sizes.get(media_type.lower())
@@ -0,0 +1,336 @@
+"""Per-party guest and gift counters kept by the database.
+
+`party.guest_count`, `attending_count`, `gift_count` and `gift_total` are
+maintained by triggers on the guest and gift tables, so they stay exact for
+ORM writes, bulk UPDATEs and writes from outside the app alike.
+
+On SQLite the triggers run for each row. On Postgres they run once per
+statement over its transition tables, so marking thousands of guests updates
+each party row once instead of once per guest.
+
+`reconcile_counters` compares the counters with the child tables and
+repairs any drift:
+
+    python -m party_app.counters [--repair]
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import Iterator
+from uuid import UUID
+
+from sqlalchemy import DDL, event
+from sqlmodel import Session, select, update
+
+from party_app.aggregates import party_summaries
+from party_app.models import Gift, Guest, Party
+
+_RECONCILE_BATCH_SIZE = 1000
+
+_SQLITE_GUEST_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_guest_insert AFTER INSERT ON guest
+    BEGIN
+        UPDATE party
+        SET guest_count = guest_count + 1,
+            attending_count = attending_count + new.attending
+        WHERE uuid = new.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_guest_delete AFTER DELETE ON guest
+    BEGIN
+        UPDATE party
+        SET guest_count = guest_count - 1,
+            attending_count = attending_count - old.attending
+        WHERE uuid = old.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_guest_update
+    AFTER UPDATE OF attending, party_id ON guest
+    BEGIN
+        UPDATE party
+        SET guest_count = guest_count - 1,
+            attending_count = attending_count - old.attending
+        WHERE uuid = old.party_id;
+        UPDATE party
+        SET guest_count = guest_count + 1,
+            attending_count = attending_count + new.attending
+        WHERE uuid = new.party_id;
+    END
+    """,
+]
+
+_SQLITE_GIFT_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_gift_insert AFTER INSERT ON gift
+    BEGIN
+        UPDATE party
+        SET gift_count = gift_count + 1, gift_total = gift_total + new.price
+        WHERE uuid = new.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_gift_delete AFTER DELETE ON gift
+    BEGIN
+        UPDATE party
+        SET gift_count = gift_count - 1, gift_total = gift_total - old.price
+        WHERE uuid = old.party_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS party_counters_gift_update
+    AFTER UPDATE OF price, party_id ON gift
+    BEGIN
+        UPDATE party
+        SET gift_count = gift_count - 1, gift_total = gift_total - old.price
+        WHERE uuid = old.party_id;
+        UPDATE party
+        SET gift_count = gift_count + 1, gift_total = gift_total + new.price
+        WHERE uuid = new.party_id;
+    END
+    """,
+]
+
+
+_POSTGRES_GUEST_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION party_counters_guest() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE party
+            SET guest_count = party.guest_count + deltas.guest_count,
+                attending_count = party.attending_count + deltas.attending_count
+            FROM (
+                SELECT party_id, count(*) AS guest_count,
+                       count(*) FILTER (WHERE attending) AS attending_count
+                FROM new_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE party
+            SET guest_count = party.guest_count - deltas.guest_count,
+                attending_count = party.attending_count - deltas.attending_count
+            FROM (
+                SELECT party_id, count(*) AS guest_count,
+                       count(*) FILTER (WHERE attending) AS attending_count
+                FROM old_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSE
+            UPDATE party
+            SET guest_count = party.guest_count + deltas.guest_count,
+                attending_count = party.attending_count + deltas.attending_count
+            FROM (
+                SELECT party_id, sum(guest_count) AS guest_count,
+                       sum(attending_count) AS attending_count
+                FROM (
+                    SELECT party_id, 1 AS guest_count, attending::int AS attending_count
+                    FROM new_rows
+                    UNION ALL
+                    SELECT party_id, -1, -attending::int FROM old_rows
+                ) AS changes
+                GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id
+              AND (deltas.guest_count <> 0 OR deltas.attending_count <> 0);
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_guest_insert ON guest",
+    """
+    CREATE TRIGGER party_counters_guest_insert AFTER INSERT ON guest
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_guest()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_guest_delete ON guest",
+    """
+    CREATE TRIGGER party_counters_guest_delete AFTER DELETE ON guest
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_guest()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_guest_update ON guest",
+    """
+    CREATE TRIGGER party_counters_guest_update AFTER UPDATE ON guest
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_guest()
+    """,
+]
+
+_POSTGRES_GIFT_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION party_counters_gift() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE party
+            SET gift_count = party.gift_count + deltas.gift_count,
+                gift_total = party.gift_total + deltas.gift_total
+            FROM (
+                SELECT party_id, count(*) AS gift_count, sum(price) AS gift_total
+                FROM new_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE party
+            SET gift_count = party.gift_count - deltas.gift_count,
+                gift_total = party.gift_total - deltas.gift_total
+            FROM (
+                SELECT party_id, count(*) AS gift_count, sum(price) AS gift_total
+                FROM old_rows GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id;
+        ELSE
+            UPDATE party
+            SET gift_count = party.gift_count + deltas.gift_count,
+                gift_total = party.gift_total + deltas.gift_total
+            FROM (
+                SELECT party_id, sum(gift_count) AS gift_count,
+                       sum(gift_total) AS gift_total
+                FROM (
+                    SELECT party_id, 1 AS gift_count, price AS gift_total
+                    FROM new_rows
+                    UNION ALL
+                    SELECT party_id, -1, -price FROM old_rows
+                ) AS changes
+                GROUP BY party_id
+            ) AS deltas
+            WHERE party.uuid = deltas.party_id
+              AND (deltas.gift_count <> 0 OR deltas.gift_total <> 0);
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_gift_insert ON gift",
+    """
+    CREATE TRIGGER party_counters_gift_insert AFTER INSERT ON gift
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_gift()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_gift_delete ON gift",
+    """
+    CREATE TRIGGER party_counters_gift_delete AFTER DELETE ON gift
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_gift()
+    """,
+    "DROP TRIGGER IF EXISTS party_counters_gift_update ON gift",
+    """
+    CREATE TRIGGER party_counters_gift_update AFTER UPDATE ON gift
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION party_counters_gift()
+    """,
+]
+
+for table, dialect, statements in (
+    (Guest.__table__, "sqlite", _SQLITE_GUEST_DDL),
+    (Gift.__table__, "sqlite", _SQLITE_GIFT_DDL),
+    (Guest.__table__, "postgresql", _POSTGRES_GUEST_DDL),
+    (Gift.__table__, "postgresql", _POSTGRES_GIFT_DDL),
+):
+    for statement in statements:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect=dialect))
+
+
+@dataclass(frozen=True)
+class CounterDrift:
+    party_id: UUID
+    stored: tuple
+    actual: tuple
+
+
+def _party_id_batches(session: Session) -> Iterator[list[UUID]]:
+    after = None
+    while True:
+        statement = select(Party.uuid).order_by(Party.uuid)
+        if after is not None:
+            statement = statement.where(Party.uuid > after)
+        party_ids = session.exec(statement.limit(_RECONCILE_BATCH_SIZE)).all()
+        if not party_ids:
+            return
+        yield party_ids
+        after = party_ids[-1]
+
+
+def reconcile_counters(session: Session, repair: bool = False) -> list[CounterDrift]:
+    """Counters that don't match the guest and gift tables, repaired if asked.
+
+    Each batch of parties is locked while it's compared, so triggers of
+    concurrent writes wait for the repair instead of being overwritten by it.
+    The caller commits.
+    """
+    drifts = []
+
+    for party_ids in _party_id_batches(session):
+        stored = {
+            party_id: counters
+            for party_id, *counters in session.exec(
+                select(
+                    Party.uuid,
+                    Party.guest_count,
+                    Party.attending_count,
+                    Party.gift_count,
+                    Party.gift_total,
+                )
+                .where(Party.uuid.in_(party_ids))
+                .with_for_update()
+            )
+        }
+        actual = party_summaries(session, party_ids)
+
+        for party_id, summary in actual.items():
+            expected = (
+                summary.guest_count,
+                summary.attending_count,
+                summary.gift_count,
+                summary.gift_total,
+            )
+            if tuple(stored[party_id]) == expected:
+                continue
+
+            drifts.append(CounterDrift(party_id, tuple(stored[party_id]), expected))
+            if repair:
+                session.exec(
+                    update(Party)
+                    .where(Party.uuid == party_id)
+                    .values(
+                        guest_count=summary.guest_count,
+                        attending_count=summary.attending_count,
+                        gift_count=summary.gift_count,
+                        gift_total=summary.gift_total,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+
+    return drifts
+
+
+def main() -> None:
+    from db import engine
+
+    parser = argparse.ArgumentParser(
+        description="Check the per-party guest and gift counters."
+    )
+    parser.add_argument(
+        "--repair", action="store_true", help="write the correct counters back"
+    )
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        drifts = reconcile_counters(session, repair=args.repair)
+        session.commit()
+
+    for drift in drifts:
+        print(f"{drift.party_id}: stored {drift.stored}, actual {drift.actual}")
+    print(
+        f"{len(drifts)} parties with drifted counters"
+        + (", repaired." if args.repair and drifts else ".")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,57 @@
 import os
-from typing import Annotated
+import secrets
+from typing import Annotated, Optional
 
-from fastapi import Depends
+import jinja2
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.templating import Jinja2Templates
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from db import engine
+from db import async_engine, async_replica_engine, engine, replica_engine
+from party_app.cache import BYPASS_CACHES
+from party_app.metrics import TimedTemplate
+from party_app.replica import reads_from_primary
+from party_app.static_assets import STATIC_DIRECTORY, StaticAssets
 
-_templates = Jinja2Templates(
-    directory=os.path.join(os.path.dirname(__file__), "templates")
-)
+# Routes over the data of every party, the /internal pages and /metrics need
+# an X-Admin-Token header matching ADMIN_TOKEN. They are disabled while
+# ADMIN_TOKEN isn't set.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# ENVIRONMENT=prod (set by the Dockerfile) stops checking the template files
+# for changes and keeps the compiled templates on disk, in TEMPLATE_CACHE_DIR
+# or a directory of the system temp directory, so the workers started after
+# the first one don't compile them again.
+PRODUCTION = os.getenv("ENVIRONMENT", "dev") == "prod"
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR") or None
+
+TEMPLATE_DIRECTORY = os.path.join(os.path.dirname(__file__), "templates")
+
+static_assets = StaticAssets(STATIC_DIRECTORY, check_modified=not PRODUCTION)
+
+
+def create_template_env(
+    production: bool = PRODUCTION, cache_dir: Optional[str] = TEMPLATE_CACHE_DIR
+) -> jinja2.Environment:
+    bytecode_cache = None
+    if production:
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIRECTORY),
+        autoescape=True,
+        auto_reload=not production,
+        bytecode_cache=bytecode_cache,
+    )
+    env.template_class = TimedTemplate
+    env.globals["static_url"] = static_assets.static_url
+    return env
+
+
+_templates = Jinja2Templates(env=create_template_env())
 
 
 def _get_templates():
@@ -19,6 +61,41 @@ def _get_templates():
 Templates = Annotated[Jinja2Templates, Depends(_get_templates)]
 
 
+# The rows the writes return are rendered after the commit, as they are:
+# expiring them would cost a SELECT each.
 def get_session():
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
         yield session
+
+
+async def get_async_session():
+    # Loaded attributes stay usable after commit, since expired ones can't be
+    # lazily reloaded from the synchronous template rendering.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+# For the routes that only read: the replica, unless the client just wrote.
+# Neither uses the caches, a lagging replica would fill them with what a write
+# just changed and the client that wrote must not be served that.
+def get_read_session(request: Request):
+    primary = reads_from_primary(request)
+    bind = engine if primary else replica_engine
+    info = {BYPASS_CACHES: primary or bind is not engine}
+    with Session(bind, expire_on_commit=False, info=info) as session:
+        yield session
+
+
+async def get_async_read_session(request: Request):
+    primary = reads_from_primary(request)
+    bind = async_engine if primary else async_replica_engine
+    info = {BYPASS_CACHES: primary or bind is not async_engine}
+    async with AsyncSession(bind, expire_on_commit=False, info=info) as session:
+        yield session
+
+
+def require_admin(x_admin_token: str = Header("")):
+    if not ADMIN_TOKEN or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required"
+        )
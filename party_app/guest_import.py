@@ -0,0 +1,155 @@
+"""Bulk import of guests from an uploaded or pasted list.
+
+Lists are CSV with a header row naming a `name` column (and optionally an
+`attending` one), plain lists with one whole name per line, commas included,
+or NDJSON objects with the fields of `GuestForm`. CSV rows with more fields
+than the header are reported rather than truncated. Rows are read and
+validated one at a time and inserted in batches of `_IMPORT_BATCH_SIZE`, so
+memory use doesn't grow with the size of the list. Rows that don't validate
+are skipped and reported.
+
+`validate_guests` and `insert_guests` split the import for the async routes,
+which validate in the threadpool and only run the inserts on the session.
+"""
+
+import csv
+import itertools
+from dataclasses import dataclass, field
+from typing import IO, Any, Iterable, Iterator
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlmodel import Session
+
+from party_app.bulk import batched, insert_rows, json_decoder
+from party_app.cache import mark_party_written
+from party_app.models import Guest, GuestForm
+
+_IMPORT_BATCH_SIZE = 5000
+# Only the first errors are listed back, the rest are counted.
+_IMPORT_MAX_ERRORS = 20
+_NAME_LENGTH = Guest.__table__.c.name.type.length
+
+
+@dataclass
+class GuestImport:
+    imported: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def skip(self, line: int, error: Exception) -> None:
+        self.skipped += 1
+        if len(self.errors) < _IMPORT_MAX_ERRORS:
+            self.errors.append(f"Line {line}: {_error_message(error)}")
+
+
+@dataclass
+class GuestBatch:
+    party_id: UUID
+    rows: list[dict]
+    # Line of each row by its uuid, to report the rows the database refuses.
+    lines: dict[UUID, int]
+
+
+def read_guest_records(file: IO[str], filename: str = "") -> Iterator[tuple[int, Any]]:
+    """(line number, record) pairs of an NDJSON file or of a CSV or names list."""
+    if filename.endswith((".ndjson", ".jsonl")):
+        for number, line in enumerate(file, 1):
+            if line := line.strip():
+                yield number, line
+        return
+
+    first_line = file.readline()
+    header = [column.strip().lower() for column in next(csv.reader([first_line]), [])]
+    if "name" not in header:
+        for number, line in enumerate(itertools.chain([first_line], file), 1):
+            if name := line.strip():
+                yield number, {"name": name}
+        return
+
+    reader = csv.reader(file)
+    for row in reader:
+        if any(value.strip() for value in row):
+            record = dict(zip(header, row))
+            if len(row) > len(header):
+                # Kept under None like csv.DictReader does, `guest_row` rejects it.
+                record[None] = row[len(header) :]
+            # The header line was read before the reader.
+            yield reader.line_num + 1, record
+
+
+def guest_row(party_id: UUID, record: Any) -> dict:
+    """Column values of the guest in `record`, raises if it doesn't validate."""
+    if isinstance(record, str):
+        record = json_decoder.decode(record)
+    if not isinstance(record, dict):
+        raise TypeError("expected an object with the fields of a guest")
+    if None in record:
+        raise ValueError("more fields than the header")
+
+    values = {}
+    for key, value in record.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in ("", None):
+            values[key] = value
+    guest = GuestForm.model_validate({**values, "party_id": party_id})
+
+    if len(guest.name) > _NAME_LENGTH:
+        raise ValueError(f"name is longer than {_NAME_LENGTH} characters")
+
+    return {
+        "uuid": uuid4(),
+        "party_id": party_id,
+        "name": guest.name,
+        "attending": guest.attending,
+    }
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}"
+            for detail in error.errors()
+        )
+    return str(error)
+
+
+def validate_guests(
+    party_id: UUID, records: Iterable[tuple[int, Any]], result: GuestImport
+) -> Iterator[GuestBatch]:
+    """Batches of the valid guests of `records`, the others are skipped."""
+    for records_batch in batched(records, _IMPORT_BATCH_SIZE):
+        batch = GuestBatch(party_id, rows=[], lines={})
+        for line, record in records_batch:
+            try:
+                row = guest_row(party_id, record)
+            except (TypeError, ValueError) as error:
+                result.skip(line, error)
+                continue
+            batch.rows.append(row)
+            batch.lines[row["uuid"]] = line
+        yield batch
+
+
+def insert_guests(session: Session, batch: GuestBatch, result: GuestImport) -> None:
+    """Inserts the guests of `batch`, the caller commits."""
+    # Rows the database still refuses are reported like the invalid ones.
+    result.imported += insert_rows(
+        session,
+        Guest.__table__,
+        batch.rows,
+        on_reject=lambda row, error: result.skip(batch.lines[row["uuid"]], error),
+    )
+    # The rows bypassed the ORM, the cached party has old counters.
+    mark_party_written(session, batch.party_id)
+
+
+def import_guests(
+    session: Session, party_id: UUID, records: Iterable[tuple[int, Any]]
+) -> GuestImport:
+    """Inserts the valid guests of `records` into the party, the caller commits."""
+    result = GuestImport()
+    for batch in validate_guests(party_id, records, result):
+        insert_guests(session, batch, result)
+    return result
@@ -1,14 +1,77 @@
+"""Loads parties, gifts and guests from JSON or NDJSON files.
+
+    python -m party_app.initial_data.load_initial_data_to_db \
+        [--parties FILE] [--gifts FILE] [--guests FILE] \
+        [--batch-size N] [--rejects FILE] [--append]
+
+Files are read as a stream and inserted in batches of `--batch-size` rows,
+each batch in its own transaction (`COPY` on Postgres). Rows that can't be
+converted or that the database refuses are written to the `--rejects` file as
+NDJSON, with the error, instead of stopping the load. Without `--append` the
+tables are emptied first.
+"""
+
+import argparse
 import json
-from datetime import datetime
+from datetime import date, time
+from decimal import Decimal
 from pathlib import Path
+from typing import IO, Any, Callable, Iterator, Optional
 from uuid import UUID
-from db import engine
-from party_app.models import Gift, Guest, Party
 
 from sqlmodel import Session, SQLModel
 
+from party_app.bulk import (
+    Progress,
+    batched,
+    insert_rows,
+    iter_json_array,
+    iter_ndjson,
+    json_decoder,
+)
+from party_app.models import Gift, Guest, Party
+
+_INITIAL_DATA = Path(__file__).parent.absolute()
+_BATCH_SIZE = 5000
+
+
+def _optional(convert: Callable) -> Callable:
+    return lambda value: None if value is None else convert(value)
+
 
-def clear_all_tables():
+def _boolean(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise TypeError(f"expected true or false, got {value!r}")
+    return value
+
+
+# Columns read from each record and how their JSON values are converted. The
+# counters of Party are left out, triggers maintain them.
+FIELDS: dict[type[SQLModel], dict[str, Callable]] = {
+    Party: {
+        "uuid": UUID,
+        "party_date": date.fromisoformat,
+        "party_time": time.fromisoformat,
+        "invitation": str,
+        "venue": str,
+    },
+    Gift: {
+        "uuid": UUID,
+        "party_id": UUID,
+        "gift_name": str,
+        "price": Decimal,
+        "link": _optional(str),
+    },
+    Guest: {
+        "uuid": UUID,
+        "party_id": UUID,
+        "name": str,
+        "attending": _boolean,
+    },
+}
+
+
+def clear_all_tables(engine):
     """Clear all data from the tables."""
     with Session(engine) as session:
         for table in reversed(SQLModel.metadata.sorted_tables):
@@ -16,58 +79,136 @@ def clear_all_tables():
         session.commit()
 
 
-def load_initial_data_party(json_file, model):
-    """Load Party data with special handling for date and time fields."""
-    with open(json_file, "r") as file:
-        data = json.load(file)
+def read_records(file: IO[str], path: Path) -> Iterator[Any]:
+    """Records of a JSON array file, or raw lines of an NDJSON file."""
+    if path.suffix in (".ndjson", ".jsonl"):
+        return iter_ndjson(file)
+    return iter_json_array(file)
 
-        with Session(engine) as session:
-            for item in data:
-                try:
-                    item["party_date"] = datetime.strptime(
-                        item["party_date"], "%Y-%m-%d"
-                    ).date()
-                    item["party_time"] = datetime.strptime(
-                        item["party_time"], "%H:%M:%S"
-                    ).time()
-                    item["uuid"] = UUID(item["uuid"])
-
-                    new_instance = model(**item)
-                    session.add(new_instance)
-                except Exception as e:
-                    print(f"Error adding {item} to {model.__name__}: {e}")
 
-            session.commit()
-            print(f"Data from {json_file} loaded successfully into {model.__name__}.")
+class RejectWriter:
+    """Appends the rows that couldn't be loaded to an NDJSON file."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._file = None
+        self.count = 0
+
+    def write(self, source: str, record: Any, error: Exception) -> None:
+        self.count += 1
+        if self.path is None:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(
+            json.dumps(
+                {"source": source, "error": str(error), "record": record},
+                default=str,
+            )
+            + "\n"
+        )
 
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
 
-def load_initial_data_party_child(json_file, model):
-    """Load data from a JSON file into the specified database model."""
-    with open(json_file, "r") as file:
-        data = json.load(file)
 
-        with Session(engine) as session:
-            for item in data:
+def convert_record(model: type[SQLModel], record: Any) -> dict:
+    """Column values of `model` for one record, raises if it doesn't fit."""
+    if isinstance(record, str):
+        record = json_decoder.decode(record)
+    if not isinstance(record, dict):
+        raise TypeError("expected a JSON object")
+    return {name: convert(record[name]) for name, convert in FIELDS[model].items()}
+
+
+def load_file(
+    engine,
+    path: Path,
+    model: type[SQLModel],
+    batch_size: int = _BATCH_SIZE,
+    rejects: Optional[RejectWriter] = None,
+    progress: Optional[Progress] = None,
+) -> int:
+    """Loads the records in `path` into the table of `model`, returns the rows loaded."""
+    rejects = rejects or RejectWriter(None)
+    progress = progress or Progress(model.__tablename__)
+    table = model.__table__
+    source = path.name
+    loaded = 0
+
+    with open(path, encoding="utf-8") as file, Session(engine) as session:
+        for records in batched(read_records(file, path), batch_size):
+            rows = []
+            rejected = rejects.count
+            for record in records:
                 try:
-                    item["uuid"] = UUID(item["uuid"])
-                    item["party_id"] = UUID(item["party_id"])
-                    new_instance = model(**item)
-                    session.add(new_instance)
-                except Exception as e:
-                    print(f"Error adding {item} to {model.__name__}: {e}")
+                    rows.append(convert_record(model, record))
+                except (KeyError, TypeError, ValueError, ArithmeticError) as error:
+                    rejects.write(source, record, error)
 
+            inserted = insert_rows(
+                session,
+                table,
+                rows,
+                on_reject=lambda row, error: rejects.write(source, row, error),
+            )
             session.commit()
-            print(f"Data from {json_file} loaded successfully into {model.__name__}.")
 
+            loaded += inserted
+            progress.add(inserted, rejects.count - rejected)
 
-if __name__ == "__main__":
-    clear_all_tables()
-    load_initial_data_party(
-        Path(__file__).parent.absolute() / "initial_parties.json", Party
+    progress.report(final=True)
+    return loaded
+
+
+def main() -> None:
+    from db import engine
+
+    parser = argparse.ArgumentParser(description="Load parties, gifts and guests.")
+    parser.add_argument(
+        "--parties", type=Path, default=_INITIAL_DATA / "initial_parties.json"
+    )
+    parser.add_argument(
+        "--gifts", type=Path, default=_INITIAL_DATA / "initial_gifts.json"
     )
-    load_initial_data_party_child(
-        Path(__file__).parent.absolute() / "initial_gifts.json", Gift
+    parser.add_argument(
+        "--guests", type=Path, default=_INITIAL_DATA / "initial_guests.json"
     )
-    load_initial_data_party_child(
-        Path(__file__).parent.absolute() / "initial_guests.json", Guest
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=_BATCH_SIZE,
+        help="rows inserted and committed together",
     )
+    parser.add_argument(
+        "--rejects",
+        type=Path,
+        default=Path("rejects.ndjson"),
+        help="NDJSON file the rows that failed to load are appended to",
+    )
+    parser.add_argument(
+        "--append", action="store_true", help="keep the rows already in the tables"
+    )
+    args = parser.parse_args()
+
+    if not args.append:
+        clear_all_tables(engine)
+
+    rejects = RejectWriter(args.rejects)
+    try:
+        for path, model in (
+            (args.parties, Party),
+            (args.gifts, Gift),
+            (args.guests, Guest),
+        ):
+            load_file(engine, path, model, args.batch_size, rejects)
+    finally:
+        rejects.close()
+
+    if rejects.count:
+        print(f"{rejects.count:,} rows rejected, see {args.rejects}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,61 @@
-from pathlib import Path
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
+from db import DATABASE_ASYNC, DATABASE_REPLICA_URL, async_engine, engine
+from party_app import IMPORT_STARTED
+from party_app import counters  # noqa: F401 registers the party counter triggers
+from party_app.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from party_app.dependency import _get_templates, static_assets
+from party_app.metrics import METRICS_ENABLED, SQL_DEBUG_HEADERS, MetricsMiddleware
+from party_app.replica import ReadYourWritesMiddleware
+from party_app.routes.aio.main import api_router as async_api_router
 from party_app.routes.main import api_router
+from party_app.startup import startup_report, warm_up
+from party_app.static_assets import FingerprintedStaticFiles
 
 
-app = FastAPI()
+def create_app(
+    database_async: bool = DATABASE_ASYNC,
+    read_your_writes: bool = bool(DATABASE_REPLICA_URL),
+) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await warm_up(
+            _get_templates().env, engine, async_engine if database_async else None
+        )
+        yield
 
-app.include_router(api_router)
+    app = FastAPI(lifespan=lifespan)
 
-app.mount(
-    "/party_app/static",
-    StaticFiles(directory=Path(__file__).resolve().parent / "static"),
-    name="static",
-)
+    app.include_router(async_api_router if database_async else api_router)
 
+    if read_your_writes:
+        app.add_middleware(ReadYourWritesMiddleware)
 
-@app.get("/")
-async def root():
-    return {"message": "Welcome to the Party App!"}
+    # Inside of the metrics middleware, which counts the bytes compressed.
+    if COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+
+    if METRICS_ENABLED or SQL_DEBUG_HEADERS:
+        app.add_middleware(
+            MetricsMiddleware,
+            record=METRICS_ENABLED,
+            debug_headers=SQL_DEBUG_HEADERS,
+        )
+
+    app.mount(
+        "/party_app/static",
+        FingerprintedStaticFiles(static_assets),
+        name="static",
+    )
+
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to the Party App!"}
+
+    return app
+
+
+app = create_app()
+startup_report.import_seconds = time.perf_counter() - IMPORT_STARTED
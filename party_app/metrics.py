@@ -0,0 +1,373 @@
+"""Request metrics in the Prometheus text format, served at `/metrics`.
+
+`MetricsMiddleware` times every request and labels it with the name of the
+route or mount that served it, so paths with ids don't multiply the series. Along
+with the latency it records the response size, the requests in flight and
+the time spent in SQL during the request, summed by engine events into a
+`RequestMetrics` held in a context variable (the threadpool and the
+streaming iterators run in copies of the request's context, and share it).
+`TimedTemplate` adds the render time of each template.
+
+The metrics are plain counters and fixed buckets behind one lock per metric:
+an observation is a bisect and two additions, cheap enough to stay on at
+full traffic. METRICS_ENABLED=0 turns the middleware off.
+
+`/metrics` needs the X-Admin-Token header, like the /internal pages: set it
+in the `http_headers` of the Prometheus scrape config.
+
+SQL_DEBUG_HEADERS=1 reports the statements and SQL time of each request in
+response headers.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional, Sequence
+
+import jinja2
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Adds the X-SQL-Queries and X-SQL-Time-Ms headers to every response, for
+# development. They count what ran before the response started: the rows a
+# streamed page fetches while it's sent come after them.
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+RATIO_BUCKETS = (1.5, 2, 3, 5, 10, 20, 50)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]: ...
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self.samples(),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label values: a count per bucket (not cumulative), the count
+        # past the last bucket, then the sum.
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(labels)
+            if values is None:
+                values = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            values[index] += 1
+            values[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield (
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}"
+                )
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {counts[-1]!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self.metrics)
+
+    def clear(self) -> None:
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to serve a request, until its last byte was sent.",
+        ("route", "method", "status"),
+    )
+)
+REQUESTS_IN_FLIGHT = registry.register(
+    Gauge("http_requests_in_flight", "Requests being served.")
+)
+RESPONSE_SIZE = registry.register(
+    Histogram(
+        "http_response_size_bytes",
+        "Size of the response bodies.",
+        ("route",),
+        SIZE_BUCKETS,
+    )
+)
+REQUEST_SQL_DURATION = registry.register(
+    Histogram(
+        "http_request_sql_duration_seconds",
+        "Time spent executing SQL statements while serving a request.",
+        ("route",),
+    )
+)
+REQUEST_SQL_STATEMENTS = registry.register(
+    Histogram(
+        "http_request_sql_statements",
+        "SQL statements executed while serving a request.",
+        ("route",),
+        STATEMENT_BUCKETS,
+    )
+)
+RESPONSE_COMPRESSION_RATIO = registry.register(
+    Histogram(
+        "http_response_compression_ratio",
+        "Size of the compressed response bodies before compression, over after.",
+        ("route", "encoding"),
+        RATIO_BUCKETS,
+    )
+)
+RESPONSE_COMPRESSION_CPU = registry.register(
+    Counter(
+        "http_response_compression_cpu_seconds_total",
+        "CPU time spent compressing response bodies.",
+        ("encoding",),
+    )
+)
+TEMPLATE_RENDER_DURATION = registry.register(
+    Histogram(
+        "template_render_duration_seconds",
+        "Time to render a template, streamed ones include fetching their rows.",
+        ("template",),
+    )
+)
+
+
+@dataclass
+class RequestMetrics:
+    sql_seconds: float = 0.0
+    sql_statements: int = 0
+
+
+_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "request_metrics", default=None
+)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being served, None outside of requests."""
+    return _request_metrics.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    request_metrics = _request_metrics.get()
+    started = getattr(context, "_metrics_started", None)
+    if request_metrics is not None and started is not None:
+        request_metrics.sql_seconds += time.perf_counter() - started
+        request_metrics.sql_statements += 1
+
+
+class TimedTemplate(jinja2.Template):
+    """Template that records how long it took to render."""
+
+    def render(self, *args, **kwargs) -> str:
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            TEMPLATE_RENDER_DURATION.observe(
+                (self.name,), time.perf_counter() - started
+            )
+
+    def generate(self, *args, **kwargs) -> Iterator[str]:
+        # Only the time spent producing the chunks, not the time they took
+        # to be sent.
+        elapsed = 0.0
+        chunks = super().generate(*args, **kwargs)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                yield chunk
+        finally:
+            TEMPLATE_RENDER_DURATION.observe((self.name,), elapsed)
+
+
+def route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "name", None) or scope.get("path", "")
+    # Mounts don't set the route, only the app they dispatched to.
+    endpoint = scope.get("endpoint")
+    if endpoint is not None and "app" in scope:
+        for mount in scope["app"].routes:
+            if isinstance(mount, Mount) and mount.app is endpoint and mount.name:
+                return mount.name
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Records the latency, size and SQL time of every HTTP request.
+
+    With `debug_headers` the SQL statements and time of the request are
+    also sent in response headers. Without `record` nothing is recorded.
+    """
+
+    def __init__(self, app: ASGIApp, record: bool = True, debug_headers: bool = False):
+        self.app = app
+        self.record = record
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics = RequestMetrics()
+        token = _request_metrics.set(request_metrics)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.debug_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-SQL-Queries"] = str(request_metrics.sql_statements)
+                    headers["X-SQL-Time-Ms"] = (
+                        f"{request_metrics.sql_seconds * 1000:.2f}"
+                    )
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        if not self.record:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _request_metrics.reset(token)
+            return
+
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            _request_metrics.reset(token)
+
+            route = route_name(scope)
+            REQUEST_DURATION.observe(
+                (route, scope["method"], str(status_code)), elapsed
+            )
+            RESPONSE_SIZE.observe((route,), size)
+            REQUEST_SQL_DURATION.observe((route,), request_metrics.sql_seconds)
+            REQUEST_SQL_STATEMENTS.observe((route,), request_metrics.sql_statements)
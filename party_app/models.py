@@ -3,7 +3,7 @@ from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID, uuid4
 
-from sqlmodel import Field, Relationship, SQLModel, Column, String, Text
+from sqlmodel import Field, Index, Relationship, SQLModel, Column, String, Text
 
 
 # Common base model for the Party resource.
@@ -18,11 +18,33 @@ class PartyBase(SQLModel):
 # Database model for the Party resource.
 # Inherits from PartyBase and represents the actual table, including relationships.
 class Party(PartyBase, table=True):
+    # Serves the upcoming-parties list and its (date, time, uuid) cursor.
+    __table_args__ = (
+        Index(
+            "ix_party_party_date_party_time_uuid", "party_date", "party_time", "uuid"
+        ),
+    )
+
     uuid: UUID = Field(default_factory=uuid4, primary_key=True)
+    # Counters of the guests and gifts of the party. Database triggers keep
+    # them up to date, see party_app/counters.py; the app never writes them.
+    guest_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    attending_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    gift_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    gift_total: Decimal = Field(
+        default=Decimal("0"), decimal_places=2, sa_column_kwargs={"server_default": "0"}
+    )
     # Defines ORM relationship: party.gifts returns associated Gifts objects.
-    gifts: List["Gift"] = Relationship(back_populates="party")
+    # Loading them lazily raises, a template looping over parties would
+    # otherwise send one query per party; query the gifts or use selectinload.
+    gifts: List["Gift"] = Relationship(
+        back_populates="party", sa_relationship_kwargs={"lazy": "raise_on_sql"}
+    )
     # Defines ORM relationship: party.guests returns associated Guest objects.
-    guests: List["Guest"] = Relationship(back_populates="party")
+    # Lazy loading raises too, for the same reason.
+    guests: List["Guest"] = Relationship(
+        back_populates="party", sa_relationship_kwargs={"lazy": "raise_on_sql"}
+    )
 
 
 # Form model for the Party resource.
@@ -38,7 +60,7 @@ class GiftBase(SQLModel):
     price: Decimal = Field(decimal_places=2, ge=0)
     link: Optional[str]
     # Defines a foreign key connecting the gift to a party at the database level.
-    party_id: UUID = Field(default=None, foreign_key="party.uuid")
+    party_id: UUID = Field(default=None, foreign_key="party.uuid", index=True)
 
 
 # Database model for the Gift resource.
@@ -67,6 +89,13 @@ class GuestBase(SQLModel):
 # Database model for the Guest resource.
 # Inherits from GuestBase and maps to the guest table, including its relationship to Party.
 class Guest(GuestBase, table=True):
+    __table_args__ = (
+        # Serves the attending / not attending counts and filters of a party.
+        Index("ix_guest_party_id_attending", "party_id", "attending"),
+        # Serves the guest list pages in (name, uuid) order and their cursor.
+        Index("ix_guest_party_id_name_uuid", "party_id", "name", "uuid"),
+    )
+
     uuid: UUID = Field(default_factory=uuid4, primary_key=True)
     # Establishes ORM relationship: guest.party returns the associated Party object.
     party: Party = Relationship(back_populates="guests")
@@ -0,0 +1,79 @@
+"""Reads from the replica, and read-your-writes for the clients that wrote.
+
+Routes that only read take their session from `get_read_session`, bound to
+the replica engine when DATABASE_REPLICA_URL is set. A replica lags behind
+the primary: a client that reads right after its own write could get the
+page as it was before. Every response to a request that committed carries a
+`recent_write` cookie that lasts READ_YOUR_WRITES_SECONDS, and the reads of
+a client with that cookie go to the primary.
+
+Other clients may read the state before a write for as long as the replica
+lags. The read sessions of the replica and of the clients that wrote bypass
+the page and party caches, which are only filled from the primary.
+"""
+
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlmodel import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+RECENT_WRITE_COOKIE = "recent_write"
+
+
+@dataclass
+class RequestWrites:
+    committed: bool = False
+
+
+_request_writes: ContextVar[Optional[RequestWrites]] = ContextVar(
+    "request_writes", default=None
+)
+
+
+# Sessions on the replica never commit, the commits of a request are writes.
+@event.listens_for(Session, "after_commit")
+def _record_commit(session):
+    request_writes = _request_writes.get()
+    if request_writes is not None:
+        request_writes.committed = True
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether the client wrote recently enough to miss it on the replica."""
+    return RECENT_WRITE_COOKIE in request.cookies
+
+
+class ReadYourWritesMiddleware:
+    """Sets the `recent_write` cookie on the responses to requests that wrote."""
+
+    def __init__(self, app: ASGIApp, seconds: int = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.cookie = (
+            f"{RECENT_WRITE_COOKIE}=1; Max-Age={seconds}; Path=/; HttpOnly; "
+            "SameSite=lax"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_writes = RequestWrites()
+        token = _request_writes.set(request_writes)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and request_writes.committed:
+                MutableHeaders(scope=message).append("Set-Cookie", self.cookie)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
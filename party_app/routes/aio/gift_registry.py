@@ -0,0 +1,212 @@
+from uuid import UUID
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
+from fastapi.responses import HTMLResponse
+from sqlalchemy import exc
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from party_app.aggregates import counters_summary, party_summary
+from party_app.cache import (
+    cache_fragment,
+    fragment_cache,
+    fragment_response,
+    get_party,
+)
+from party_app.dependency import Templates, get_async_read_session, get_async_session
+from party_app.models import Gift, Party, GiftForm
+from party_app.routes.gift_registry import gift_create_partial
+from party_app.writes import (
+    delete_returning,
+    insert_returning,
+    update_returning,
+    written_party,
+)
+
+router = APIRouter(prefix="/party/{party_id}/gifts", tags=["gifts"])
+
+
+@router.get("/", name="gift_registry_page", response_class=HTMLResponse)
+async def gift_registry_page(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    key = fragment_cache.key(party_id, request, session)
+    if fragment := fragment_cache.get(key):
+        return fragment_response(request, fragment)
+
+    party = await session.run_sync(get_party, party_id)
+    gifts = (await session.exec(select(Gift).where(Gift.party_id == party_id))).all()
+
+    return cache_fragment(
+        request,
+        key,
+        templates.TemplateResponse(
+            request=request,
+            name="gift_registry/page_gift_registry.html",
+            context={
+                "party": party,
+                "gifts": gifts,
+                "summary": await session.run_sync(party_summary, party_id),
+            },
+        ),
+    )
+
+
+# The empty form doesn't touch the database, so the sync handler is served as it is.
+router.get("/new", name="gift_create_partial", response_class=HTMLResponse)(
+    gift_create_partial
+)
+
+
+@router.post("/new", name="gift_create_save_partial", response_class=HTMLResponse)
+async def gift_create_save_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    gift_form: Annotated[GiftForm, Form()],
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        gift = await session.run_sync(
+            insert_returning,
+            Gift(
+                gift_name=gift_form.gift_name,
+                price=gift_form.price,
+                link=gift_form.link,
+                party_id=party_id,
+            ),
+        )
+    except exc.IntegrityError:
+        # Databases that enforce the foreign key refuse it right away.
+        gift = None
+    party = await session.run_sync(written_party, party_id) if gift else None
+
+    if not party:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
+        )
+
+    await session.commit()
+    fragment_cache.invalidate(party_id)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="gift_registry/partial_gift_detail.html",
+        context={
+            "party": party,
+            "gift": gift,
+            "updated_summary": counters_summary(party),
+        },
+    )
+
+
+@router.get("/{gift_id}", name="gift_detail_partial", response_class=HTMLResponse)
+async def gift_detail_partial(
+    party_id: UUID,
+    gift_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    gift = await session.get(Gift, gift_id)
+    party = await session.run_sync(get_party, party_id)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="gift_registry/partial_gift_detail.html",
+        context={"party": party, "gift": gift},
+    )
+
+
+@router.get("/{gift_id}/edit", name="gift_update_partial", response_class=HTMLResponse)
+async def gift_update_partial(
+    party_id: UUID,
+    gift_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    gift = await session.get(Gift, gift_id)
+
+    if not gift:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Gift not found"
+        )
+
+    return templates.TemplateResponse(
+        request=request,
+        name="gift_registry/partial_gift_update.html",
+        context={"gift": gift, "party_id": party_id},
+    )
+
+
+@router.put(
+    "/{gift_id}/edit", name="gift_update_save_partial", response_class=HTMLResponse
+)
+async def gift_update_save_partial(
+    party_id: UUID,
+    gift_id: UUID,
+    gift_form: Annotated[GiftForm, Form()],
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_session),
+):
+    gift = await session.run_sync(
+        update_returning,
+        Gift,
+        gift_id,
+        gift_name=gift_form.gift_name,
+        price=gift_form.price,
+        link=gift_form.link,
+    )
+
+    if not gift:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Gift not found"
+        )
+
+    party = await session.run_sync(written_party, gift.party_id)
+    await session.commit()
+    fragment_cache.invalidate(gift.party_id)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="gift_registry/partial_gift_detail.html",
+        context={
+            "gift": gift,
+            "party": party,
+            "updated_summary": counters_summary(party),
+        },
+    )
+
+
+@router.delete(
+    "/{gift_id}/delete", name="gift_remove_partial", response_class=HTMLResponse
+)
+async def gift_remove_partial(
+    gift_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_session),
+):
+    gift = await session.run_sync(delete_returning, Gift, gift_id)
+
+    if not gift:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Gift not found"
+        )
+
+    party = await session.run_sync(written_party, gift.party_id)
+    await session.commit()
+    fragment_cache.invalidate(gift.party_id)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="gift_registry/partial_gift_removed.html",
+        context={"gift": gift, "updated_summary": counters_summary(party)},
+    )
@@ -0,0 +1,254 @@
+from typing import Optional
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import HTMLResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+
+from party_app.aggregates import party_summary
+from party_app.cache import get_party
+from party_app.dependency import Templates, get_async_read_session, get_async_session
+from party_app.guest_import import (
+    GuestImport,
+    insert_guests,
+    read_guest_records,
+    validate_guests,
+)
+from party_app.routes.guest_list import (
+    QUERY_FILTERS,
+    changed_guests_response,
+    count_attending,
+    decode_guest_cursor,
+    filter_default,
+    guest_import_context,
+    guest_import_file,
+    guest_page_statement,
+    mark_guests,
+    paginate,
+)
+
+router = APIRouter(prefix="/party/{party_id}/guests", tags=["guest"])
+
+
+# returns the guest list page for a specific party
+@router.get("/", name="guest_list_page", response_class=HTMLResponse)
+async def guest_list_page(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    guests, next_cursor = paginate(
+        (await session.exec(guest_page_statement(party_id))).all()
+    )
+
+    return templates.TemplateResponse(
+        request=request,
+        name="guest_list/page_guest_list.html",
+        context={
+            "party_id": party_id,
+            "guests": guests,
+            "next_cursor": next_cursor,
+            "attending_filter": "all",
+            "summary": await session.run_sync(party_summary, party_id),
+        },
+    )
+
+
+@router.get("/rows", name="guest_rows_partial", response_class=HTMLResponse)
+async def guest_rows_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+    cursor: str = Query(...),
+    attending_filter: str = Query("all"),
+):
+    query_filter = QUERY_FILTERS.get((attending_filter, False), filter_default)
+
+    guests, next_cursor = paginate(
+        await session.run_sync(
+            query_filter, party_id=party_id, after=decode_guest_cursor(cursor)
+        )
+    )
+
+    return templates.TemplateResponse(
+        request=request,
+        name="guest_list/partial_guest_list.html",
+        context={
+            "party_id": party_id,
+            "guests": guests,
+            "next_cursor": next_cursor,
+            "attending_filter": attending_filter,
+        },
+    )
+
+
+async def _marked_guests_response(
+    request: Request,
+    templates: Templates,
+    session: AsyncSession,
+    party_id: UUID,
+    changed_guests,
+    response_mode: str,
+):
+    if response_mode == "changed" and changed_guests is not None:
+        return changed_guests_response(
+            request,
+            templates,
+            party_id,
+            changed_guests,
+            await session.run_sync(count_attending, party_id),
+        )
+
+    guests, next_cursor = paginate(
+        (await session.exec(guest_page_statement(party_id))).all()
+    )
+
+    return templates.TemplateResponse(
+        request=request,
+        name="guest_list/partial_guest_filter_and_list.html",
+        context={
+            "party_id": party_id,
+            "guests": guests,
+            "next_cursor": next_cursor,
+            "attending_filter": "all",
+        },
+    )
+
+
+@router.put(
+    "/mark-attending", name="mark_guests_attending_partial", response_class=HTMLResponse
+)
+async def mark_guests_attending_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_session),
+    guest_ids: list[UUID] = Form([]),
+    select_all: bool = Form(False),
+    attending_filter: str = Form("all"),
+    guest_search: str = Form(""),
+    response_mode: str = Form("list"),
+):
+    changed_guests = await session.run_sync(
+        mark_guests,
+        party_id,
+        True,
+        guest_ids,
+        select_all,
+        attending_filter,
+        guest_search,
+    )
+    await session.commit()
+
+    return await _marked_guests_response(
+        request, templates, session, party_id, changed_guests, response_mode
+    )
+
+
+@router.put(
+    "/mark-not-attending",
+    name="mark_guests_not_attending_partial",
+    response_class=HTMLResponse,
+)
+async def mark_guests_not_attending_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_session),
+    guest_ids: list[UUID] = Form([]),
+    select_all: bool = Form(False),
+    attending_filter: str = Form("all"),
+    guest_search: str = Form(""),
+    response_mode: str = Form("list"),
+):
+    changed_guests = await session.run_sync(
+        mark_guests,
+        party_id,
+        False,
+        guest_ids,
+        select_all,
+        attending_filter,
+        guest_search,
+    )
+    await session.commit()
+
+    return await _marked_guests_response(
+        request, templates, session, party_id, changed_guests, response_mode
+    )
+
+
+@router.post("/filter", name="filter_guests_partial", response_class=HTMLResponse)
+async def filter_guests_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+    guest_search: str = Form(...),
+    attending_filter: str = Form(...),
+):
+    query_filter = QUERY_FILTERS.get(
+        (attending_filter, bool(guest_search)), filter_default
+    )
+
+    # The filters are written against a sync Session, run_sync hands them one
+    # that shares this session's connection.
+    guests, next_cursor = paginate(
+        await session.run_sync(
+            query_filter, party_id=party_id, search_text=guest_search
+        )
+    )
+
+    return templates.TemplateResponse(
+        request=request,
+        name="guest_list/partial_guest_list.html",
+        context={
+            "party_id": party_id,
+            "guests": guests,
+            "next_cursor": next_cursor,
+            "attending_filter": attending_filter,
+        },
+    )
+
+
+@router.post("/import", name="import_guests_partial", response_class=HTMLResponse)
+async def import_guests_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_session),
+    guest_file: Optional[UploadFile] = File(None),
+    guest_text: str = Form(""),
+):
+    if not await session.run_sync(get_party, party_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
+        )
+
+    text, filename = guest_import_file(guest_file, guest_text)
+    guest_import = GuestImport()
+    # Parsing and validating a large list takes seconds, it stays off the loop.
+    batches = validate_guests(
+        party_id, read_guest_records(text, filename), guest_import
+    )
+    async for batch in iterate_in_threadpool(batches):
+        await session.run_sync(insert_guests, batch, guest_import)
+    await session.commit()
+
+    return templates.TemplateResponse(
+        request=request,
+        name="guest_list/partial_guest_import.html",
+        context=await session.run_sync(guest_import_context, party_id, guest_import),
+    )
@@ -0,0 +1,44 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Request, Depends, Form, status, Response
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from party_app.dependency import get_async_session
+from party_app.models import Party, PartyForm
+from party_app.routes.new_party import (
+    new_party_form_page,
+    validate_date,
+    validate_invitation,
+)
+from party_app.writes import insert_returning
+
+router = APIRouter(prefix="/party/new", tags=["new_party"])
+
+# These don't touch the database, so the sync handlers are served as they are.
+router.get("/", name="new_party_form_page", response_class=HTMLResponse)(
+    new_party_form_page
+)
+
+
+@router.post("/", name="new_party_create_page", response_class=HTMLResponse)
+async def new_party_create_page(
+    request: Request,
+    party_form: Annotated[PartyForm, Form()],
+    session: AsyncSession = Depends(get_async_session),
+):
+    party = await session.run_sync(insert_returning, Party(**party_form.model_dump()))
+    await session.commit()
+
+    return RedirectResponse(
+        request.url_for("party_detail_page", party_id=party.uuid),
+        status_code=status.HTTP_302_FOUND,
+    )
+
+
+router.post("/validate_date", name="validate_date_partial", response_class=Response)(
+    validate_date
+)
+router.post(
+    "validate_date", name="validate_invitation_partial", response_class=Response
+)(validate_invitation)
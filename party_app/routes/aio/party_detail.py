@@ -0,0 +1,117 @@
+from datetime import date, time
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Request, Form, status
+from fastapi.exceptions import HTTPException
+from fastapi.responses import HTMLResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from party_app.cache import (
+    cache_fragment,
+    fragment_cache,
+    fragment_response,
+    get_party,
+)
+from party_app.dependency import Templates, get_async_read_session, get_async_session
+from party_app.models import Party
+from party_app.writes import update_returning
+
+router = APIRouter(prefix="/party", tags=["party"])
+
+
+@router.get("/{party_id}", name="party_detail_page", response_class=HTMLResponse)
+async def party_detail_page(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    key = fragment_cache.key(party_id, request, session)
+    if fragment := fragment_cache.get(key):
+        return fragment_response(request, fragment)
+
+    party = await session.run_sync(get_party, party_id)
+
+    if not party:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
+        )
+
+    return cache_fragment(
+        request,
+        key,
+        templates.TemplateResponse(
+            request=request,
+            name="party_detail/page_party_detail.html",
+            context={"party": party},
+        ),
+    )
+
+
+@router.put(
+    "/{party_id}", name="party_detail_save_form_partial", response_class=HTMLResponse
+)
+async def party_detail_save_form_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_session),
+    party_date: date = Form(...),
+    party_time: time = Form(...),
+    invitation: str = Form(...),
+    venue: str = Form(...),
+):
+    party = await session.run_sync(
+        update_returning,
+        Party,
+        party_id,
+        party_date=party_date,
+        party_time=party_time,
+        invitation=invitation,
+        venue=venue,
+    )
+
+    if not party:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
+        )
+
+    await session.commit()
+    fragment_cache.invalidate(party_id)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="party_detail/partial_party_detail.html",
+        context={"party": party},
+    )
+
+
+@router.get(
+    "/{party_id}/edit", name="partial_party_detail_edit", response_class=HTMLResponse
+)
+async def party_detail_form_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    key = fragment_cache.key(party_id, request, session)
+    if fragment := fragment_cache.get(key):
+        return fragment_response(request, fragment)
+
+    party = await session.run_sync(get_party, party_id)
+
+    if not party:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
+        )
+
+    return cache_fragment(
+        request,
+        key,
+        templates.TemplateResponse(
+            request=request,
+            name="party_detail/partial_party_edit.html",
+            context={"party": party},
+        ),
+    )
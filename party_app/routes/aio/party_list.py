@@ -0,0 +1,56 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request, Query
+from fastapi.responses import HTMLResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from party_app.dependency import Templates, get_async_read_session
+from party_app.routes.party_list import (
+    _PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    upcoming_parties_statement,
+)
+
+router = APIRouter(prefix="", tags=["parties"])
+
+
+@router.get("/", name="party_list_page", response_class=HTMLResponse)
+async def party_list_page(
+    request: Request,
+    templates: Templates,
+    session: AsyncSession = Depends(get_async_read_session),
+    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None),
+):
+    statement = upcoming_parties_statement(
+        date.today(), decode_cursor(cursor) if cursor else None
+    )
+
+    if not cursor:
+        statement = statement.offset((page - 1) * _PAGE_SIZE)
+
+    parties = (await session.exec(statement.limit(_PAGE_SIZE + 1))).all()
+    has_next = len(parties) > _PAGE_SIZE
+    parties = parties[:_PAGE_SIZE]
+
+    next_page = page + 1 if has_next else None
+    next_cursor = encode_cursor(parties[-1]) if has_next else None
+
+    htmx_request = request.headers.get("HX-Request", None)
+
+    if htmx_request:
+        template_name = "party_list/partial_party_list.html"
+    else:
+        template_name = "party_list/page_party_list.html"
+
+    return templates.TemplateResponse(
+        request=request,
+        name=template_name,
+        context={
+            "parties": parties,
+            "next_page": next_page,
+            "next_cursor": next_cursor,
+        },
+    )
@@ -0,0 +1,92 @@
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from party_app.cache import get_party
+from party_app.dependency import get_read_session, require_admin
+from party_app.export import (
+    EXPORT_MEDIA_TYPES,
+    export_chunks,
+    gifts_export_statement,
+    guests_export_statement,
+)
+
+# Shared by the sync and the async app: the rows are read from a sync cursor
+# in the threadpool while the response is sent.
+router = APIRouter(tags=["export"])
+
+ExportFormat = Literal["csv", "ndjson"]
+
+
+def export_response(
+    session: Session, statement, export_format: str, filename: str
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_chunks(session, statement, export_format, label=filename),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
+
+
+def _check_party(session: Session, party_id: UUID) -> None:
+    if not get_party(session, party_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
+        )
+
+
+# streams every guest of a party as CSV or NDJSON
+@router.get("/party/{party_id}/export/guests", name="export_party_guests")
+def export_party_guests(
+    party_id: UUID,
+    session: Session = Depends(get_read_session),
+    export_format: ExportFormat = Query("csv", alias="format"),
+):
+    _check_party(session, party_id)
+    return export_response(
+        session,
+        guests_export_statement(party_id),
+        export_format,
+        f"guests-{party_id}",
+    )
+
+
+# streams every gift of a party as CSV or NDJSON
+@router.get("/party/{party_id}/export/gifts", name="export_party_gifts")
+def export_party_gifts(
+    party_id: UUID,
+    session: Session = Depends(get_read_session),
+    export_format: ExportFormat = Query("csv", alias="format"),
+):
+    _check_party(session, party_id)
+    return export_response(
+        session,
+        gifts_export_statement(party_id),
+        export_format,
+        f"gifts-{party_id}",
+    )
+
+
+# streams the guests of every party, for admins
+@router.get(
+    "/export/guests", name="export_guests", dependencies=[Depends(require_admin)]
+)
+def export_guests(
+    session: Session = Depends(get_read_session),
+    export_format: ExportFormat = Query("csv", alias="format"),
+):
+    return export_response(session, guests_export_statement(), export_format, "guests")
+
+
+# streams the gifts of every party, for admins
+@router.get("/export/gifts", name="export_gifts", dependencies=[Depends(require_admin)])
+def export_gifts(
+    session: Session = Depends(get_read_session),
+    export_format: ExportFormat = Query("csv", alias="format"),
+):
+    return export_response(session, gifts_export_statement(), export_format, "gifts")
@@ -1,12 +1,29 @@
+from functools import partial
 from uuid import UUID
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
 from fastapi.responses import HTMLResponse
+from sqlalchemy import exc
 from sqlmodel import Session, select
 
-from party_app.dependency import Templates, get_session
+from party_app.aggregates import counters_summary, party_summary
+from party_app.cache import (
+    FRAGMENT_CACHE_MAX_BODY,
+    fragment_cache,
+    fragment_response,
+    get_party,
+    store_fragment,
+)
+from party_app.dependency import Templates, get_read_session, get_session
 from party_app.models import Gift, Party, GiftForm
+from party_app.streaming import LazyResult, StreamingTemplateResponse
+from party_app.writes import (
+    delete_returning,
+    insert_returning,
+    update_returning,
+    written_party,
+)
 
 router = APIRouter(prefix="/party/{party_id}/gifts", tags=["gifts"])
 
@@ -17,15 +34,28 @@ def gift_registry_page(
     party_id: UUID,
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
-    party = session.get(Party, party_id)
-    gifts = session.exec(select(Gift).where(Gift.party_id == party_id)).all()
-
-    return templates.TemplateResponse(
-        request=request,
-        name="gift_registry/page_gift_registry.html",
-        context={"party": party, "gifts": gifts},
+    key = fragment_cache.key(party_id, request, session)
+    if fragment := fragment_cache.get(key):
+        return fragment_response(request, fragment)
+
+    party = get_party(session, party_id)
+    gifts = LazyResult(session, select(Gift).where(Gift.party_id == party_id))
+
+    # Streamed while the gifts are fetched. The ETag can only be known once
+    # the whole page has been sent, so it comes with the next request.
+    return StreamingTemplateResponse(
+        templates,
+        request,
+        "gift_registry/page_gift_registry.html",
+        context={
+            "party": party,
+            "gifts": gifts,
+            "summary": party_summary(session, party_id),
+        },
+        on_rendered=partial(store_fragment, key),
+        max_rendered_size=FRAGMENT_CACHE_MAX_BODY,
     )
 
 
@@ -52,28 +82,38 @@ def gift_create_save_partial(
     gift_form: Annotated[GiftForm, Form()],
     session: Session = Depends(get_session),
 ):
-    party = session.get(Party, party_id)
+    try:
+        gift = insert_returning(
+            session,
+            Gift(
+                gift_name=gift_form.gift_name,
+                price=gift_form.price,
+                link=gift_form.link,
+                party_id=party_id,
+            ),
+        )
+    except exc.IntegrityError:
+        # Databases that enforce the foreign key refuse it right away.
+        gift = None
+    party = written_party(session, party_id) if gift else None
 
     if not party:
+        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
         )
 
-    gift = Gift(
-        gift_name=gift_form.gift_name,
-        price=gift_form.price,
-        link=gift_form.link,
-        party_id=party_id,
-    )
-
-    session.add(gift)
     session.commit()
-    session.refresh(gift)
+    fragment_cache.invalidate(party_id)
 
     return templates.TemplateResponse(
         request=request,
         name="gift_registry/partial_gift_detail.html",
-        context={"party": party, "gift": gift},
+        context={
+            "party": party,
+            "gift": gift,
+            "updated_summary": counters_summary(party),
+        },
     )
 
 
@@ -84,10 +124,10 @@ def gift_detail_partial(
     gift_id: UUID,
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     gift = session.get(Gift, gift_id)
-    party = session.get(Party, party_id)
+    party = get_party(session, party_id)
 
     return templates.TemplateResponse(
         request=request,
@@ -103,7 +143,7 @@ def gift_update_partial(
     gift_id: UUID,
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     gift = session.get(Gift, gift_id)
 
@@ -131,26 +171,32 @@ def gift_update_save_partial(
     templates: Templates,
     session: Session = Depends(get_session),
 ):
-    party = session.get(Party, party_id)
-    gift = session.get(Gift, gift_id)
+    gift = update_returning(
+        session,
+        Gift,
+        gift_id,
+        gift_name=gift_form.gift_name,
+        price=gift_form.price,
+        link=gift_form.link,
+    )
 
     if not gift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Gift not found"
         )
 
-    gift.gift_name = gift_form.gift_name
-    gift.price = gift_form.price
-    gift.link = gift_form.link
-
-    session.add(gift)
+    party = written_party(session, gift.party_id)
     session.commit()
-    session.refresh(gift)
+    fragment_cache.invalidate(gift.party_id)
 
     return templates.TemplateResponse(
         request=request,
         name="gift_registry/partial_gift_detail.html",
-        context={"gift": gift, "party": party},
+        context={
+            "gift": gift,
+            "party": party,
+            "updated_summary": counters_summary(party),
+        },
     )
 
 
@@ -163,18 +209,19 @@ def gift_remove_partial(
     templates: Templates,
     session: Session = Depends(get_session),
 ):
-    gift = session.get(Gift, gift_id)
+    gift = delete_returning(session, Gift, gift_id)
 
     if not gift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Gift not found"
         )
 
-    session.delete(gift)
+    party = written_party(session, gift.party_id)
     session.commit()
+    fragment_cache.invalidate(gift.party_id)
 
     return templates.TemplateResponse(
         request=request,
         name="gift_registry/partial_gift_removed.html",
-        context={"gift": gift},
+        context={"gift": gift, "updated_summary": counters_summary(party)},
     )
@@ -1,14 +1,264 @@
+import base64
+import io
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Form, Request, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
 from fastapi.responses import HTMLResponse
-from sqlmodel import Session, select
-
-from party_app.dependency import Templates, get_session
+from fastapi.templating import Jinja2Templates
+from sqlalchemy import Row
+from sqlmodel import Session, func, select, tuple_, update
+
+from party_app.aggregates import party_summary
+from party_app.cache import get_party, mark_party_written
+from party_app.dependency import Templates, get_read_session, get_session
+from party_app.guest_import import GuestImport, import_guests, read_guest_records
 from party_app.models import Guest, Party
+from party_app.search import search_guests, search_guests_statement
+from party_app.streaming import StreamingTemplateResponse
 
 router = APIRouter(prefix="/party/{party_id}/guests", tags=["guest"])
 
+# Keeps each UPDATE below the bound parameter limits of SQLite (32766) and
+# psycopg (65535), so a "select all" of tens of thousands of guests is still
+# a single statement.
+_UPDATE_CHUNK_SIZE = 30_000
+
+_GUEST_PAGE_SIZE = 50
+
+
+def encode_guest_cursor(guest: Guest) -> str:
+    """Encode the sort key of a guest into an opaque cursor for the next page."""
+    raw = f"{guest.uuid.hex}|{guest.name}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_guest_cursor(cursor: str) -> tuple[str, UUID]:
+    """Decode a cursor created by `encode_guest_cursor` back into its sort key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        guest_uuid, name = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return name, UUID(guest_uuid)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def guest_page_statement(
+    party_id: UUID,
+    attending: Optional[bool] = None,
+    after: Optional[tuple[str, UUID]] = None,
+):
+    """One page of the guests of a party in (name, uuid) order.
+
+    One guest more than the page is selected, it tells whether there is a
+    next page. When `after` is given the page starts right after that sort key.
+    """
+    statement = select(Guest).where(Guest.party_id == party_id)
+
+    if attending is not None:
+        statement = statement.where(Guest.attending == attending)
+
+    if after is not None:
+        statement = statement.where(tuple_(Guest.name, Guest.uuid) > tuple_(*after))
+
+    return statement.order_by(Guest.name, Guest.uuid).limit(_GUEST_PAGE_SIZE + 1)
+
+
+def paginate(guests: list[Guest]) -> tuple[list[Guest], Optional[str]]:
+    """Splits a page selected by `guest_page_statement` into its guests and
+    the cursor of the next page, if there is one."""
+    if len(guests) <= _GUEST_PAGE_SIZE:
+        return guests, None
+
+    guests = guests[:_GUEST_PAGE_SIZE]
+    return guests, encode_guest_cursor(guests[-1])
+
+
+def _update_attendance(session: Session, where, attending: bool) -> list[Row]:
+    statement = (
+        update(Guest)
+        .where(where & (Guest.attending != attending))
+        .values(attending=attending)
+        .execution_options(synchronize_session=False)
+    )
+
+    if session.get_bind().dialect.update_returning:
+        return session.exec(
+            statement.returning(Guest.uuid, Guest.name, Guest.attending)
+        ).all()
+
+    changed_ids = session.exec(
+        select(Guest.uuid).where(where & (Guest.attending != attending))
+    ).all()
+    session.exec(statement)
+    return session.exec(
+        select(Guest.uuid, Guest.name, Guest.attending).where(
+            Guest.uuid.in_(changed_ids)
+        )
+    ).all()
+
+
+def set_attendance(
+    session: Session, party_id: UUID, guest_ids: list[UUID], attending: bool
+) -> list[Row]:
+    """Set `attending` on the given guests of a party without loading them.
+
+    Runs one UPDATE per chunk of ids, and returns the uuid, name and attending
+    of the guests whose attendance actually changed.
+    """
+    changed_guests = []
+
+    # The UPDATEs change the party counters behind the session's back.
+    mark_party_written(session, party_id)
+
+    for start in range(0, len(guest_ids), _UPDATE_CHUNK_SIZE):
+        guest_ids_chunk = guest_ids[start : start + _UPDATE_CHUNK_SIZE]
+        changed_guests += _update_attendance(
+            session,
+            (Guest.party_id == party_id) & (Guest.uuid.in_(guest_ids_chunk)),
+            attending,
+        )
+
+    return changed_guests
+
+
+def filter_predicate(
+    session: Session, party_id: UUID, attending_filter: str, search_text: str
+):
+    """The guests listed for a filter and search, as a WHERE clause."""
+    where = Guest.party_id == party_id
+    attending = {"attending": True, "not_attending": False}.get(attending_filter)
+
+    if attending is not None:
+        where &= Guest.attending == attending
+
+    if search_text:
+        # Only the matches that are listed, searches are limited: the top
+        # matches among the guests of the filter, as in `filter_guests_partial`.
+        matches = search_guests_statement(
+            session.get_bind().dialect.name, party_id, search_text, attending
+        ).with_only_columns(Guest.uuid)
+        where &= Guest.uuid.in_(matches)
+
+    return where
+
+
+def set_attendance_matching(
+    session: Session,
+    party_id: UUID,
+    attending: bool,
+    attending_filter: str,
+    search_text: str,
+) -> None:
+    """Set `attending` on every guest listed for a filter and search.
+
+    This is "select all": a single UPDATE by predicate, the ids of guests
+    that were never loaded in the browser aren't needed.
+    """
+    mark_party_written(session, party_id)
+    session.exec(
+        update(Guest)
+        .where(filter_predicate(session, party_id, attending_filter, search_text))
+        .where(Guest.attending != attending)
+        .values(attending=attending)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def mark_guests(
+    session: Session,
+    party_id: UUID,
+    attending: bool,
+    guest_ids: list[UUID],
+    select_all: bool,
+    attending_filter: str,
+    search_text: str,
+) -> Optional[list[Row]]:
+    """Marks the posted guests, or all listed guests when `select_all` is on.
+
+    Returns the changed guests, or None after a "select all".
+    """
+    if select_all:
+        set_attendance_matching(
+            session, party_id, attending, attending_filter, search_text
+        )
+        return None
+
+    return set_attendance(session, party_id, guest_ids, attending)
+
+
+def count_attending(session: Session, party_id: UUID) -> int:
+    return session.exec(
+        select(func.count())
+        .select_from(Guest)
+        .where((Guest.party_id == party_id) & (Guest.attending == True))
+    ).one()
+
+
+def changed_guests_response(
+    request: Request,
+    templates: Jinja2Templates,
+    party_id: UUID,
+    changed_guests: list[Row],
+    attending_num: int,
+):
+    """Only the rows of the changed guests and the attending counter.
+
+    They are swapped out of band by their ids, so the size of the response
+    follows the number of changed guests instead of the size of the party.
+    """
+    response = templates.TemplateResponse(
+        request=request,
+        name="guest_list/partial_guest_changes.html",
+        context={
+            "party_id": party_id,
+            "guests": changed_guests,
+            "attending_num": attending_num,
+        },
+    )
+    # Leaves #guests as it is, htmx still processes the out of band swaps.
+    response.headers["HX-Reswap"] = "none"
+    return response
+
+
+def guest_import_file(guest_file: Optional[UploadFile], guest_text: str):
+    """Text stream and file name of an uploaded list, or of a pasted one."""
+    if guest_file is not None and guest_file.filename:
+        # The upload is spooled to disk past 1MB, it's read from there line by
+        # line.
+        text = io.TextIOWrapper(
+            guest_file.file, encoding="utf-8-sig", errors="replace", newline=""
+        )
+        return text, guest_file.filename
+    return io.StringIO(guest_text, newline=""), ""
+
+
+def guest_import_context(
+    session: Session, party_id: UUID, guest_import: GuestImport
+) -> dict:
+    guests, next_cursor = paginate(session.exec(guest_page_statement(party_id)).all())
+
+    return {
+        "party_id": party_id,
+        "guest_import": guest_import,
+        "guests": guests,
+        "next_cursor": next_cursor,
+        "attending_filter": "all",
+        "summary": party_summary(session, party_id),
+    }
+
 
 # returns the guest list page for a specific party
 @router.get("/", name="guest_list_page", response_class=HTMLResponse)
@@ -16,18 +266,83 @@ def guest_list_page(
     party_id: UUID,
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
+):
+    guests, next_cursor = paginate(session.exec(guest_page_statement(party_id)).all())
+
+    return StreamingTemplateResponse(
+        templates,
+        request,
+        "guest_list/page_guest_list.html",
+        context={
+            "party_id": party_id,
+            "guests": guests,
+            "next_cursor": next_cursor,
+            "attending_filter": "all",
+            "summary": party_summary(session, party_id),
+        },
+    )
+
+
+# returns the next page of guests, requested when the end of the list is revealed
+@router.get("/rows", name="guest_rows_partial", response_class=HTMLResponse)
+def guest_rows_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: Session = Depends(get_read_session),
+    cursor: str = Query(...),
+    attending_filter: str = Query("all"),
 ):
-    guests = session.exec(select(Guest).where(Guest.party_id == party_id)).all()
-    attending_num = sum(1 for guest in guests if guest.attending)
+    query_filter = QUERY_FILTERS.get((attending_filter, False), filter_default)
+
+    guests, next_cursor = paginate(
+        query_filter(
+            session=session, party_id=party_id, after=decode_guest_cursor(cursor)
+        )
+    )
 
     return templates.TemplateResponse(
         request=request,
-        name="guest_list/page_guest_list.html",
+        name="guest_list/partial_guest_list.html",
         context={
             "party_id": party_id,
             "guests": guests,
-            "attending_num": attending_num,
+            "next_cursor": next_cursor,
+            "attending_filter": attending_filter,
+        },
+    )
+
+
+def _marked_guests_response(
+    request: Request,
+    templates: Jinja2Templates,
+    session: Session,
+    party_id: UUID,
+    changed_guests: Optional[list[Row]],
+    response_mode: str,
+):
+    # After a "select all" the changed rows can be the whole party, the first
+    # page is sent again instead.
+    if response_mode == "changed" and changed_guests is not None:
+        return changed_guests_response(
+            request,
+            templates,
+            party_id,
+            changed_guests,
+            count_attending(session, party_id),
+        )
+
+    guests, next_cursor = paginate(session.exec(guest_page_statement(party_id)).all())
+
+    return templates.TemplateResponse(
+        request=request,
+        name="guest_list/partial_guest_filter_and_list.html",
+        context={
+            "party_id": party_id,
+            "guests": guests,
+            "next_cursor": next_cursor,
+            "attending_filter": "all",
         },
     )
 
@@ -40,23 +355,25 @@ def mark_guests_attending_partial(
     request: Request,
     templates: Templates,
     session: Session = Depends(get_session),
-    guest_ids: list[UUID] = Form(...),
+    guest_ids: list[UUID] = Form([]),
+    select_all: bool = Form(False),
+    attending_filter: str = Form("all"),
+    guest_search: str = Form(""),
+    response_mode: str = Form("list"),
 ):
-    attending_guests = session.exec(
-        select(Guest).where(Guest.uuid.in_(guest_ids))
-    ).all()
-
-    for guest in attending_guests:
-        guest.attending = True
-
+    changed_guests = mark_guests(
+        session,
+        party_id,
+        True,
+        guest_ids,
+        select_all,
+        attending_filter,
+        guest_search,
+    )
     session.commit()
 
-    guests = session.exec(select(Guest).where(Guest.party_id == party_id)).all()
-
-    return templates.TemplateResponse(
-        request=request,
-        name="guest_list/partial_guest_filter_and_list.html",
-        context={"party_id": party_id, "guests": guests},
+    return _marked_guests_response(
+        request, templates, session, party_id, changed_guests, response_mode
     )
 
 
@@ -70,77 +387,67 @@ def mark_guests_not_attending_partial(
     request: Request,
     templates: Templates,
     session: Session = Depends(get_session),
-    guest_ids: list[UUID] = Form(...),
+    guest_ids: list[UUID] = Form([]),
+    select_all: bool = Form(False),
+    attending_filter: str = Form("all"),
+    guest_search: str = Form(""),
+    response_mode: str = Form("list"),
 ):
-    not_attending_guests = session.exec(
-        select(Guest).where(Guest.uuid.in_(guest_ids))
-    ).all()
-
-    for guest in not_attending_guests:
-        guest.attending = False
-
+    changed_guests = mark_guests(
+        session,
+        party_id,
+        False,
+        guest_ids,
+        select_all,
+        attending_filter,
+        guest_search,
+    )
     session.commit()
 
-    guests = session.exec(select(Guest).where(Guest.party_id == party_id)).all()
-
-    return templates.TemplateResponse(
-        request=request,
-        name="guest_list/partial_guest_filter_and_list.html",
-        context={"party_id": party_id, "guests": guests},
+    return _marked_guests_response(
+        request, templates, session, party_id, changed_guests, response_mode
     )
 
 
-def filter_attending(session: Session, party_id: UUID, **kwargs) -> list[Guest]:
-    return session.exec(
-        select(Guest).where((Guest.party_id == party_id) & (Guest.attending == True))
-    ).all()
+def filter_attending(
+    session: Session, party_id: UUID, after=None, **kwargs
+) -> list[Guest]:
+    return session.exec(guest_page_statement(party_id, True, after)).all()
 
 
-def filter_not_attending(session: Session, party_id: UUID, **kwargs) -> list[Guest]:
-    return session.exec(
-        select(Guest).where((Guest.party_id == party_id) & (Guest.attending == False))
-    ).all()
+def filter_not_attending(
+    session: Session, party_id: UUID, after=None, **kwargs
+) -> list[Guest]:
+    return session.exec(guest_page_statement(party_id, False, after)).all()
 
 
 def filter_attending_and_search(
     session: Session, party_id: UUID, **kwargs
 ) -> list[Guest]:
     search_text = kwargs.get("search_text", "")
-    return session.exec(
-        select(Guest).where(
-            (Guest.party_id == party_id)
-            & (Guest.attending == True)
-            & (Guest.name.ilike(f"%{search_text}%"))
-        )
-    ).all()
+    return search_guests(session, party_id, search_text, attending=True)
 
 
 def filter_not_attending_and_search(
     session: Session, party_id: UUID, **kwargs
 ) -> list[Guest]:
     search_text = kwargs.get("search_text", "")
-    return session.exec(
-        select(Guest).where(
-            (Guest.party_id == party_id)
-            & (Guest.attending == False)
-            & (Guest.name.ilike(f"%{search_text}%"))
-        )
-    ).all()
+    return search_guests(session, party_id, search_text, attending=False)
 
 
 def filter_search(session: Session, party_id: UUID, **kwargs) -> list[Guest]:
     search_text = kwargs.get("search_text", "")
-    return session.exec(
-        select(Guest).where(
-            (Guest.party_id == party_id) & (Guest.name.ilike(f"%{search_text}%"))
-        )
-    ).all()
+    return search_guests(session, party_id, search_text)
 
 
-def filter_default(session: Session, party_id: UUID, **kargs) -> list[Guest]:
-    return session.exec(select(Guest).where(Guest.party_id == party_id)).all()
+def filter_default(
+    session: Session, party_id: UUID, after=None, **kargs
+) -> list[Guest]:
+    return session.exec(guest_page_statement(party_id, after=after)).all()
 
 
+# The filters without a search return one page plus one guest, see `paginate`.
+# Searches return at most a page of the best matches.
 QUERY_FILTERS = {
     ("attending", False): filter_attending,
     ("not_attending", False): filter_not_attending,
@@ -155,7 +462,7 @@ def filter_guests_partial(
     party_id: UUID,
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     guest_search: str = Form(...),
     attending_filter: str = Form(...),
 ):
@@ -163,10 +470,44 @@ def filter_guests_partial(
         (attending_filter, bool(guest_search)), filter_default
     )
 
-    guests = query_filter(session=session, party_id=party_id, search_text=guest_search)
+    guests, next_cursor = paginate(
+        query_filter(session=session, party_id=party_id, search_text=guest_search)
+    )
 
     return templates.TemplateResponse(
         request=request,
         name="guest_list/partial_guest_list.html",
-        context={"party_id": party_id, "guests": guests},
+        context={
+            "party_id": party_id,
+            "guests": guests,
+            "next_cursor": next_cursor,
+            "attending_filter": attending_filter,
+        },
+    )
+
+
+# Adds the guests of an uploaded or pasted list, returns what was imported
+# along with the first page of the updated list.
+@router.post("/import", name="import_guests_partial", response_class=HTMLResponse)
+def import_guests_partial(
+    party_id: UUID,
+    request: Request,
+    templates: Templates,
+    session: Session = Depends(get_session),
+    guest_file: Optional[UploadFile] = File(None),
+    guest_text: str = Form(""),
+):
+    if not get_party(session, party_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
+        )
+
+    text, filename = guest_import_file(guest_file, guest_text)
+    guest_import = import_guests(session, party_id, read_guest_records(text, filename))
+    session.commit()
+
+    return templates.TemplateResponse(
+        request=request,
+        name="guest_list/partial_guest_import.html",
+        context=guest_import_context(session, party_id, guest_import),
     )
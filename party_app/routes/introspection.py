@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Response
+
+from db import pool_status
+from party_app.cache import fragment_cache, party_cache
+from party_app.dependency import require_admin
+from party_app.metrics import registry
+from party_app.startup import startup_report
+
+# The pool state, cache stats and per-route traffic are for the operators only.
+router = APIRouter(
+    prefix="/internal", tags=["internal"], dependencies=[Depends(require_admin)]
+)
+metrics_router = APIRouter(tags=["internal"], dependencies=[Depends(require_admin)])
+
+
+# returns checkout latency, usage and timeouts of the database connection pools
+@router.get("/pool", name="pool_status")
+def pool_status_page():
+    return pool_status()
+
+
+# returns size, hits and misses of the in-process caches
+@router.get("/cache", name="cache_status")
+def cache_status_page():
+    return {"party": party_cache.stats(), "fragment": fragment_cache.stats()}
+
+
+# returns how long the worker took to import the app, connect and compile the
+# templates
+@router.get("/startup", name="startup_report")
+def startup_report_page():
+    return startup_report.as_dict()
+
+
+# returns the request metrics in the Prometheus text format
+@metrics_router.get("/metrics", name="metrics")
+def metrics_page():
+    return Response(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
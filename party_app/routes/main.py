@@ -6,6 +6,8 @@ from party_app.routes import (
     new_party,
     gift_registry,
     guest_list,
+    introspection,
+    export,
 )
 
 api_router = APIRouter()
@@ -15,3 +17,6 @@ api_router.include_router(party_detail.router)
 api_router.include_router(new_party.router)
 api_router.include_router(gift_registry.router)
 api_router.include_router(guest_list.router)
+api_router.include_router(introspection.router)
+api_router.include_router(introspection.metrics_router)
+api_router.include_router(export.router)
@@ -7,6 +7,7 @@ from sqlmodel import Session
 
 from party_app.dependency import Templates, get_session
 from party_app.models import Party, PartyForm
+from party_app.writes import insert_returning
 
 router = APIRouter(prefix="/party/new", tags=["new_party"])
 
@@ -25,11 +26,8 @@ def new_party_create_page(
     party_form: Annotated[PartyForm, Form()],
     session: Session = Depends(get_session),
 ):
-    party = Party(**party_form.model_dump())
-
-    session.add(party)
+    party = insert_returning(session, Party(**party_form.model_dump()))
     session.commit()
-    session.refresh(party)
 
     return RedirectResponse(
         request.url_for("party_detail_page", party_id=party.uuid),
@@ -6,8 +6,15 @@ from fastapi.exceptions import HTTPException
 from fastapi.responses import HTMLResponse
 from sqlmodel import Session
 
-from party_app.dependency import Templates, get_session
+from party_app.cache import (
+    cache_fragment,
+    fragment_cache,
+    fragment_response,
+    get_party,
+)
+from party_app.dependency import Templates, get_read_session, get_session
 from party_app.models import Party
+from party_app.writes import update_returning
 
 router = APIRouter(prefix="/party", tags=["party"])
 
@@ -17,19 +24,27 @@ def party_detail_page(
     party_id: UUID,
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
-    party = session.get(Party, party_id)
+    key = fragment_cache.key(party_id, request, session)
+    if fragment := fragment_cache.get(key):
+        return fragment_response(request, fragment)
+
+    party = get_party(session, party_id)
 
     if not party:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
         )
 
-    return templates.TemplateResponse(
-        request=request,
-        name="party_detail/page_party_detail.html",
-        context={"party": party},
+    return cache_fragment(
+        request,
+        key,
+        templates.TemplateResponse(
+            request=request,
+            name="party_detail/page_party_detail.html",
+            context={"party": party},
+        ),
     )
 
 
@@ -46,21 +61,23 @@ def party_detail_save_form_partial(
     invitation: str = Form(...),
     venue: str = Form(...),
 ):
-    party = session.get(Party, party_id)
+    party = update_returning(
+        session,
+        Party,
+        party_id,
+        party_date=party_date,
+        party_time=party_time,
+        invitation=invitation,
+        venue=venue,
+    )
 
     if not party:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
         )
 
-    party.party_date = party_date
-    party.party_time = party_time
-    party.invitation = invitation
-    party.venue = venue
-
-    session.add(party)
     session.commit()
-    session.refresh(party)
+    fragment_cache.invalidate(party_id)
 
     return templates.TemplateResponse(
         request=request,
@@ -76,17 +93,25 @@ def party_detail_form_partial(
     party_id: UUID,
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
-    party = session.get(Party, party_id)
+    key = fragment_cache.key(party_id, request, session)
+    if fragment := fragment_cache.get(key):
+        return fragment_response(request, fragment)
+
+    party = get_party(session, party_id)
 
     if not party:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Party not found"
         )
 
-    return templates.TemplateResponse(
-        request=request,
-        name="party_detail/partial_party_edit.html",
-        context={"party": party},
+    return cache_fragment(
+        request,
+        key,
+        templates.TemplateResponse(
+            request=request,
+            name="party_detail/partial_party_edit.html",
+            context={"party": party},
+        ),
     )
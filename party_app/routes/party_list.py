@@ -1,10 +1,13 @@
-from datetime import date
+import base64
+from datetime import date, time
+from typing import Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, status
 from fastapi.responses import HTMLResponse
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select, tuple_
 
-from party_app.dependency import Templates, get_session
+from party_app.dependency import Templates, get_read_session
 from party_app.models import Party
 
 router = APIRouter(prefix="", tags=["parties"])
@@ -12,25 +15,75 @@ router = APIRouter(prefix="", tags=["parties"])
 _PAGE_SIZE = 6
 
 
+def encode_cursor(party: Party) -> str:
+    """Encode the sort key of a party into an opaque cursor for the next page."""
+    raw = f"{party.party_date.isoformat()}|{party.party_time.isoformat()}|{party.uuid.hex}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date, time, UUID]:
+    """Decode a cursor created by `encode_cursor` back into its sort key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        party_date, party_time, party_uuid = (
+            base64.urlsafe_b64decode(padded).decode().split("|")
+        )
+        return (
+            date.fromisoformat(party_date),
+            time.fromisoformat(party_time),
+            UUID(party_uuid),
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def upcoming_parties_statement(
+    today: date, after: Optional[tuple[date, time, UUID]] = None
+):
+    """Upcoming parties in (party_date, party_time, uuid) order.
+
+    When `after` is given the page starts right after that sort key, so the
+    database seeks straight to it instead of skipping over an offset.
+    """
+    statement = select(Party).where(Party.party_date >= today)
+
+    if after is not None:
+        statement = statement.where(
+            tuple_(Party.party_date, Party.party_time, Party.uuid) > tuple_(*after)
+        )
+
+    # The counters are kept by triggers, parties already in the session would
+    # keep the old ones.
+    return statement.order_by(
+        Party.party_date, Party.party_time, Party.uuid
+    ).execution_options(populate_existing=True)
+
+
 @router.get("/", name="party_list_page", response_class=HTMLResponse)
 def party_list_page(
     request: Request,
     templates: Templates,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None),
 ):
-    today = date.today()
+    statement = upcoming_parties_statement(
+        date.today(), decode_cursor(cursor) if cursor else None
+    )
 
-    num_all_parties = session.exec(
-        select(func.count(Party.uuid)).where(Party.party_date >= today)
-    ).one()
-    offset = (page - 1) * _PAGE_SIZE
+    # Plain page numbers are still accepted for old links, without the COUNT(*).
+    if not cursor:
+        statement = statement.offset((page - 1) * _PAGE_SIZE)
 
-    parties = session.exec(
-        select(Party).where(Party.party_date >= today).offset(offset).limit(_PAGE_SIZE)
-    ).all()
+    # One extra row tells us whether there is a next page.
+    parties = session.exec(statement.limit(_PAGE_SIZE + 1)).all()
+    has_next = len(parties) > _PAGE_SIZE
+    parties = parties[:_PAGE_SIZE]
 
-    next_page = page + 1 if (offset + _PAGE_SIZE) <= num_all_parties else None
+    next_page = page + 1 if has_next else None
+    next_cursor = encode_cursor(parties[-1]) if has_next else None
 
     htmx_request = request.headers.get("HX-Request", None)
 
@@ -42,5 +95,9 @@ def party_list_page(
     return templates.TemplateResponse(
         request=request,
         name=template_name,
-        context={"parties": parties, "next_page": next_page},
+        context={
+            "parties": parties,
+            "next_page": next_page,
+            "next_cursor": next_cursor,
+        },
     )
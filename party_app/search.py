@@ -0,0 +1,142 @@
+"""Substring search over guest names that can use an index.
+
+On Postgres the `pg_trgm` GIN index on `guest.name` serves `ILIKE '%text%'`
+and matches are ranked by trigram similarity. On SQLite an FTS5 table with
+the trigram tokenizer shadows `guest.name`; triggers keep it in sync on
+insert, update and delete, and matches are ranked by bm25.
+
+Trigram indexes need at least three characters, shorter searches fall back
+to a plain `ILIKE` over the guests of the party.
+"""
+
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import DDL, event, literal_column, text
+from sqlalchemy.sql import column, table
+from sqlmodel import Session, func, select
+
+from party_app.models import Guest
+
+_SEARCH_LIMIT = 50
+_MIN_TRIGRAM_LENGTH = 3
+
+# External content FTS5 table: it indexes guest.name by the rowid of the guest
+# row and reads the names back from the guest table itself.
+guest_fts = table("guest_fts", column("rowid"), column("name"), column("rank"))
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS guest_fts USING fts5(
+        name, content='guest', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS guest_fts_after_insert AFTER INSERT ON guest BEGIN
+        INSERT INTO guest_fts (rowid, name) VALUES (new.rowid, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS guest_fts_after_delete AFTER DELETE ON guest BEGIN
+        INSERT INTO guest_fts (guest_fts, rowid, name)
+        VALUES ('delete', old.rowid, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS guest_fts_after_update AFTER UPDATE OF name ON guest
+    BEGIN
+        INSERT INTO guest_fts (guest_fts, rowid, name)
+        VALUES ('delete', old.rowid, old.name);
+        INSERT INTO guest_fts (rowid, name) VALUES (new.rowid, new.name);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_guest_name_trgm "
+    "ON guest USING gin (name gin_trgm_ops)",
+]
+
+for statement in _SQLITE_DDL:
+    event.listen(
+        Guest.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Guest.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS guest_fts").execute_if(dialect="sqlite"),
+)
+for statement in _POSTGRES_DDL:
+    event.listen(
+        Guest.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+
+
+def _like_pattern(search_text: str) -> str:
+    escaped = search_text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _fts_phrase(search_text: str) -> str:
+    # A quoted FTS5 phrase matches the text as a substring with the trigram tokenizer.
+    return '"' + search_text.replace('"', '""') + '"'
+
+
+def search_guests_statement(
+    dialect_name: str,
+    party_id: UUID,
+    search_text: str,
+    attending: Optional[bool] = None,
+    limit: int = _SEARCH_LIMIT,
+):
+    """Guests of a party whose name contains `search_text`, best matches first."""
+    statement = select(Guest).where(Guest.party_id == party_id)
+
+    if attending is not None:
+        statement = statement.where(Guest.attending == attending)
+
+    if len(search_text) < _MIN_TRIGRAM_LENGTH:
+        statement = statement.where(
+            Guest.name.ilike(_like_pattern(search_text), escape="\\")
+        ).order_by(Guest.name)
+    elif dialect_name == "sqlite":
+        statement = (
+            statement.join(
+                guest_fts, guest_fts.c.rowid == literal_column("guest.rowid")
+            )
+            .where(
+                text("guest_fts MATCH :search_phrase").bindparams(
+                    search_phrase=_fts_phrase(search_text)
+                )
+            )
+            .order_by(guest_fts.c.rank, Guest.name)
+        )
+    else:
+        statement = statement.where(
+            Guest.name.ilike(_like_pattern(search_text), escape="\\")
+        ).order_by(func.similarity(Guest.name, search_text).desc(), Guest.name)
+
+    return statement.limit(limit)
+
+
+def search_guests(
+    session: Session,
+    party_id: UUID,
+    search_text: str,
+    attending: Optional[bool] = None,
+    limit: int = _SEARCH_LIMIT,
+) -> list[Guest]:
+    statement = search_guests_statement(
+        session.get_bind().dialect.name, party_id, search_text, attending, limit
+    )
+    return session.exec(statement).all()
+
+
+def rebuild_search_index(session: Session) -> None:
+    """Rebuild the SQLite FTS table, e.g. after a VACUUM renumbered guest rowids."""
+    if session.get_bind().dialect.name == "sqlite":
+        session.exec(text("INSERT INTO guest_fts (guest_fts) VALUES ('rebuild')"))
+        session.commit()
@@ -0,0 +1,83 @@
+"""Warm-up of a new worker before it serves requests, and how long it took.
+
+A fresh worker would otherwise open its first database connection and
+compile every template on the first requests that need them, a latency
+spike after each deploy or scale-up. The lifespan of the app does both
+before the worker accepts requests and records the time spent importing the
+app, connecting and compiling in `startup_report`, which is logged and
+served at `/internal/startup`.
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import jinja2
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupReport:
+    import_seconds: Optional[float] = None
+    engine_seconds: Optional[float] = None
+    templates_seconds: Optional[float] = None
+    templates: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+startup_report = StartupReport()
+
+
+def precompile_templates(env: jinja2.Environment) -> int:
+    """Loads every template of `env` into its cache, returns how many."""
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def warm_up_engine(engine: Engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def warm_up_async_engine(async_engine: AsyncEngine) -> None:
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def warm_up(
+    env: jinja2.Environment,
+    engine: Engine,
+    async_engine: Optional[AsyncEngine] = None,
+    report: StartupReport = startup_report,
+) -> StartupReport:
+    """Connects to the database and compiles the templates, timing both."""
+    started = time.perf_counter()
+    if async_engine is not None:
+        await warm_up_async_engine(async_engine)
+    else:
+        warm_up_engine(engine)
+    report.engine_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    report.templates = precompile_templates(env)
+    report.templates_seconds = time.perf_counter() - started
+
+    logger.info(
+        "Started in %.3fs: imports %.3fs, database connection %.3fs, "
+        "%d templates %.3fs",
+        (report.import_seconds or 0) + report.engine_seconds + report.templates_seconds,
+        report.import_seconds or 0,
+        report.engine_seconds,
+        report.templates,
+        report.templates_seconds,
+    )
+    return report
@@ -0,0 +1,244 @@
+"""Fingerprinted, precompressed static files.
+
+Every file under `party_app/static` is also served under a name with a hash
+of its content, `css/output.css` as `css/output.<hash>.css`, with a
+`Cache-Control` that lets browsers keep it for a year without revalidating:
+a new version of the file gets a new name. Templates link to these names
+with `static_url('css/output.css')`. The plain names are still served, with
+revalidation.
+
+    python -m party_app.static_assets
+
+writes a `.gz` and, when the brotli package is installed, a `.br` next to
+each text file, which the Docker build does after building the CSS. The
+fingerprinted names are served from them to the clients that accept those
+encodings. A variant older than its file is ignored.
+
+The hashes are computed when the app starts. With `check_modified`, outside
+of production, a file is hashed again when it changes, for
+`npm run tailwind:dev`.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import stat
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path, PurePath
+from typing import Optional
+
+import anyio
+import jinja2
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # the .br variants are optional
+    brotli = None
+
+STATIC_DIRECTORY = Path(__file__).resolve().parent / "static"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_HASH_LENGTH = 12
+# File extension of each encoding, by order of preference.
+_ENCODINGS = {"br": ".br", "gzip": ".gz"}
+_COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".map", ".svg", ".txt", ".html"}
+# Smaller files gain nothing from compression.
+_COMPRESS_MIN_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class Asset:
+    # Paths relative to the static directory, with "/" separators.
+    path: str
+    fingerprinted_path: str
+    media_type: str
+    mtime: float
+    # Path of the precompressed variant of each encoding available.
+    encodings: dict[str, str] = field(default_factory=dict)
+
+
+def fingerprint(path: str, content: bytes) -> str:
+    """`path` with a hash of `content` before its extension."""
+    digest = hashlib.sha256(content).hexdigest()[:_HASH_LENGTH]
+    stem, dot, suffix = path.rpartition(".")
+    if not dot or "/" in suffix:
+        return f"{path}.{digest}"
+    return f"{stem}.{digest}.{suffix}"
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Encodings of an Accept-Encoding header, without those with q=0."""
+    encodings = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0 and name.strip():
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class StaticAssets:
+    """The fingerprinted names and precompressed variants of a directory."""
+
+    def __init__(self, directory: Path, check_modified: bool = False):
+        self.directory = Path(directory)
+        self.check_modified = check_modified
+        self._lock = threading.Lock()
+        self._assets: dict[str, Asset] = {}
+        self._by_fingerprint: dict[str, Asset] = {}
+        for file in sorted(self.directory.rglob("*")):
+            if file.is_file() and file.suffix not in (".gz", ".br"):
+                self._load(file.relative_to(self.directory).as_posix())
+
+    def _load(self, path: str) -> Optional[Asset]:
+        file = self.directory / path
+        try:
+            mtime = file.stat().st_mtime
+            content = file.read_bytes()
+        except OSError:
+            return None
+
+        encodings = {}
+        for encoding, suffix in _ENCODINGS.items():
+            variant = self.directory / (path + suffix)
+            try:
+                if variant.stat().st_mtime >= mtime:
+                    encodings[encoding] = path + suffix
+            except OSError:
+                pass
+
+        asset = Asset(
+            path=path,
+            fingerprinted_path=fingerprint(path, content),
+            media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            mtime=mtime,
+            encodings=encodings,
+        )
+        with self._lock:
+            previous = self._assets.get(path)
+            if previous is not None:
+                self._by_fingerprint.pop(previous.fingerprinted_path, None)
+            self._assets[path] = asset
+            self._by_fingerprint[asset.fingerprinted_path] = asset
+        return asset
+
+    def get(self, path: str) -> Optional[Asset]:
+        asset = self._assets.get(path)
+        if self.check_modified:
+            try:
+                modified = (self.directory / path).stat().st_mtime
+            except OSError:
+                return asset
+            if asset is None or modified != asset.mtime:
+                asset = self._load(path)
+        return asset
+
+    def find(self, fingerprinted_path: str) -> Optional[Asset]:
+        """Asset served under `fingerprinted_path`, for its current content only."""
+        asset = self._by_fingerprint.get(fingerprinted_path)
+        if asset is not None and self.check_modified:
+            current = self.get(asset.path)
+            if current is None or current.fingerprinted_path != fingerprinted_path:
+                return None
+        return asset
+
+    def url_path(self, path: str) -> str:
+        """Fingerprinted name of `path`, `path` itself if it isn't a file."""
+        asset = self.get(path)
+        return asset.fingerprinted_path if asset is not None else path
+
+    @jinja2.pass_context
+    def static_url(self, context, path: str):
+        """URL of the fingerprinted static file `path`, for templates."""
+        return context["request"].url_for("static", path=self.url_path(path))
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """Serves the fingerprinted names of `assets` with an immutable cache.
+
+    Other paths are served as by `StaticFiles`.
+    """
+
+    def __init__(self, assets: StaticAssets):
+        super().__init__(directory=assets.directory)
+        self.assets = assets
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.assets.find(PurePath(path).as_posix())
+        if asset is None:
+            return await super().get_response(path, scope)
+
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        encoding = next((e for e in asset.encodings if e in accepted), None)
+
+        full_path, stat_result = await anyio.to_thread.run_sync(
+            self.lookup_path, asset.encodings[encoding] if encoding else asset.path
+        )
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if asset.encodings:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+
+        response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            media_type=asset.media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def compress(directory: Path = STATIC_DIRECTORY) -> list[Path]:
+    """Writes the .gz and .br variants of the text files, returns them."""
+    written = []
+    for file in sorted(Path(directory).rglob("*")):
+        if not file.is_file() or file.suffix not in _COMPRESSIBLE_SUFFIXES:
+            continue
+        content = file.read_bytes()
+        if len(content) < _COMPRESS_MIN_SIZE:
+            continue
+
+        variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(content, quality=11)
+        for suffix, compressed in variants.items():
+            variant = file.with_name(file.name + suffix)
+            if len(compressed) < len(content):
+                variant.write_bytes(compressed)
+                written.append(variant)
+            elif variant.exists():
+                variant.unlink()
+    return written
+
+
+if __name__ == "__main__":
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else STATIC_DIRECTORY
+    for variant in compress(directory):
+        print(variant)
+    if brotli is None:
+        print("brotli is not installed, only the gzip variants were written")
@@ -0,0 +1,119 @@
+"""Template responses that are sent while they render.
+
+`TemplateResponse` renders the whole page into one string before the first
+byte goes out. `StreamingTemplateResponse` renders with Jinja's `generate()`
+and sends the output in chunks of about `_CHUNK_SIZE` characters, and
+`LazyResult` feeds the template loops from a `yield_per` cursor, so the rows
+of a list are fetched while the page above them is already on its way and
+only one batch of them is in memory at a time.
+"""
+
+from typing import Callable, Iterator, Optional
+
+from fastapi import Request
+from fastapi.templating import Jinja2Templates
+from sqlmodel import Session
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+_CHUNK_SIZE = 16 * 1024
+_YIELD_PER = 500
+
+
+class LazyResult:
+    """Rows of `statement`, fetched in batches of `yield_per` as they're iterated.
+
+    Every iteration runs the statement again on a session of its own: the
+    response streams after the request's session has been closed, and the
+    connection goes back to the pool as soon as the rows are consumed.
+    """
+
+    def __init__(self, session: Session, statement, yield_per: int = _YIELD_PER):
+        self.bind = session.get_bind()
+        self.statement = statement.execution_options(yield_per=yield_per)
+
+    def __iter__(self) -> Iterator:
+        with Session(self.bind) as session:
+            yield from session.exec(self.statement)
+
+
+class StreamingTemplateResponse(StreamingResponse):
+    """Renders `name` with `context` chunk by chunk while it's being sent.
+
+    `on_rendered` is called with the whole body once it has been sent, unless
+    the body grew past `max_rendered_size` bytes.
+    """
+
+    media_type = "text/html"
+
+    def __init__(
+        self,
+        templates: Jinja2Templates,
+        request: Request,
+        name: str,
+        context: dict,
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        background: Optional[BackgroundTask] = None,
+        on_rendered: Optional[Callable[[bytes], None]] = None,
+        max_rendered_size: int = 0,
+    ):
+        context.setdefault("request", request)
+        for context_processor in templates.context_processors:
+            context.update(context_processor(request))
+
+        self.template = templates.get_template(name)
+        self.context = context
+        self.on_rendered = on_rendered
+        self.max_rendered_size = max_rendered_size
+
+        super().__init__(
+            self._render(),
+            status_code=status_code,
+            headers=headers,
+            background=background,
+        )
+
+    def _render(self) -> Iterator[bytes]:
+        rendered = [] if self.on_rendered else None
+        rendered_size = 0
+        buffer = []
+        buffer_size = 0
+
+        for text in self.template.generate(self.context):
+            buffer.append(text)
+            buffer_size += len(text)
+            if buffer_size < _CHUNK_SIZE:
+                continue
+
+            chunk = "".join(buffer).encode(self.charset)
+            buffer, buffer_size = [], 0
+            if rendered is not None:
+                rendered.append(chunk)
+                rendered_size += len(chunk)
+                if rendered_size > self.max_rendered_size:
+                    rendered = None
+            yield chunk
+
+        chunk = "".join(buffer).encode(self.charset)
+        if chunk:
+            yield chunk
+
+        if (
+            rendered is not None
+            and rendered_size + len(chunk) <= self.max_rendered_size
+        ):
+            self.on_rendered(b"".join(rendered) + chunk)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Same debug message as TemplateResponse, the test client reads the
+        # template and its context from it.
+        if "http.response.debug" in scope.get("extensions", {}):
+            await send(
+                {
+                    "type": "http.response.debug",
+                    "info": {"template": self.template, "context": self.context},
+                }
+            )
+        await super().__call__(scope, receive, send)
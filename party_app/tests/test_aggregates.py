@@ -0,0 +1,39 @@
+from decimal import Decimal
+from typing import Callable
+from uuid import uuid4
+
+from sqlmodel import Session
+
+from party_app.aggregates import PartySummary, party_summaries, party_summary
+from party_app.models import Gift, Guest, Party
+
+
+def test_party_summaries_count_guests_and_gifts_per_party(
+    session: Session,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    create_guest(session=session, party=party, attending=True)
+    create_guest(session=session, party=party, attending=True)
+    create_guest(session=session, party=party, attending=False)
+    create_gift(session=session, party=party, price=Decimal("12.50"))
+    create_gift(session=session, party=party, price=Decimal("0.25"))
+
+    empty_party = create_party(session=session)
+
+    summaries = party_summaries(session, [party.uuid, empty_party.uuid])
+
+    assert summaries[party.uuid] == PartySummary(
+        guest_count=3,
+        attending_count=2,
+        not_attending_count=1,
+        gift_count=2,
+        gift_total=Decimal("12.75"),
+    )
+    assert summaries[empty_party.uuid] == PartySummary()
+
+
+def test_party_summary_of_unknown_party_is_empty(session: Session):
+    assert party_summary(session, uuid4()) == PartySummary()
@@ -0,0 +1,202 @@
+import threading
+from decimal import Decimal
+from typing import Callable
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from party_app import guest_import
+from party_app.dependency import get_async_read_session, get_async_session
+from party_app.main import create_app
+from party_app.models import Gift, Guest, Party
+
+async_app = create_app(database_async=True)
+
+
+# The sync session prepares and checks the data, the app reads and writes the
+# same SQLite file through aiosqlite.
+@pytest.fixture(name="session")
+def session_fixture(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'database.db'}")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    # Every TestClient request runs on its own event loop, so connections
+    # can't be pooled between requests.
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{session.get_bind().url.database}", poolclass=NullPool
+    )
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    async_app.dependency_overrides[get_async_session] = get_async_session_override
+    async_app.dependency_overrides[get_async_read_session] = get_async_session_override
+
+    client = TestClient(async_app)
+    yield client
+    async_app.dependency_overrides.clear()
+
+
+def test_party_list_page_returns_first_page_and_cursor(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    for i in range(7):
+        create_party(session=session, venue=f"Venue {i + 1}")
+
+    url = async_app.url_path_for("party_list_page")
+
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.context["parties"]) == 6
+
+    response = client.get(url, params={"cursor": response.context["next_cursor"]})
+    assert len(response.context["parties"]) == 1
+
+
+def test_party_detail_save_form_partial_updates_party(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+
+    url = async_app.url_path_for("party_detail_save_form_partial", party_id=party.uuid)
+    updated_data = {
+        "party_date": "2030-01-01",
+        "party_time": "00:00",
+        "invitation": "Updated invitation",
+        "venue": "Updated Venue",
+    }
+    response = client.put(url, data=updated_data)
+
+    session.refresh(party)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.context["party"].venue == "Updated Venue"
+    assert party.venue == "Updated Venue"
+    assert party.invitation == "Updated invitation"
+
+
+def test_create_party_redirects_to_party_detail(session: Session, client: TestClient):
+    url = async_app.url_path_for("new_party_create_page")
+    data = {
+        "party_date": "2030-06-06",
+        "party_time": "18:00:00",
+        "venue": "My venue",
+        "invitation": "Come to my party!",
+    }
+
+    response = client.post(url, data=data, follow_redirects=False)
+
+    party = session.exec(select(Party)).one()
+    assert response.status_code == status.HTTP_302_FOUND
+    assert response.headers["location"].endswith(
+        async_app.url_path_for("party_detail_page", party_id=party.uuid)
+    )
+
+
+def test_gift_create_update_and_remove(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+
+    url = async_app.url_path_for("gift_create_save_partial", party_id=party.uuid)
+    data = {"gift_name": "Roses", "price": "10", "link": "https://roses.com"}
+    response = client.post(url, data=data)
+
+    assert response.status_code == status.HTTP_200_OK
+    gift = session.exec(select(Gift)).one()
+    assert gift.price == Decimal("10")
+
+    url = async_app.url_path_for(
+        "gift_update_save_partial", party_id=party.uuid, gift_id=gift.uuid
+    )
+    response = client.put(url, data={**data, "price": "12.50"})
+
+    session.refresh(gift)
+    assert response.status_code == status.HTTP_200_OK
+    assert gift.price == Decimal("12.50")
+
+    url = async_app.url_path_for(
+        "gift_remove_partial", party_id=party.uuid, gift_id=gift.uuid
+    )
+    response = client.delete(url)
+
+    session.expire_all()
+    assert response.status_code == status.HTTP_200_OK
+    assert session.exec(select(Gift)).all() == []
+
+
+def test_mark_guests_attending_and_filter(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    anna = create_guest(session=session, party=party, name="Anna", attending=False)
+    create_guest(session=session, party=party, name="Catherine", attending=False)
+
+    url = async_app.url_path_for("mark_guests_attending_partial", party_id=party.uuid)
+    response = client.put(url, data={"guest_ids": [anna.uuid]})
+
+    session.refresh(anna)
+    assert response.status_code == status.HTTP_200_OK
+    assert anna.attending is True
+
+    url = async_app.url_path_for("filter_guests_partial", party_id=party.uuid)
+    data = {"guest_search": "ann", "attending_filter": "attending"}
+    response = client.post(url, data=data)
+
+    assert [guest.name for guest in response.context["guests"]] == ["Anna"]
+
+
+def test_import_guests(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+
+    url = async_app.url_path_for("import_guests_partial", party_id=party.uuid)
+    csv_file = "name,attending\nAnna,true\nCatherine,false\n"
+    response = client.post(url, files={"guest_file": ("guests.csv", csv_file)})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.context["guest_import"].imported == 2
+    assert [guest.name for guest in response.context["guests"]] == ["Anna", "Catherine"]
+
+
+def test_import_guests_validates_off_the_event_loop(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    party = create_party(session=session)
+    threads = {}
+
+    def record_thread(name, function):
+        def wrapper(*args, **kwargs):
+            threads[name] = threading.current_thread()
+            return function(*args, **kwargs)
+
+        monkeypatch.setattr(guest_import, name, wrapper)
+
+    record_thread("guest_row", guest_import.guest_row)
+    record_thread("insert_rows", guest_import.insert_rows)
+
+    url = async_app.url_path_for("import_guests_partial", party_id=party.uuid)
+    response = client.post(url, data={"guest_text": "Anna\nCatherine"})
+
+    assert response.context["guest_import"].imported == 2
+    # The inserts run on the loop's thread through the session.
+    assert threads["guest_row"] is not threads["insert_rows"]
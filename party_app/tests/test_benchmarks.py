@@ -0,0 +1,65 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from benchmarks.compare import compare
+from benchmarks.generate import START_DATE, DataSet, generate
+from benchmarks.run import percentile
+from benchmarks.sqlite_writes import run as run_sqlite_writes
+
+
+def test_generate_is_deterministic_and_skewed():
+    data_set = DataSet(parties=20, mega_parties=1, mega_guests=500)
+
+    records = list(generate(data_set))
+
+    assert records == list(generate(data_set))
+    assert records != list(generate(DataSet(**{**data_set.__dict__, "seed": 7})))
+
+    guests_per_party = Counter(
+        record["party_id"] for table, record in records if table == "guest"
+    )
+    parties = [record["uuid"] for table, record in records if table == "party"]
+    assert len(parties) == 20
+    assert guests_per_party[parties[0]] == 500
+    assert max(guests_per_party[party] for party in parties[1:]) < 500
+
+
+def test_generate_defaults_do_not_depend_on_the_day():
+    party_dates = [
+        date.fromisoformat(record["party_date"])
+        for table, record in generate(DataSet())
+        if table == "party"
+    ]
+
+    assert len(party_dates) == DataSet().parties
+    assert min(party_dates) >= START_DATE - timedelta(days=30)
+    assert max(party_dates) <= START_DATE + timedelta(days=365)
+
+
+def test_percentile_uses_nearest_rank():
+    latencies = [float(value) for value in range(1, 101)]
+
+    assert percentile(latencies, 0.50) == 50.0
+    assert percentile(latencies, 0.99) == 99.0
+    assert percentile([], 0.95) == 0.0
+
+
+def test_compare_flags_p95_regressions():
+    result = {"p50_ms": 10, "p95_ms": 20, "p99_ms": 30, "requests_per_second": 100}
+    before = {"routes": {"guest_list_page": result}}
+
+    _, regressed = compare(before, before, threshold=10)
+    assert not regressed
+
+    after = {"routes": {"guest_list_page": {**result, "p95_ms": 25}}}
+    _, regressed = compare(before, after, threshold=10)
+    assert regressed
+
+
+def test_sqlite_writes_runs_both_profiles(tmp_path):
+    results = run_sqlite_writes(tmp_path, writers=2, readers=1, writes=5)
+
+    assert set(results) == {"default", "tuned"}
+    for result in results.values():
+        assert result["writes"] + result["errors"] == 10
+        assert result["writes_per_second"] > 0
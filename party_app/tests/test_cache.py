@@ -0,0 +1,93 @@
+from typing import Callable
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from party_app.cache import LRUCache, PartyCache, get_party, party_cache
+from party_app.main import app
+from party_app.models import Party
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache(max_entries=2, ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 59
+    assert cache.get("a") == 1
+
+    clock.now = 60
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_party_cache_serves_snapshot_until_party_is_written(
+    session: Session, create_party: Callable[..., Party], capture_statements
+):
+    party = create_party(session=session, venue="Old Venue")
+
+    snapshot = get_party(session, party.uuid)
+    session.expunge_all()
+
+    with capture_statements(session.get_bind()) as statements:
+        assert get_party(session, party.uuid) is snapshot
+    assert statements == []
+
+    party = session.get(Party, party.uuid)
+    party.venue = "New Venue"
+    session.add(party)
+    session.commit()
+
+    assert get_party(session, party.uuid).venue == "New Venue"
+    assert party_cache.stats()["hits"] == 1
+    assert party_cache.stats()["misses"] == 2
+
+
+def test_party_cache_loads_from_session_when_disabled(
+    session: Session, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    cache = PartyCache(max_entries=10, ttl=60, enabled=False)
+
+    assert cache.get(session, party.uuid) is party
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_status_reports_party_cache_hits(
+    session: Session,
+    client: TestClient,
+    admin_headers: dict,
+    create_party: Callable[..., Party],
+):
+    party = create_party(session=session)
+
+    url = app.url_path_for("partial_party_detail_edit", party_id=party.uuid)
+    client.get(url)
+    client.get(url, params={"page": 2})
+
+    response = client.get(app.url_path_for("cache_status"), headers=admin_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["party"]["hits"] == 1
+    assert response.json()["party"]["misses"] == 1
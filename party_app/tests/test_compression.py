@@ -0,0 +1,138 @@
+import zlib
+from typing import Callable
+
+import pytest
+from fastapi import FastAPI, Response, status
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from party_app.compression import CompressionMiddleware, Compressor
+from party_app.main import app
+from party_app.metrics import RESPONSE_COMPRESSION_RATIO, registry
+from party_app.models import Guest, Party
+from party_app.static_assets import brotli
+
+ROW = '<tr class="border-b border-gray-200 hover:bg-gray-100"><td>Anna</td></tr>\n'
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    registry.clear()
+
+
+@pytest.fixture(name="compressed_client")
+def compressed_client_fixture():
+    test_app = FastAPI()
+
+    @test_app.get("/page", response_class=HTMLResponse)
+    def page(rows: int = 100):
+        return ROW * rows
+
+    @test_app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (ROW.encode() * 50 for _ in range(3)), media_type="text/html"
+        )
+
+    @test_app.get("/image")
+    def image():
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    @test_app.get("/encoded")
+    def encoded():
+        body = zlib.compress(ROW.encode() * 100)
+        return Response(
+            body, media_type="text/html", headers={"Content-Encoding": "deflate"}
+        )
+
+    @test_app.get("/empty")
+    def empty():
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    test_app.add_middleware(CompressionMiddleware)
+    return TestClient(test_app)
+
+
+def test_compresses_html_with_gzip(compressed_client: TestClient):
+    response = compressed_client.get("/page", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(ROW * 100) / 10
+    assert response.text == ROW * 100
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_prefers_brotli(compressed_client: TestClient):
+    response = compressed_client.get("/page", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == ROW * 100
+
+
+@pytest.mark.parametrize(
+    "url, accept_encoding",
+    [
+        ("/page?rows=1", "gzip"),
+        ("/page", "identity"),
+        ("/image", "gzip"),
+        ("/encoded", "gzip"),
+        ("/empty", "gzip"),
+    ],
+)
+def test_leaves_other_responses_alone(
+    compressed_client: TestClient, url, accept_encoding
+):
+    response = compressed_client.get(url, headers={"Accept-Encoding": accept_encoding})
+
+    assert response.headers.get("content-encoding") in (None, "deflate")
+    assert "gzip" not in response.headers.get("content-encoding", "")
+
+
+def test_compresses_streamed_responses(compressed_client: TestClient):
+    response = compressed_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == ROW.encode() * 150
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_compressed_chunks_decode_as_they_arrive(encoding):
+    if encoding == "br" and brotli is None:
+        pytest.skip("brotli is not installed")
+    compressor = Compressor(encoding)
+    if encoding == "br":
+        decompress = brotli.Decompressor().process
+    else:
+        decompress = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+
+    # Each chunk is flushed, so it decompresses without waiting for the next.
+    assert decompress(compressor.compress(b"first " * 100, last=False)) == (
+        b"first " * 100
+    )
+    assert decompress(compressor.compress(b"last", last=True)) == b"last"
+    assert compressor.size_in == 604
+
+
+def test_pages_are_compressed_and_measured(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    for i in range(50):
+        session.add(Guest(name=f"Guest {i}", party=party))
+    session.commit()
+
+    response = client.get(
+        app.url_path_for("guest_list_page", party_id=party.uuid),
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Guest 49" in response.text
+    assert RESPONSE_COMPRESSION_RATIO.render().count(
+        'route="guest_list_page",encoding="gzip"'
+    )
+    assert "http_response_compression_cpu_seconds_total" in registry.render()
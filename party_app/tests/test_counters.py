@@ -0,0 +1,118 @@
+from decimal import Decimal
+from typing import Callable
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, text
+
+from party_app.counters import CounterDrift, reconcile_counters
+from party_app.main import app
+from party_app.models import Gift, Guest, Party
+from party_app.routes.guest_list import set_attendance
+
+
+def counters(session: Session, party: Party) -> tuple:
+    session.refresh(party)
+    return (
+        party.guest_count,
+        party.attending_count,
+        party.gift_count,
+        party.gift_total,
+    )
+
+
+def test_guest_writes_update_the_party_counters(
+    session: Session,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    other_party = create_party(session=session)
+    assert counters(session, party) == (0, 0, 0, Decimal("0"))
+
+    attending = create_guest(session=session, party=party, attending=True)
+    not_attending = create_guest(session=session, party=party, attending=False)
+    assert counters(session, party)[:2] == (2, 1)
+
+    set_attendance(session, party.uuid, [not_attending.uuid], True)
+    session.commit()
+    assert counters(session, party)[:2] == (2, 2)
+
+    attending.party_id = other_party.uuid
+    session.add(attending)
+    session.commit()
+    assert counters(session, party)[:2] == (1, 1)
+    assert counters(session, other_party)[:2] == (1, 1)
+
+    session.delete(not_attending)
+    session.commit()
+    assert counters(session, party)[:2] == (0, 0)
+
+
+def test_gift_writes_update_the_party_counters(
+    session: Session,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=session)
+
+    gift = create_gift(session=session, party=party, price=Decimal("12.50"))
+    create_gift(session=session, party=party, price=Decimal("0.25"))
+    assert counters(session, party)[2:] == (2, Decimal("12.75"))
+
+    gift.price = Decimal("2.50")
+    session.add(gift)
+    session.commit()
+    assert counters(session, party)[2:] == (2, Decimal("2.75"))
+
+    session.delete(gift)
+    session.commit()
+    assert counters(session, party)[2:] == (1, Decimal("0.25"))
+
+
+def test_reconcile_counters_finds_and_repairs_drift(
+    session: Session,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    create_party(session=session)
+    create_guest(session=session, party=party, attending=True)
+
+    session.exec(
+        text("UPDATE party SET guest_count = 99 WHERE uuid = :uuid"),
+        params={"uuid": party.uuid.hex},
+    )
+    session.commit()
+
+    assert reconcile_counters(session) == [
+        CounterDrift(
+            party_id=party.uuid,
+            stored=(99, 1, 0, Decimal("0")),
+            actual=(1, 1, 0, Decimal("0")),
+        )
+    ]
+    assert counters(session, party)[0] == 99
+
+    reconcile_counters(session, repair=True)
+    session.commit()
+
+    assert counters(session, party)[0] == 1
+    assert reconcile_counters(session) == []
+
+
+def test_party_list_shows_the_party_counters(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=session)
+    create_guest(session=session, party=party, attending=True)
+    create_guest(session=session, party=party, attending=False)
+    create_gift(session=session, party=party, price=Decimal("19.75"))
+
+    response = client.get(app.url_path_for("party_list_page"))
+
+    assert "2 guests, 1 attending" in response.text
+    assert "1 gifts (19.75)" in response.text
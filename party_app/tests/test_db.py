@@ -0,0 +1,49 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import exc, text
+from sqlmodel import Session, SQLModel
+
+import db
+from party_app.models import Guest
+
+
+@pytest.fixture(name="file_engine")
+def file_engine_fixture(tmp_path):
+    engine = db.create_database_engine(f"sqlite:///{tmp_path / 'party.db'}", "test")
+    yield engine
+    engine.dispose()
+    db.pools.pop("test")
+
+
+def pragma(engine, name: str):
+    with engine.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_connections_are_tuned(file_engine):
+    assert pragma(file_engine, "journal_mode") == "wal"
+    # 1 is NORMAL.
+    assert pragma(file_engine, "synchronous") == 1
+    assert pragma(file_engine, "busy_timeout") == db.SQLITE_BUSY_TIMEOUT
+    assert pragma(file_engine, "cache_size") == db.SQLITE_CACHE_SIZE
+    assert pragma(file_engine, "mmap_size") == db.SQLITE_MMAP_SIZE
+    assert pragma(file_engine, "foreign_keys") == 1
+
+
+def test_sqlite_foreign_keys_are_enforced(file_engine):
+    SQLModel.metadata.create_all(file_engine)
+
+    with Session(file_engine) as session:
+        session.add(Guest(name="Anna Boleyn", party_id=uuid4()))
+        with pytest.raises(exc.IntegrityError):
+            session.commit()
+
+
+def test_sqlite_pragmas_by_database():
+    assert db.sqlite_pragmas("postgresql+psycopg://localhost/party") == {}
+    assert db.sqlite_pragmas("sqlite:///party.db", tuned=False) == {
+        "foreign_keys": "ON"
+    }
+    assert "journal_mode" not in db.sqlite_pragmas("sqlite://")
+    assert db.sqlite_pragmas("sqlite:///party.db")["journal_mode"] == "WAL"
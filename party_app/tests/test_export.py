@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import Callable
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from party_app import dependency, export
+from party_app.main import app
+from party_app.models import Gift, Guest, Party
+
+
+def test_export_party_guests_streams_csv_sorted_by_name(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # Several chunks for a handful of rows.
+    monkeypatch.setattr(export, "_CHUNK_SIZE", 10)
+    party = create_party(session=session)
+    other_party = create_party(session=session)
+    for name in ("Maria Tudor", "Anna Boleyn", "Jane Seymour"):
+        create_guest(session=session, party=party, name=name)
+    create_guest(session=session, party=other_party, name="Catherine Parr")
+
+    url = app.url_path_for("export_party_guests", party_id=party.uuid)
+    response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert (
+        f'filename="guests-{party.uuid}.csv"' in response.headers["content-disposition"]
+    )
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == [
+        "Anna Boleyn",
+        "Jane Seymour",
+        "Maria Tudor",
+    ]
+    assert {row["party_id"] for row in rows} == {str(party.uuid)}
+
+
+def test_export_party_gifts_streams_ndjson(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=session)
+    gift = create_gift(session=session, party=party, price=Decimal("19.75"))
+
+    url = app.url_path_for("export_party_gifts", party_id=party.uuid)
+    response = client.get(url, params={"format": "ndjson"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {
+            "uuid": str(gift.uuid),
+            "party_id": str(party.uuid),
+            "gift_name": gift.gift_name,
+            "price": "19.75",
+            "link": gift.link,
+        }
+    ]
+
+
+def test_export_of_unknown_party_returns_404(client: TestClient):
+    url = app.url_path_for(
+        "export_party_guests", party_id="00000000-0000-0000-0000-000000000000"
+    )
+
+    assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_export_of_every_party_requires_the_admin_token(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    create_guest(session=session, party=create_party(session=session))
+    create_guest(session=session, party=create_party(session=session))
+    url = app.url_path_for("export_guests")
+
+    # Disabled without ADMIN_TOKEN.
+    assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    monkeypatch.setattr(dependency, "ADMIN_TOKEN", "secret")
+    assert (
+        client.get(url, headers={"X-Admin-Token": "wrong"}).status_code
+        == status.HTTP_403_FORBIDDEN
+    )
+
+    response = client.get(url, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(list(csv.DictReader(io.StringIO(response.text)))) == 2
@@ -1,5 +1,6 @@
 from decimal import Decimal
 from typing import Callable
+from uuid import uuid4
 
 from fastapi import status
 from fastapi.testclient import TestClient
@@ -26,7 +27,11 @@ def test_gift_registry_page_lists_gifts_for_party_by_id(
     response = client.get(url)
 
     assert response.status_code == status.HTTP_200_OK
-    assert response.context["gifts"] == [gift_1, gift_2]
+    # The gifts are streamed from a session of their own.
+    assert [gift.uuid for gift in response.context["gifts"]] == [
+        gift_1.uuid,
+        gift_2.uuid,
+    ]
     assert response.context["party"] == party
 
 
@@ -160,3 +165,96 @@ def test_new_gift_save_partial_saves_gift_and_returns_its_details_including_part
     assert response.status_code == status.HTTP_200_OK
     assert response.context["gift"] == saved_gift
     assert response.context["party"] == party
+
+
+def test_new_gift_save_partial_invalidates_cached_gift_registry_page(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+):
+    party = create_party(session=session)
+
+    url = app.url_path_for("gift_registry_page", party_id=party.uuid)
+    # The streamed first response caches the page, the next one has its ETag.
+    client.get(url)
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == (
+        status.HTTP_304_NOT_MODIFIED
+    )
+
+    create_url = app.url_path_for("gift_create_save_partial", party_id=party.uuid)
+    data = {"gift_name": "Roses", "price": "10", "link": "https://roses.com"}
+    client.post(create_url, data=data)
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "Roses" in response.text
+
+
+def test_gift_registry_page_summarizes_gifts(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=session)
+    create_gift(session=session, party=party, price=Decimal("12.50"))
+    create_gift(session=session, party=party, price=Decimal("7.25"))
+
+    url = app.url_path_for("gift_registry_page", party_id=party.uuid)
+    response = client.get(url)
+
+    summary = response.context["summary"]
+    assert summary.gift_count == 2
+    assert summary.gift_total == Decimal("19.75")
+    assert "2 gifts, 19.75 in total" in response.text
+
+
+def test_new_gift_save_partial_updates_gift_summary_out_of_band(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=session)
+    create_gift(session=session, party=party, price=Decimal("12.50"))
+
+    url = app.url_path_for("gift_create_save_partial", party_id=party.uuid)
+    data = {"gift_name": "Roses", "price": "10", "link": "https://roses.com"}
+    response = client.post(url, data=data)
+
+    assert response.context["updated_summary"].gift_total == Decimal("22.50")
+    assert 'id="gift-summary"' in response.text
+    assert 'hx-swap-oob="true"' in response.text
+
+
+def test_gift_update_save_partial_updates_gift_summary_from_the_counters(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=session)
+    gift = create_gift(session=session, party=party, price=Decimal("12.50"))
+    create_gift(session=session, party=party, price=Decimal("7.25"))
+
+    url = app.url_path_for(
+        "gift_update_save_partial", party_id=party.uuid, gift_id=gift.uuid
+    )
+    data = {"gift_name": "Roses", "price": "20", "link": ""}
+    response = client.put(url, data=data)
+
+    summary = response.context["updated_summary"]
+    assert (summary.gift_count, summary.gift_total) == (2, Decimal("27.25"))
+
+
+def test_new_gift_save_partial_returns_404_for_unknown_party(
+    session: Session, client: TestClient
+):
+    url = app.url_path_for("gift_create_save_partial", party_id=uuid4())
+    data = {"gift_name": "Roses", "price": "10", "link": ""}
+    response = client.post(url, data=data)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert session.exec(select(Gift)).all() == []
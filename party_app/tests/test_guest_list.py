@@ -1,4 +1,5 @@
 from typing import Callable
+from uuid import uuid4
 
 import pytest
 
@@ -6,8 +7,10 @@ from fastapi import status
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
+from party_app import guest_import, search
 from party_app.main import app
 from party_app.models import Guest, Party
+from party_app.routes import guest_list
 
 
 # Test for the guest list page of a party
@@ -28,7 +31,11 @@ def test_guest_list_page_lists_guests_for_party_by_id(
     response = client.get(url)
 
     assert response.status_code == status.HTTP_200_OK
-    assert list(response.context["guests"]) == [guest_1, guest_2]
+    assert [guest.uuid for guest in response.context["guests"]] == [
+        guest_1.uuid,
+        guest_2.uuid,
+    ]
+    assert response.context["summary"].guest_count == 2
     assert response.context["party_id"] == party.uuid
 
 
@@ -57,7 +64,10 @@ def test_mark_guests_attending_updates_guests_returns_whole_list(
     assert guest_2.attending is False
 
     assert response.status_code == status.HTTP_200_OK
-    assert response.context["guests"] == [guest_1, guest_2]
+    # Both guests have the same name, the list is sorted by name and then uuid.
+    assert response.context["guests"] == sorted(
+        [guest_1, guest_2], key=lambda guest: guest.uuid
+    )
     assert response.context["party_id"] == party.uuid
 
 
@@ -86,10 +96,104 @@ def test_mark_guests_not_attending_updates_guests_returns_whole_list(
     assert guest_2.attending is True
 
     assert response.status_code == status.HTTP_200_OK
-    assert response.context["guests"] == [guest_1, guest_2]
+    assert response.context["guests"] == sorted(
+        [guest_1, guest_2], key=lambda guest: guest.uuid
+    )
     assert response.context["party_id"] == party.uuid
 
 
+def test_mark_guests_attending_only_updates_guests_of_the_party(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    another_party = create_party(session=session, venue="Another Venue")
+    guest = create_guest(session=session, party=party, attending=False)
+    other_guest = create_guest(session=session, party=another_party, attending=False)
+
+    url = app.url_path_for("mark_guests_attending_partial", party_id=party.uuid)
+
+    response = client.put(url, data={"guest_ids": [guest.uuid, other_guest.uuid]})
+
+    session.refresh(guest)
+    session.refresh(other_guest)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert guest.attending is True
+    assert other_guest.attending is False
+
+
+def test_mark_guests_attending_updates_guests_in_chunks(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(guest_list, "_UPDATE_CHUNK_SIZE", 2)
+
+    party = create_party(session=session)
+    guests = [
+        create_guest(session=session, party=party, attending=False) for _ in range(5)
+    ]
+
+    url = app.url_path_for("mark_guests_attending_partial", party_id=party.uuid)
+
+    response = client.put(url, data={"guest_ids": [guest.uuid for guest in guests]})
+
+    assert response.status_code == status.HTTP_200_OK
+    for guest in guests:
+        session.refresh(guest)
+        assert guest.attending is True
+
+
+def test_mark_guests_attending_changed_mode_returns_only_changed_rows(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    anna = create_guest(session=session, party=party, attending=False)
+    catherine = create_guest(session=session, party=party, attending=True)
+    create_guest(session=session, party=party, attending=False)
+
+    url = app.url_path_for("mark_guests_attending_partial", party_id=party.uuid)
+    data = {"guest_ids": [anna.uuid, catherine.uuid], "response_mode": "changed"}
+
+    response = client.put(url, data=data)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["HX-Reswap"] == "none"
+    assert [guest.uuid for guest in response.context["guests"]] == [anna.uuid]
+    assert response.context["attending_num"] == 2
+    assert f'id="guest-{anna.uuid}" hx-swap-oob="true"' in response.text
+    assert f'id="guest-{catherine.uuid}"' not in response.text
+    assert '<span id="attending-num" hx-swap-oob="true">2</span>' in response.text
+
+
+def test_mark_guests_not_attending_changed_mode_returns_only_changed_rows(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    anna = create_guest(session=session, party=party, attending=True)
+    catherine = create_guest(session=session, party=party, attending=False)
+
+    url = app.url_path_for("mark_guests_not_attending_partial", party_id=party.uuid)
+    data = {"guest_ids": [anna.uuid, catherine.uuid], "response_mode": "changed"}
+
+    response = client.put(url, data=data)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [guest.attending for guest in response.context["guests"]] == [False]
+    assert response.context["attending_num"] == 0
+
+
 def test_search_guests(
     session: Session,
     client: TestClient,
@@ -189,3 +293,282 @@ def test_filter_guest_by_status_and_search(
 
     assert response.status_code == status.HTTP_200_OK
     assert len(response.context["guests"]) == expected_number_of_filtered_guests
+
+
+def test_search_guests_matches_substrings_in_any_case(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    create_guest(session=session, party=party, name="Anne Boleyn")
+    create_guest(session=session, party=party, name="Joanne Seymour")
+    create_guest(session=session, party=party, name="Catherine Howard")
+
+    url = app.url_path_for("filter_guests_partial", party_id=party.uuid)
+    data = {"guest_search": "ANNE", "attending_filter": "all"}
+
+    response = client.post(url, data=data)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(guest.name for guest in response.context["guests"]) == [
+        "Anne Boleyn",
+        "Joanne Seymour",
+    ]
+
+
+def test_search_guests_finds_renamed_guests(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    guest = create_guest(session=session, party=party, name="Catherine Parr")
+
+    guest.name = "Jane Seymour"
+    session.add(guest)
+    session.commit()
+
+    url = app.url_path_for("filter_guests_partial", party_id=party.uuid)
+
+    response = client.post(
+        url, data={"guest_search": "seym", "attending_filter": "all"}
+    )
+    assert [guest.name for guest in response.context["guests"]] == ["Jane Seymour"]
+
+    response = client.post(
+        url, data={"guest_search": "parr", "attending_filter": "all"}
+    )
+    assert response.context["guests"] == []
+
+
+def test_guest_list_page_returns_first_page_sorted_by_name(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(guest_list, "_GUEST_PAGE_SIZE", 2)
+
+    party = create_party(session=session)
+    for name in ["Catherine", "Anne", "Jane"]:
+        create_guest(session=session, party=party, name=name)
+
+    url = app.url_path_for("guest_list_page", party_id=party.uuid)
+    response = client.get(url)
+
+    assert [guest.name for guest in response.context["guests"]] == ["Anne", "Catherine"]
+    assert response.context["summary"].guest_count == 3
+    assert response.context["next_cursor"] is not None
+    assert 'hx-trigger="revealed"' in response.text
+
+    url = app.url_path_for("guest_rows_partial", party_id=party.uuid)
+    response = client.get(url, params={"cursor": response.context["next_cursor"]})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [guest.name for guest in response.context["guests"]] == ["Jane"]
+    assert response.context["next_cursor"] is None
+    assert 'hx-trigger="revealed"' not in response.text
+
+
+def test_guest_rows_partial_keeps_the_attending_filter(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(guest_list, "_GUEST_PAGE_SIZE", 1)
+
+    party = create_party(session=session)
+    create_guest(session=session, party=party, name="Anne", attending=True)
+    create_guest(session=session, party=party, name="Catherine", attending=False)
+    create_guest(session=session, party=party, name="Jane", attending=True)
+
+    url = app.url_path_for("filter_guests_partial", party_id=party.uuid)
+    data = {"guest_search": "", "attending_filter": "attending"}
+    response = client.post(url, data=data)
+
+    assert [guest.name for guest in response.context["guests"]] == ["Anne"]
+
+    url = app.url_path_for("guest_rows_partial", party_id=party.uuid)
+    params = {
+        "cursor": response.context["next_cursor"],
+        "attending_filter": "attending",
+    }
+    response = client.get(url, params=params)
+
+    assert [guest.name for guest in response.context["guests"]] == ["Jane"]
+
+
+def test_guest_rows_partial_rejects_invalid_cursor(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+
+    url = app.url_path_for("guest_rows_partial", party_id=party.uuid)
+    response = client.get(url, params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_mark_guests_attending_select_all_updates_guests_matching_the_filter(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(guest_list, "_GUEST_PAGE_SIZE", 1)
+
+    party = create_party(session=session)
+    anne = create_guest(session=session, party=party, name="Anne", attending=False)
+    joanne = create_guest(session=session, party=party, name="Joanne", attending=False)
+    jane = create_guest(session=session, party=party, name="Jane", attending=False)
+
+    url = app.url_path_for("mark_guests_attending_partial", party_id=party.uuid)
+    data = {
+        "select_all": "true",
+        "attending_filter": "not_attending",
+        "guest_search": "anne",
+        "response_mode": "changed",
+    }
+    response = client.put(url, data=data)
+
+    for guest in (anne, joanne, jane):
+        session.refresh(guest)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert anne.attending is True
+    assert joanne.attending is True
+    assert jane.attending is False
+    # A "select all" sends the first page of the list again.
+    assert "HX-Reswap" not in response.headers
+    assert len(response.context["guests"]) == 1
+
+
+def test_mark_guests_not_attending_select_all_searches_within_the_filter(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    # More matches than a search lists, most of them outside the filter.
+    for i in range(search._SEARCH_LIMIT + 10):
+        session.add(Guest(name=f"Anna {i}", attending=False, party=party))
+    for i in range(10):
+        session.add(Guest(name=f"Anna Attending {i}", attending=True, party=party))
+    session.commit()
+
+    url = app.url_path_for("mark_guests_not_attending_partial", party_id=party.uuid)
+    data = {
+        "select_all": "true",
+        "attending_filter": "attending",
+        "guest_search": "anna",
+    }
+    response = client.put(url, data=data)
+
+    assert response.status_code == status.HTTP_200_OK
+    attending = session.exec(
+        select(Guest).where(Guest.party_id == party.uuid, Guest.attending == True)
+    ).all()
+    assert attending == []
+
+
+def test_import_guests_partial_imports_a_csv_upload(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    url = app.url_path_for("import_guests_partial", party_id=party.uuid)
+    csv_file = (
+        "Name,Attending\nAnna Boleyn,yes\nMaria Tudor,\n ,yes\nJane Seymour,maybe\n"
+    )
+
+    response = client.post(url, files={"guest_file": ("guests.csv", csv_file)})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.template.name == "guest_list/partial_guest_import.html"
+    guest_import = response.context["guest_import"]
+    assert (guest_import.imported, guest_import.skipped) == (2, 2)
+    assert guest_import.errors[0].startswith("Line 4: name")
+    assert guest_import.errors[1].startswith("Line 5: attending")
+    assert response.context["summary"].attending_count == 1
+
+    guests = session.exec(
+        select(Guest.name, Guest.attending).where(Guest.party_id == party.uuid)
+    ).all()
+    assert sorted(guests) == [("Anna Boleyn", True), ("Maria Tudor", False)]
+
+
+def test_import_guests_partial_imports_pasted_names_and_ndjson(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    url = app.url_path_for("import_guests_partial", party_id=party.uuid)
+
+    response = client.post(url, data={"guest_text": "Anna Boleyn\n\nMaria Tudor\n"})
+    assert response.context["guest_import"].imported == 2
+
+    ndjson = '{"name": "Jane Seymour", "attending": true}\n[]\n'
+    response = client.post(url, files={"guest_file": ("guests.ndjson", ndjson)})
+    assert response.context["guest_import"].imported == 1
+    assert response.context["guest_import"].skipped == 1
+
+    session.refresh(party)
+    assert (party.guest_count, party.attending_count) == (3, 1)
+
+
+def test_import_guests_partial_keeps_commas_in_plain_names(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    url = app.url_path_for("import_guests_partial", party_id=party.uuid)
+
+    response = client.post(url, data={"guest_text": "Smith, John\nTudor, Maria\n"})
+
+    assert response.context["guest_import"].imported == 2
+    names = session.exec(select(Guest.name).where(Guest.party_id == party.uuid))
+    assert sorted(names) == ["Smith, John", "Tudor, Maria"]
+
+
+def test_import_guests_partial_reports_csv_rows_with_extra_fields(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    url = app.url_path_for("import_guests_partial", party_id=party.uuid)
+    csv_file = "Name\nAnna Boleyn\nSmith, John\n"
+
+    response = client.post(url, files={"guest_file": ("guests.csv", csv_file)})
+
+    guest_import = response.context["guest_import"]
+    assert (guest_import.imported, guest_import.skipped) == (1, 1)
+    assert guest_import.errors == ["Line 3: more fields than the header"]
+    names = session.exec(select(Guest.name).where(Guest.party_id == party.uuid))
+    assert names.all() == ["Anna Boleyn"]
+
+
+def test_import_guests_partial_imports_in_batches(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(guest_import, "_IMPORT_BATCH_SIZE", 7)
+    party = create_party(session=session)
+    url = app.url_path_for("import_guests_partial", party_id=party.uuid)
+    names = "".join(f"Guest {i}\n" for i in range(100))
+
+    response = client.post(url, files={"guest_file": ("guests.txt", names)})
+
+    assert response.context["guest_import"].imported == 100
+    assert len(response.context["guests"]) == guest_list._GUEST_PAGE_SIZE
+    assert 'id="guests" hx-swap-oob="true"' in response.text
+
+
+def test_import_guests_partial_returns_404_for_unknown_party(client: TestClient):
+    url = app.url_path_for("import_guests_partial", party_id=uuid4())
+
+    response = client.post(url, data={"guest_text": "Anna Boleyn"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
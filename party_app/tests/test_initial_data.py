@@ -0,0 +1,121 @@
+import io
+import json
+from decimal import Decimal
+from datetime import date, time
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session, func, select
+
+from party_app.bulk import Progress, insert_rows, iter_json_array
+from party_app.initial_data.load_initial_data_to_db import (
+    RejectWriter,
+    load_file,
+)
+from party_app.models import Gift, Guest, Party
+
+INITIAL_DATA = Path(__file__).parent.parent / "initial_data"
+
+
+def test_iter_json_array_decodes_items_split_across_reads():
+    items = [{"name": f"Guest {i}", "price": 12.5, "n": 1234} for i in range(50)]
+    file = io.StringIO(" [\n" + ",\n".join(json.dumps(item) for item in items) + "]\n")
+
+    decoded = list(iter_json_array(file, read_size=7))
+
+    assert decoded == [{**item, "price": Decimal("12.5")} for item in items]
+
+
+@pytest.mark.parametrize("text", ["{}", '[{"a": 1}', '[{"a": ]'])
+def test_iter_json_array_rejects_malformed_input(text: str):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), read_size=3))
+
+
+def test_load_file_loads_the_initial_data_in_batches(session: Session):
+    engine = session.get_bind()
+    progress = Progress("test", stream=io.StringIO())
+
+    for name, model in (
+        ("initial_parties.json", Party),
+        ("initial_gifts.json", Gift),
+        ("initial_guests.json", Guest),
+    ):
+        expected = len(json.loads((INITIAL_DATA / name).read_text()))
+        assert load_file(engine, INITIAL_DATA / name, model, batch_size=3) == expected
+        assert session.exec(select(func.count()).select_from(model)).one() == expected
+
+    party = session.exec(select(Party).where(Party.guest_count > 0)).first()
+    assert (
+        party.guest_count
+        == session.exec(select(func.count()).where(Guest.party_id == party.uuid)).one()
+    )
+
+
+def test_load_file_writes_rejected_rows(session: Session, tmp_path: Path):
+    engine = session.get_bind()
+    load_file(engine, INITIAL_DATA / "initial_parties.json", Party)
+    party_id = session.exec(select(Party.uuid)).first()
+
+    guest = {
+        "name": "Anna Boleyn",
+        "attending": True,
+        "party_id": str(party_id),
+        "uuid": "d5d75c34-a4e3-423e-a657-7a5e070ea849",
+    }
+    guests = tmp_path / "guests.ndjson"
+    guests.write_text(
+        "\n".join(
+            [
+                json.dumps(guest),
+                json.dumps({**guest, "attending": "maybe", "uuid": str(party_id)}),
+                "{not json",
+                # Same uuid as the first guest.
+                json.dumps({**guest, "name": "Maria Tudor"}),
+            ]
+        )
+    )
+    rejects = RejectWriter(tmp_path / "rejects.ndjson")
+
+    loaded = load_file(engine, guests, Guest, rejects=rejects)
+    rejects.close()
+
+    assert loaded == 1
+    rejected = [
+        json.loads(line)
+        for line in (tmp_path / "rejects.ndjson").read_text().splitlines()
+    ]
+    assert [reject["source"] for reject in rejected] == ["guests.ndjson"] * 3
+    assert rejected[-1]["record"]["name"] == "Maria Tudor"
+    assert session.exec(select(Guest.name)).all() == ["Anna Boleyn"]
+
+
+def test_insert_rows_retries_a_rejected_copy_row_by_row(postgres_engine):
+    rejected = []
+    with Session(postgres_engine) as session:
+        party = Party(
+            party_date=date(2030, 1, 1),
+            party_time=time(12),
+            venue="Amazing castle",
+            invitation="You are invited to the party!",
+        )
+        session.add(party)
+        session.commit()
+        rows = [
+            {"uuid": uuid4(), "party_id": party_id, "name": name, "attending": False}
+            # The second guest's party doesn't exist.
+            for party_id, name in ((party.uuid, "Anna Boleyn"), (uuid4(), "Nobody"))
+        ]
+
+        inserted = insert_rows(
+            session,
+            Guest.__table__,
+            rows,
+            on_reject=lambda row, error: rejected.append(row["name"]),
+        )
+        session.commit()
+
+        assert inserted == 1
+        assert rejected == ["Nobody"]
+        assert session.exec(select(Guest.name)).all() == ["Anna Boleyn"]
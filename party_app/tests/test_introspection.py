@@ -0,0 +1,65 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import exc
+
+import db
+from party_app.main import app
+
+
+@pytest.fixture(name="small_pool_engine")
+def small_pool_engine_fixture(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(db, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(db, "DB_POOL_TIMEOUT", 0.05)
+
+    engine = db.create_database_engine(f"sqlite:///{tmp_path / 'pool.db'}", "test")
+    yield engine
+    engine.dispose()
+    db.pools.pop("test")
+
+
+def test_pool_status_reports_checkouts_and_timeouts(
+    client: TestClient, admin_headers: dict, small_pool_engine
+):
+    with small_pool_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            small_pool_engine.connect()
+
+    url = app.url_path_for("pool_status")
+    response = client.get(url, headers=admin_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    stats = response.json()["test"]
+    assert stats["size"] == 1
+    assert stats["in_use"] == 0
+    assert stats["in_use_max"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
+
+
+def test_pool_status_keeps_stats_after_dispose(small_pool_engine):
+    with small_pool_engine.connect():
+        pass
+    small_pool_engine.dispose()
+    with small_pool_engine.connect():
+        pass
+
+    assert db.pool_status()["test"]["checkouts"] == 2
+
+
+@pytest.mark.parametrize(
+    "route_name", ["pool_status", "cache_status", "startup_report", "metrics"]
+)
+def test_internal_pages_require_the_admin_token(
+    client: TestClient, admin_headers: dict, route_name: str
+):
+    url = app.url_path_for(route_name)
+
+    assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
+    assert (
+        client.get(url, headers={"X-Admin-Token": "wrong"}).status_code
+        == status.HTTP_403_FORBIDDEN
+    )
+    assert client.get(url, headers=admin_headers).status_code == status.HTTP_200_OK
@@ -0,0 +1,84 @@
+from typing import Callable
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from party_app.main import app
+from party_app.metrics import Histogram, Metric, registry
+from party_app.models import Party
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    registry.clear()
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+
+    histogram.observe(('say "hi"',), 0.05)
+    histogram.observe(('say "hi"',), 0.1)
+    histogram.observe(('say "hi"',), 5.0)
+
+    assert histogram.render().splitlines() == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="say \\"hi\\"",le="0.1"} 2',
+        'test_seconds_bucket{route="say \\"hi\\"",le="1.0"} 2',
+        'test_seconds_bucket{route="say \\"hi\\"",le="+Inf"} 3',
+        'test_seconds_sum{route="say \\"hi\\""} 5.15',
+        'test_seconds_count{route="say \\"hi\\""} 3',
+    ]
+
+
+def test_metric_subclasses_must_implement_samples():
+    class Incomplete(Metric):
+        type = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "Incomplete.")
+
+
+def test_metrics_reports_requests_by_route_name(
+    session: Session,
+    client: TestClient,
+    admin_headers: dict,
+    create_party: Callable[..., Party],
+):
+    party = create_party(session=session)
+    client.get(app.url_path_for("party_detail_page", party_id=party.uuid))
+    client.get("/no/such/page")
+    client.get(app.url_path_for("static", path="css/output.css"))
+
+    response = client.get(app.url_path_for("metrics"), headers=admin_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert (
+        'http_request_duration_seconds_count{route="party_detail_page",'
+        'method="GET",status="200"} 1'
+    ) in lines
+    assert (
+        'http_request_duration_seconds_count{route="unmatched",'
+        'method="GET",status="404"} 1'
+    ) in lines
+    # Mounts are labeled by their name.
+    assert (
+        'http_request_duration_seconds_count{route="static",'
+        'method="GET",status="200"} 1'
+    ) in lines
+    assert 'http_response_size_bytes_count{route="party_detail_page"} 1' in lines
+    assert (
+        'http_request_sql_duration_seconds_count{route="party_detail_page"} 1' in lines
+    )
+    assert any(
+        line.startswith(
+            'template_render_duration_seconds_count{template="party_detail/'
+        )
+        for line in lines
+    )
+    # The scrape itself is still in flight.
+    assert "http_requests_in_flight 1" in lines
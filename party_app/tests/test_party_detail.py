@@ -64,3 +64,45 @@ def test_party_detail_form_partial_updates_party_and_returns_updated_party(
     )
     assert party.invitation == updated_data["invitation"]
     assert party.venue == updated_data["venue"]
+
+
+def test_party_detail_page_returns_not_modified_for_matching_etag(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+
+    url = app.url_path_for("party_detail_page", party_id=party.uuid)
+    response = client.get(url)
+    etag = response.headers["ETag"]
+
+    cached_response = client.get(url)
+    not_modified_response = client.get(url, headers={"If-None-Match": etag})
+
+    assert cached_response.text == response.text
+    assert cached_response.headers["ETag"] == etag
+    assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified_response.content == b""
+
+
+def test_party_detail_save_form_partial_invalidates_cached_party_detail_page(
+    session: Session, client: TestClient, create_party: Callable[..., Party]
+):
+    party = create_party(session=session, venue="Old Venue")
+
+    url = app.url_path_for("party_detail_page", party_id=party.uuid)
+    etag = client.get(url).headers["ETag"]
+
+    save_url = app.url_path_for("party_detail_save_form_partial", party_id=party.uuid)
+    updated_data = {
+        "party_date": "2030-01-01",
+        "party_time": "00:00",
+        "invitation": "Updated invitation",
+        "venue": "Updated Venue",
+    }
+    client.put(save_url, data=updated_data)
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert "Updated Venue" in response.text
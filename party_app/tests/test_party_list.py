@@ -70,3 +70,44 @@ def test_party_list_page_returns_correct_template(
     htmx_response = client.get(url, headers={"HX-Request": "true"})
     assert htmx_response.status_code == status.HTTP_200_OK
     assert htmx_response.template.name == "party_list/partial_party_list.html"
+
+
+def test_party_list_page_follows_cursor_to_next_page(
+    session: Session,
+    client: TestClient,
+    create_party: Callable[..., Party],
+):
+    today = datetime.date.today()
+    for i in range(11):
+        create_party(
+            session=session,
+            party_date=today + datetime.timedelta(days=i % 3),
+            venue=f"Venue {i + 1}",
+        )
+
+    url = app.url_path_for("party_list_page")
+
+    first_page = client.get(url)
+    next_cursor = first_page.context["next_cursor"]
+    assert len(first_page.context["parties"]) == 6
+    assert next_cursor is not None
+    assert f"?cursor={next_cursor}" in first_page.text
+
+    second_page = client.get(url, params={"cursor": next_cursor})
+    assert second_page.status_code == status.HTTP_200_OK
+    assert len(second_page.context["parties"]) == 5
+    assert second_page.context["next_cursor"] is None
+
+    seen = first_page.context["parties"] + second_page.context["parties"]
+    assert len({party.uuid for party in seen}) == 11
+    assert [(p.party_date, p.party_time, p.uuid) for p in seen] == sorted(
+        (p.party_date, p.party_time, p.uuid) for p in seen
+    )
+
+
+def test_party_list_page_rejects_invalid_cursor(client: TestClient):
+    url = app.url_path_for("party_list_page")
+
+    response = client.get(url, params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,163 @@
+from typing import Callable
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import InvalidRequestError
+from sqlmodel import Session, select
+
+from party_app.cache import fragment_cache, party_cache
+from party_app.main import app
+from party_app.metrics import MetricsMiddleware
+from party_app.models import Gift, Guest, Party
+
+# Statements each route may run on a cold cache, whatever the number of guests
+# and gifts of the party.
+BUDGETS = [
+    ("GET", "party_list_page", {"party": False}, None, 1),
+    ("GET", "party_detail_page", {}, None, 1),
+    ("GET", "partial_party_detail_edit", {}, None, 1),
+    ("GET", "guest_list_page", {}, None, 2),
+    (
+        "POST",
+        "filter_guests_partial",
+        {},
+        {"guest_search": "guest", "attending_filter": "all"},
+        1,
+    ),
+    ("GET", "gift_registry_page", {}, None, 3),
+    ("GET", "gift_detail_partial", {"gift": True}, None, 2),
+    ("GET", "gift_update_partial", {"gift": True}, None, 1),
+    (
+        "PUT",
+        "gift_update_save_partial",
+        {"gift": True},
+        {"gift_name": "Teapot", "price": "20", "link": ""},
+        2,
+    ),
+    (
+        "POST",
+        "gift_create_save_partial",
+        {},
+        {"gift_name": "Teapot", "price": "20", "link": ""},
+        2,
+    ),
+    ("DELETE", "gift_remove_partial", {"gift": True}, None, 2),
+    (
+        "PUT",
+        "party_detail_save_form_partial",
+        {},
+        {
+            "party_date": "2050-01-01",
+            "party_time": "18:00",
+            "invitation": "Come along!",
+            "venue": "The garden",
+        },
+        1,
+    ),
+    (
+        "POST",
+        "new_party_create_page",
+        {"party": False},
+        {
+            "party_date": "2050-01-01",
+            "party_time": "18:00",
+            "invitation": "Come along to the party in the garden!",
+            "venue": "The garden",
+        },
+        1,
+    ),
+]
+
+
+@pytest.fixture(name="party")
+def party_fixture(session: Session, create_party: Callable[..., Party]):
+    party = create_party(session=session)
+    for i in range(20):
+        session.add(Guest(name=f"Guest {i}", attending=i % 2 == 0, party=party))
+        session.add(Gift(gift_name=f"Gift {i}", price=i + 1, link=None, party=party))
+    session.commit()
+    return party
+
+
+@pytest.mark.parametrize("method, route, path_params, data, budget", BUDGETS)
+def test_route_stays_within_query_budget(
+    method,
+    route,
+    path_params,
+    data,
+    budget,
+    session: Session,
+    client: TestClient,
+    query_budget,
+    party: Party,
+):
+    params = {"party_id": party.uuid} if path_params.get("party", True) else {}
+    if path_params.get("gift"):
+        params["gift_id"] = session.exec(select(Gift.uuid)).first()
+    url = app.url_path_for(route, **params)
+
+    with query_budget(budget):
+        response = client.request(method, url, data=data, follow_redirects=False)
+
+    assert response.status_code in (status.HTTP_200_OK, status.HTTP_302_FOUND)
+
+
+@pytest.mark.parametrize("response_mode, budget", [("changed", 2), ("list", 2)])
+def test_mark_guests_attending_stays_within_query_budget(
+    response_mode,
+    budget,
+    session: Session,
+    client: TestClient,
+    query_budget,
+    party: Party,
+):
+    guest_ids = [
+        str(guest_id) for guest_id in session.exec(select(Guest.uuid).limit(5))
+    ]
+    url = app.url_path_for("mark_guests_attending_partial", party_id=party.uuid)
+
+    with query_budget(budget):
+        response = client.put(
+            url, data={"guest_ids": guest_ids, "response_mode": response_mode}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_query_budget_reports_the_statements(
+    session: Session, client: TestClient, query_budget, party: Party
+):
+    url = app.url_path_for("gift_registry_page", party_id=party.uuid)
+
+    with pytest.raises(AssertionError, match="3 statements, the budget is 1"):
+        with query_budget(1):
+            client.get(url)
+
+
+def test_party_collections_are_not_lazy_loaded(session: Session, party: Party):
+    party_id = party.uuid
+    session.expunge_all()
+    party = session.get(Party, party_id)
+
+    with pytest.raises(InvalidRequestError):
+        party.guests
+
+
+def test_sql_debug_headers(
+    monkeypatch, session: Session, client: TestClient, party: Party
+):
+    url = app.url_path_for("gift_registry_page", party_id=party.uuid)
+    assert "X-SQL-Queries" not in client.get(url).headers
+
+    middleware = next(m for m in app.user_middleware if m.cls is MetricsMiddleware)
+    monkeypatch.setitem(middleware.kwargs, "debug_headers", True)
+    monkeypatch.setattr(app, "middleware_stack", None)
+    fragment_cache.clear()
+    party_cache.clear()
+
+    response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert int(response.headers["X-SQL-Queries"]) >= 1
+    assert float(response.headers["X-SQL-Time-Ms"]) >= 0
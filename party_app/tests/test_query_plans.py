@@ -0,0 +1,268 @@
+import json
+import re
+from typing import Callable
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from party_app.dependency import get_read_session, get_session
+from party_app.main import app
+from party_app.models import Gift, Guest, Party
+from party_app.routes.guest_list import encode_guest_cursor
+
+_EXPLAINED_STATEMENTS = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+# "SCAN party" is a full table scan, "SEARCH party USING INDEX ..." and
+# "SCAN party USING INDEX ..." go through an index.
+_SQLITE_SEQ_SCAN = re.compile(r"^SCAN \w+$")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def plan_engine(request):
+    if request.param == "postgresql":
+        yield request.getfixturevalue("postgres_engine")
+        return
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def plan_session(plan_engine):
+    with Session(plan_engine) as session:
+        yield session
+
+
+@pytest.fixture
+def plan_client(plan_session: Session):
+    app.dependency_overrides[get_session] = lambda: plan_session
+    app.dependency_overrides[get_read_session] = lambda: plan_session
+
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def _sqlite_seq_scans(connection, statement, parameters) -> list[str]:
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [detail for *_, detail in plan if _SQLITE_SEQ_SCAN.match(detail)]
+
+
+def _postgres_seq_scans(connection, statement, parameters) -> list[str]:
+    # On tiny test tables Postgres prefers a sequential scan anyway, so it is
+    # discouraged here and only shows up when no index can serve the query.
+    connection.exec_driver_sql("SET enable_seqscan = off")
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+def assert_no_seq_scans(engine, statements):
+    statements = [
+        (statement, parameters)
+        for statement, parameters in statements
+        if _EXPLAINED_STATEMENTS.match(statement)
+    ]
+    assert statements, "the request didn't run any queries"
+
+    if engine.dialect.name == "sqlite":
+        seq_scans = _sqlite_seq_scans
+    else:
+        seq_scans = _postgres_seq_scans
+
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            scans = seq_scans(connection, statement, parameters)
+            assert not scans, f"{scans} in the plan of:\n{statement}"
+
+
+@pytest.mark.parametrize("params", [{}, {"page": 2}, {"cursor": True}])
+def test_party_list_page_uses_indexes(
+    params,
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+):
+    for i in range(8):
+        create_party(session=plan_session, venue=f"Venue {i + 1}")
+
+    url = app.url_path_for("party_list_page")
+    if "cursor" in params:
+        params = {"cursor": plan_client.get(url).context["next_cursor"]}
+
+    with capture_statements(plan_engine) as statements:
+        plan_client.get(url, params=params)
+
+    assert_no_seq_scans(plan_engine, statements)
+
+
+def test_gift_registry_page_uses_indexes(
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=plan_session)
+    create_gift(session=plan_session, party=party)
+
+    url = app.url_path_for("gift_registry_page", party_id=party.uuid)
+    with capture_statements(plan_engine) as statements:
+        plan_client.get(url)
+
+    assert_no_seq_scans(plan_engine, statements)
+
+
+@pytest.mark.parametrize("route_name", ["gift_detail_partial", "gift_update_partial"])
+def test_gift_routes_use_indexes(
+    route_name,
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=plan_session)
+    gift = create_gift(session=plan_session, party=party)
+
+    url = app.url_path_for(route_name, party_id=party.uuid, gift_id=gift.uuid)
+    # Otherwise session.get() answers from the identity map without a query.
+    plan_session.expunge_all()
+    with capture_statements(plan_engine) as statements:
+        plan_client.get(url)
+
+    assert_no_seq_scans(plan_engine, statements)
+
+
+@pytest.mark.parametrize(
+    "route_name", ["mark_guests_attending_partial", "mark_guests_not_attending_partial"]
+)
+def test_guest_attendance_routes_use_indexes(
+    route_name,
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=plan_session)
+    guest = create_guest(session=plan_session, party=party)
+
+    url = app.url_path_for(route_name, party_id=party.uuid)
+    with capture_statements(plan_engine) as statements:
+        plan_client.put(url, data={"guest_ids": [guest.uuid]})
+
+    assert_no_seq_scans(plan_engine, statements)
+
+
+def test_guest_list_page_uses_indexes(
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=plan_session)
+    create_guest(session=plan_session, party=party)
+
+    url = app.url_path_for("guest_list_page", party_id=party.uuid)
+    with capture_statements(plan_engine) as statements:
+        plan_client.get(url)
+
+    assert_no_seq_scans(plan_engine, statements)
+
+
+@pytest.mark.parametrize("attending_filter", ["all", "attending", "not_attending"])
+@pytest.mark.parametrize("guest_search", ["", "an", "anna"])
+def test_filter_guests_partial_uses_indexes(
+    attending_filter,
+    guest_search,
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=plan_session)
+    create_guest(session=plan_session, party=party, name="Anna")
+
+    url = app.url_path_for("filter_guests_partial", party_id=party.uuid)
+    data = {"guest_search": guest_search, "attending_filter": attending_filter}
+    with capture_statements(plan_engine) as statements:
+        plan_client.post(url, data=data)
+
+    assert_no_seq_scans(plan_engine, statements)
+
+
+@pytest.mark.parametrize("attending_filter", ["all", "attending", "not_attending"])
+def test_guest_rows_partial_uses_indexes(
+    attending_filter,
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=plan_session)
+    guest = create_guest(session=plan_session, party=party)
+
+    url = app.url_path_for("guest_rows_partial", party_id=party.uuid)
+    params = {
+        "cursor": encode_guest_cursor(guest),
+        "attending_filter": attending_filter,
+    }
+    with capture_statements(plan_engine) as statements:
+        plan_client.get(url, params=params)
+
+    assert_no_seq_scans(plan_engine, statements)
+
+
+@pytest.mark.parametrize("attending_filter", ["all", "attending"])
+@pytest.mark.parametrize("guest_search", ["", "anna"])
+def test_select_all_attendance_uses_indexes(
+    attending_filter,
+    guest_search,
+    plan_engine,
+    capture_statements,
+    plan_session: Session,
+    plan_client: TestClient,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=plan_session)
+    create_guest(session=plan_session, party=party, name="Anna", attending=False)
+
+    url = app.url_path_for("mark_guests_attending_partial", party_id=party.uuid)
+    data = {
+        "select_all": "true",
+        "attending_filter": attending_filter,
+        "guest_search": guest_search,
+    }
+    with capture_statements(plan_engine) as statements:
+        plan_client.put(url, data=data)
+
+    assert_no_seq_scans(plan_engine, statements)
@@ -0,0 +1,105 @@
+from datetime import date, time
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from party_app import dependency
+from party_app.cache import fragment_cache, party_cache
+from party_app.main import create_app
+from party_app.models import Party
+from party_app.replica import RECENT_WRITE_COOKIE
+
+replica_app = create_app(database_async=False, read_your_writes=True)
+
+
+# Two SQLite files, the replica still has the party as it was before the
+# last write to the primary.
+@pytest.fixture(name="party")
+def party_fixture(tmp_path, monkeypatch):
+    engines = {}
+    for name in ("primary", "replica"):
+        engines[name] = create_engine(f"sqlite:///{tmp_path / name}.db")
+        SQLModel.metadata.create_all(engines[name])
+
+    party = Party(
+        party_date=date(2030, 1, 1),
+        party_time=time(12),
+        venue="New Venue",
+        invitation="You are invited to the party!",
+    )
+    for name, venue in (("primary", "New Venue"), ("replica", "Old Venue")):
+        with Session(engines[name]) as session:
+            session.add(Party(**{**party.model_dump(), "venue": venue}))
+            session.commit()
+
+    monkeypatch.setattr(dependency, "engine", engines["primary"])
+    monkeypatch.setattr(dependency, "replica_engine", engines["replica"])
+    yield party
+    for engine in engines.values():
+        engine.dispose()
+
+
+def test_reads_go_to_the_replica(party: Party):
+    client = TestClient(replica_app)
+
+    response = client.get(
+        replica_app.url_path_for("party_detail_page", party_id=party.uuid)
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "Old Venue" in response.text
+    assert RECENT_WRITE_COOKIE not in response.cookies
+
+
+def test_client_reads_its_own_writes_from_the_primary(party: Party):
+    client = TestClient(replica_app)
+    url = replica_app.url_path_for("party_detail_page", party_id=party.uuid)
+
+    response = client.put(
+        replica_app.url_path_for("party_detail_save_form_partial", party_id=party.uuid),
+        data={
+            "party_date": "2030-01-01",
+            "party_time": "12:00",
+            "invitation": "You are invited to the party!",
+            "venue": "Newest Venue",
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "Max-Age=10" in response.headers["set-cookie"]
+
+    assert "Newest Venue" in client.get(url).text
+
+
+def test_replica_reads_dont_fill_the_caches_the_writer_reads(party: Party):
+    writer, other_client = TestClient(replica_app), TestClient(replica_app)
+    url = replica_app.url_path_for("party_detail_page", party_id=party.uuid)
+    writer.put(
+        replica_app.url_path_for("party_detail_save_form_partial", party_id=party.uuid),
+        data={
+            "party_date": "2030-01-01",
+            "party_time": "12:00",
+            "invitation": "You are invited to the party!",
+            "venue": "Newest Venue",
+        },
+    )
+
+    # The replica hasn't caught up with the write yet.
+    assert "Old Venue" in other_client.get(url).text
+
+    assert "Newest Venue" in writer.get(url).text
+    assert len(fragment_cache._fragments) == 0
+    assert len(party_cache._snapshots) == 0
+
+
+def test_read_only_posts_dont_set_the_cookie(party: Party):
+    client = TestClient(replica_app)
+
+    response = client.post(
+        replica_app.url_path_for("filter_guests_partial", party_id=party.uuid),
+        data={"guest_search": "", "attending_filter": "all"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert RECENT_WRITE_COOKIE not in response.cookies
@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from party_app.dependency import create_template_env
+from party_app.main import app
+from party_app.startup import StartupReport, precompile_templates, warm_up
+
+
+def test_production_templates_reuse_the_compiled_bytecode(tmp_path, monkeypatch):
+    env = create_template_env(production=True, cache_dir=str(tmp_path))
+
+    compiled = precompile_templates(env)
+
+    assert compiled == len(env.list_templates()) > 0
+    assert len(list(tmp_path.iterdir())) == compiled
+    assert not env.auto_reload
+
+    # A second worker loads them from the cache without compiling.
+    next_env = create_template_env(production=True, cache_dir=str(tmp_path))
+    compiles = []
+    monkeypatch.setattr(
+        next_env, "compile", lambda *args, **kwargs: compiles.append(args)
+    )
+    next_env.get_template("base.html")
+    assert compiles == []
+
+
+def test_development_templates_reload_without_cache():
+    env = create_template_env(production=False)
+
+    assert env.auto_reload
+    assert env.bytecode_cache is None
+
+
+def test_warm_up_times_the_connection_and_templates(session: Session):
+    env = create_template_env(production=False)
+    report = StartupReport(import_seconds=1.0)
+
+    asyncio.run(warm_up(env, session.get_bind(), report=report))
+
+    assert report.templates == len(env.list_templates())
+    assert report.engine_seconds >= 0
+    assert report.templates_seconds >= 0
+    assert len(env.cache) == report.templates
+
+
+def test_startup_report_page(client: TestClient, admin_headers: dict):
+    response = client.get(app.url_path_for("startup_report"), headers=admin_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["import_seconds"] > 0
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from party_app.dependency import static_assets
+from party_app.main import app
+from party_app.static_assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    FingerprintedStaticFiles,
+    StaticAssets,
+    accepted_encodings,
+    brotli,
+    compress,
+    fingerprint,
+)
+
+CSS = b".party { color: red; }\n" * 100
+
+
+@pytest.fixture(name="static_dir")
+def static_dir_fixture(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.css").write_bytes(CSS)
+    return tmp_path
+
+
+def static_client(assets: StaticAssets) -> TestClient:
+    static_app = FastAPI()
+    static_app.mount("/static", FingerprintedStaticFiles(assets), name="static")
+    return TestClient(static_app)
+
+
+def test_fingerprint_goes_before_the_extension():
+    assert fingerprint("css/output.css", b"a") == "css/output.ca978112ca1b.css"
+    assert fingerprint("js/v1.2/LICENSE", b"a") == "js/v1.2/LICENSE.ca978112ca1b"
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br;q=0.5") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=1.0") == {"gzip"}
+    assert accepted_encodings("") == set()
+
+
+def test_pages_link_to_fingerprinted_assets(client: TestClient):
+    response = client.get(app.url_path_for("party_list_page"))
+    css_url = app.url_path_for("static", path=static_assets.url_path("css/output.css"))
+
+    assert css_url != app.url_path_for("static", path="css/output.css")
+    assert css_url in response.text
+
+    css = client.get(css_url)
+    assert css.status_code == status.HTTP_200_OK
+    assert css.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert css.headers["content-type"].startswith("text/css")
+
+    plain = client.get(app.url_path_for("static", path="css/output.css"))
+    assert "cache-control" not in plain.headers
+    assert plain.content == css.content
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, content_encoding",
+    [("gzip, br", "br"), ("gzip", "gzip"), ("identity", None)],
+)
+def test_serves_precompressed_variants(static_dir, accept_encoding, content_encoding):
+    if content_encoding == "br" and brotli is None:
+        pytest.skip("brotli is not installed")
+    compress(static_dir)
+    assets = StaticAssets(static_dir)
+    url = "/static/" + assets.url_path("css/site.css")
+
+    response = static_client(assets).get(
+        url, headers={"accept-encoding": accept_encoding}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers.get("content-encoding") == content_encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.content == CSS
+
+
+def test_ignores_variants_older_than_their_file(static_dir):
+    compress(static_dir)
+    css = static_dir / "css" / "site.css"
+    os.utime(css, (css.stat().st_atime, css.stat().st_mtime + 10))
+
+    assets = StaticAssets(static_dir)
+
+    assert assets.get("css/site.css").encodings == {}
+
+
+def test_changed_file_gets_a_new_fingerprint(static_dir):
+    assets = StaticAssets(static_dir, check_modified=True)
+    client = static_client(assets)
+    old_url = "/static/" + assets.url_path("css/site.css")
+
+    css = static_dir / "css" / "site.css"
+    css.write_bytes(b".party { color: blue; }\n")
+    os.utime(css, (css.stat().st_atime, css.stat().st_mtime + 10))
+    new_url = "/static/" + assets.url_path("css/site.css")
+
+    assert new_url != old_url
+    assert client.get(new_url).content == b".party { color: blue; }\n"
+    assert client.get(old_url).status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,87 @@
+from typing import Callable
+
+import anyio
+from fastapi import Request
+from sqlmodel import Session, select
+
+from party_app.dependency import _get_templates
+from party_app.models import Guest, Party
+from party_app.streaming import LazyResult, StreamingTemplateResponse
+
+
+def _request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [],
+            "query_string": b"",
+            "server": ("testserver", 80),
+            "scheme": "http",
+            "root_path": "",
+            "router": None,
+        }
+    )
+
+
+async def _read_chunks(response: StreamingTemplateResponse) -> list[bytes]:
+    return [chunk async for chunk in response.body_iterator]
+
+
+def test_streaming_template_response_sends_large_lists_in_chunks(
+    session: Session,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    for i in range(200):
+        create_guest(session=session, party=party, name=f"Guest {i}")
+
+    rendered = []
+    response = StreamingTemplateResponse(
+        _get_templates(),
+        _request(),
+        "guest_list/partial_guest_list.html",
+        context={
+            "guests": LazyResult(
+                session, select(Guest).where(Guest.party_id == party.uuid), 50
+            )
+        },
+        on_rendered=rendered.append,
+        max_rendered_size=1024 * 1024,
+    )
+
+    chunks = anyio.run(_read_chunks, response)
+
+    assert len(chunks) > 1
+    assert b"".join(chunks).count(b'class="table-row"') == 200
+    assert rendered == [b"".join(chunks)]
+
+
+def test_streaming_template_response_skips_on_rendered_for_large_bodies(
+    session: Session,
+    create_party: Callable[..., Party],
+    create_guest: Callable[..., Guest],
+):
+    party = create_party(session=session)
+    for i in range(200):
+        create_guest(session=session, party=party, name=f"Guest {i}")
+
+    rendered = []
+    response = StreamingTemplateResponse(
+        _get_templates(),
+        _request(),
+        "guest_list/partial_guest_list.html",
+        context={
+            "guests": LazyResult(
+                session, select(Guest).where(Guest.party_id == party.uuid)
+            )
+        },
+        on_rendered=rendered.append,
+        max_rendered_size=1024,
+    )
+
+    anyio.run(_read_chunks, response)
+
+    assert rendered == []
@@ -0,0 +1,61 @@
+from decimal import Decimal
+from typing import Callable
+from uuid import uuid4
+
+from sqlmodel import Session
+
+from party_app.cache import party_cache
+from party_app.models import Gift, Party
+from party_app.writes import delete_returning, insert_returning, update_returning
+
+
+def test_insert_returns_the_row_with_its_defaults(
+    session: Session, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+
+    gift = insert_returning(
+        session, Gift(gift_name="Teapot", price=Decimal("20"), party_id=party.uuid)
+    )
+    session.commit()
+
+    assert gift.uuid is not None
+    assert session.get(Gift, gift.uuid) is gift
+    assert party_cache.get(session, party.uuid).gift_count == 1
+
+
+def test_update_returns_the_new_row(
+    session: Session, create_party: Callable[..., Party]
+):
+    party = create_party(session=session)
+    # The snapshot is dropped by the commit of the update.
+    party_cache.get(session, party.uuid)
+
+    updated = update_returning(session, Party, party.uuid, venue="The garden")
+    session.commit()
+
+    assert updated is party
+    assert party.venue == "The garden"
+    assert party_cache.get(session, party.uuid).venue == "The garden"
+
+
+def test_update_and_delete_of_a_missing_row_return_none(session: Session):
+    assert update_returning(session, Gift, uuid4(), gift_name="Teapot") is None
+    assert delete_returning(session, Gift, uuid4()) is None
+
+
+def test_delete_returns_the_deleted_row(
+    session: Session,
+    create_party: Callable[..., Party],
+    create_gift: Callable[..., Gift],
+):
+    party = create_party(session=session)
+    gift_id = create_gift(session=session, party=party).uuid
+    session.expunge_all()
+
+    gift = delete_returning(session, Gift, gift_id)
+    session.commit()
+
+    assert gift.uuid == gift_id
+    assert session.get(Gift, gift_id) is None
+    assert party_cache.get(session, party.uuid).gift_count == 0
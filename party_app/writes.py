@@ -0,0 +1,70 @@
+"""Writes in a single statement that returns the row it wrote.
+
+Through the ORM an update loads the row with `session.get` first, and the
+handlers read it again with `session.refresh` after the commit. These run
+one INSERT, UPDATE or DELETE ... RETURNING instead: the returned row is what
+the database wrote, defaults included, and it stays loaded after the commit
+since the sessions don't expire on commit.
+
+The statements bypass the flush, they mark the party they changed for the
+party cache themselves. RETURNING needs Postgres or SQLite 3.35.
+"""
+
+from typing import Optional, TypeVar
+from uuid import UUID
+
+from sqlmodel import Session, SQLModel, delete, insert, update
+
+from party_app.cache import mark_party_written
+from party_app.models import Party
+
+Model = TypeVar("Model", bound=SQLModel)
+
+
+def _party_id(row: SQLModel) -> UUID:
+    return row.uuid if isinstance(row, Party) else row.party_id
+
+
+def insert_returning(session: Session, instance: Model) -> Model:
+    """Inserts `instance`, returns the inserted row."""
+    model = type(instance)
+    row = session.exec(
+        insert(model).values(**instance.model_dump()).returning(model)
+    ).scalar_one()
+    mark_party_written(session, _party_id(row))
+    return row
+
+
+def update_returning(
+    session: Session, model: type[Model], uuid: UUID, **values
+) -> Optional[Model]:
+    """Sets `values` on the row of `model` with `uuid`, None if there's none."""
+    row = session.exec(
+        update(model).where(model.uuid == uuid).values(**values).returning(model)
+    ).scalar_one_or_none()
+    if row is not None:
+        mark_party_written(session, _party_id(row))
+    return row
+
+
+def delete_returning(
+    session: Session, model: type[Model], uuid: UUID
+) -> Optional[Model]:
+    """Deletes the row of `model` with `uuid`, returns it, None if there's none."""
+    row = session.exec(
+        delete(model).where(model.uuid == uuid).returning(model)
+    ).scalar_one_or_none()
+    if row is not None:
+        mark_party_written(session, _party_id(row))
+        # RETURNING loads it in the identity map, as if it still existed.
+        session.expunge(row)
+    return row
+
+
+def written_party(session: Session, party_id: UUID) -> Optional[Party]:
+    """The party as the writes of `session` left it, counters included.
+
+    Read in the same transaction, before the commit: its cached snapshot
+    still has the counters from before the triggers ran.
+    """
+    return session.get(Party, party_id, populate_existing=True)